@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import math
+from typing import Dict, Optional
+
+from anyio import to_thread
+from fastapi.responses import JSONResponse
+
+from app.database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+from config.app_config import app_config
+
+logger = logging.getLogger(__name__)
+
+# Группы, которые грузят сервер по инициативе клиента, отказывают с 429, остальные — 503
+CLIENT_THROTTLED_GROUPS = ("bulk", "export")
+
+
+class RouteGroup:
+    """Concurrency limit with a bounded wait queue for one group of routes."""
+
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.shed_status = 429 if name in CLIENT_THROTTLED_GROUPS else 503
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+
+    async def acquire(self) -> bool:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Семафор привязан к циклу событий; новый цикл (например, в тестовом клиенте) — новый семафор
+            self._loop, self._semaphore = loop, asyncio.Semaphore(self.limit)
+            self.in_flight = self.waiting = 0
+        if self._semaphore.locked():
+            if self.waiting >= self.queue_size:
+                self.shed += 1
+                return False
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                return False
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def info(self) -> Dict[str, int]:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+
+def parse_groups(spec: str, queue_timeout: float, workers: int = 1) -> Dict[str, RouteGroup]:
+    # "reads=16:64,writes=8:32" -> группа=лимит:очередь; лимиты заданы на весь сервер и делятся между воркерами
+    groups = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, sizes = item.partition("=")
+        limit, _, queue_size = sizes.partition(":")
+        groups[name.strip()] = RouteGroup(
+            name.strip(), max(1, math.ceil(int(limit) / workers)), math.ceil(int(queue_size or 0) / workers), queue_timeout
+        )
+    return groups
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Route group of a request, or None for routes that bypass admission control."""
+    # Предзапросы CORS не занимают место в группе
+    if method == "OPTIONS" or not path.startswith("/api/"):
+        return None
+    if path.rstrip("/").endswith("/export"):
+        return "export"
+    if path.rstrip("/").endswith("/bulk"):
+        return "bulk"
+    if method in ("GET", "HEAD"):
+        return "reads"
+    return "writes"
+
+
+class AdmissionMiddleware:
+    """Admit each API request into its route group, or shed it with 503/429.
+
+    The slot is held until the response body is sent, so streaming exports
+    count against their group for as long as they keep a cursor open.
+    """
+
+    def __init__(self, app, groups: Dict[str, RouteGroup]):
+        self.app = app
+        self.groups = groups
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        group = self.groups.get(classify(scope["method"], scope["path"]))
+        if group is None:
+            return await self.app(scope, receive, send)
+        if not await group.acquire():
+            logger.warning("Shedding %s %s: route group %s is saturated", scope["method"], scope["path"], group.name)
+            response = JSONResponse(
+                status_code=group.shed_status,
+                content={"detail": "Server is busy, retry later"},
+                headers={"Retry-After": str(app_config.ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+            return await response(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            group.release()
+
+
+# SERVER_WORKERS выставляет serve.py; 0 — процесс запущен сам по себе (uvicorn main:app)
+route_groups = parse_groups(app_config.ADMISSION_GROUPS, app_config.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+                            max(app_config.SERVER_WORKERS, 1))
+
+
+def worker_threads() -> int:
+    # По умолчанию — по потоку на каждое соединение пула
+    return app_config.WORKER_THREADS or DB_POOL_SIZE + DB_MAX_OVERFLOW
+
+
+def configure_threadpool():
+    """Size AnyIO's default thread limiter; must run inside the event loop."""
+    threads = worker_threads()
+    to_thread.current_default_thread_limiter().total_tokens = threads
+    admitted = sum(group.limit for group in route_groups.values()) if app_config.ADMISSION_ENABLED else None
+    if admitted is not None and admitted > threads:
+        logger.warning("Route group limits (%s) exceed the worker threadpool (%s)", admitted, threads)
+    logger.info("Worker threadpool: %s threads, DB pool: %s + %s overflow", threads, DB_POOL_SIZE, DB_MAX_OVERFLOW)
+
+
+def admission_info() -> Dict[str, Dict[str, int]]:
+    return {name: group.info() for name, group in route_groups.items()}
@@ -0,0 +1,214 @@
+import atexit
+import logging
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import Date, delete, event, func, insert, literal, select, text, update
+from sqlalchemy.orm import Session
+
+from app import archive, models
+from app.database import SessionLocal
+from config.app_config import app_config
+
+logger = logging.getLogger(__name__)
+
+# Ключ в session.info, где копятся затронутые дни до коммита
+_DIRTY_KEY = "analytics_dirty_days"
+
+# Модель -> колонка времени, по дню которой строка попадает в агрегаты
+DAY_COLUMNS = {
+    models.Ride: models.Ride.end_time,
+    models.Payment: models.Payment.payment_date,
+}
+
+# Источники для пересчёта по водяному знаку: новые строки, записанные в обход API
+WATERMARK_SOURCES = {
+    "Ride.end_time": models.Ride.end_time,
+    "Payment.payment_date": models.Payment.payment_date,
+}
+
+ROLLUPS = (models.Stats_DailyTariff, models.Stats_DailyScooter, models.Stats_DailyPaymentStatus)
+
+
+def day_column(model):
+    return DAY_COLUMNS.get(model)
+
+
+def _as_day(moment) -> Optional[date]:
+    if isinstance(moment, datetime):
+        return moment.date()
+    return moment
+
+
+def mark_dirty(session: Session, *moments):
+    """Schedule the days of ``moments`` for recomputation once ``session`` commits."""
+    days = {_as_day(moment) for moment in moments if moment is not None}
+    if days:
+        session.info.setdefault(_DIRTY_KEY, set()).update(days)
+
+
+def days_between(first: date, last: date) -> Set[date]:
+    return {first + timedelta(days=offset) for offset in range((last - first).days + 1)}
+
+
+def _recompute_day(db: Session, day: date):
+    start = datetime.combine(day, time.min)
+    end = start + timedelta(days=1)
+    stat_date = literal(day, Date)
+    for rollup in ROLLUPS:
+        db.execute(delete(rollup).where(rollup.stat_date == day))
+
+    # Дни до границы архива считаются по основной таблице и архиву вместе
+    ride = archive.source(models.Ride, start, end).columns
+    completed = (ride.end_time >= start, ride.end_time < end)
+    ride_totals = (func.count(), func.coalesce(func.sum(ride.ride_cost), 0), func.coalesce(func.sum(ride.distance), 0))
+    db.execute(insert(models.Stats_DailyTariff).from_select(
+        ["stat_date", "tariff_id", "rides_count", "revenue", "distance"],
+        select(stat_date, ride.tariff_id, *ride_totals).where(*completed).group_by(ride.tariff_id)
+    ))
+    db.execute(insert(models.Stats_DailyScooter).from_select(
+        ["stat_date", "scooter_id", "rides_count", "revenue", "distance"],
+        select(stat_date, ride.scooter_id, *ride_totals).where(*completed).group_by(ride.scooter_id)
+    ))
+
+    payment = archive.source(models.Payment, start, end).columns
+    db.execute(insert(models.Stats_DailyPaymentStatus).from_select(
+        ["stat_date", "status_code", "payments_count", "amount"],
+        select(stat_date, payment.status_code, func.count(), func.coalesce(func.sum(payment.amount), 0)).where(
+            payment.payment_date >= start, payment.payment_date < end
+        ).group_by(payment.status_code)
+    ))
+
+
+def refresh_days(db: Session, days: Iterable[date]) -> int:
+    """Recompute the rollup rows of ``days`` from Ride and Payment; the caller commits."""
+    days = sorted(days)
+    for day in days:
+        _recompute_day(db, day)
+    return len(days)
+
+
+def _advance_watermark(db: Session, source: str, column) -> Set[date]:
+    watermark = db.get(models.Stats_Watermark, source)
+    stmt = select(func.min(column), func.max(column))
+    if watermark is not None:
+        # Отступ назад ловит строки, закоммиченные позже, чем их метка времени
+        since = watermark.value - timedelta(seconds=app_config.ROLLUP_WATERMARK_LAG_SECONDS)
+        stmt = stmt.where(column > since)
+    low, high = db.execute(stmt).one()
+    if high is None:
+        return set()
+    if watermark is None:
+        db.add(models.Stats_Watermark(source=source, value=high))
+    elif high > watermark.value:
+        watermark.value = high
+    return days_between(low.date(), high.date())
+
+
+# Ключ рекомендательной блокировки PostgreSQL / ресурс sp_getapplock SQL Server
+_LOCK_KEY = 0x526F6C6C
+_LOCK_RESOURCE = "rollup-refresh"
+
+
+def try_refresh_lock(db: Session) -> bool:
+    """Take the cluster-wide refresh lock for the current transaction; False if another process holds it."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return bool(db.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _LOCK_KEY}))
+    if dialect == "mssql":
+        return db.scalar(text(
+            "SET NOCOUNT ON; DECLARE @result int; "
+            "EXEC @result = sp_getapplock @Resource = :resource, @LockMode = 'Exclusive', "
+            "@LockOwner = 'Transaction', @LockTimeout = 0; SELECT @result"
+        ), {"resource": _LOCK_RESOURCE}) >= 0
+    # SQLite: пустой UPDATE открывает пишущую транзакцию, остальные процессы ждут её конца
+    db.execute(update(models.Stats_Watermark).where(literal(False)).values(value=models.Stats_Watermark.value))
+    return True
+
+
+class RollupRefresher:
+    """Background job that keeps the daily rollups in step with Ride and Payment.
+
+    Days touched by local commits are queued through ``mark_dirty``; rows written
+    elsewhere (other workers, ETL) are found by a per-source watermark. Every
+    pass recomputes whole days, so repeating one is harmless. A database lock
+    lets one worker at a time run a pass; the others keep their days queued.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._pending: Set[date] = set()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, days: Iterable[date]):
+        with self._lock:
+            self._pending.update(days)
+
+    def refresh(self) -> int:
+        with self._refresh_lock:
+            with self._lock:
+                days, self._pending = self._pending, set()
+            db = SessionLocal()
+            try:
+                if not try_refresh_lock(db):
+                    db.rollback()
+                    self.add(days)
+                    return 0
+                for source, column in WATERMARK_SOURCES.items():
+                    days |= _advance_watermark(db, source, column)
+                refreshed = refresh_days(db, days)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Rollup refresh failed, keeping {len(days)} days queued: {str(e)}")
+                self.add(days)
+                return 0
+            finally:
+                db.close()
+            if refreshed:
+                logger.info("Rollups refreshed for %s days", refreshed)
+            return refreshed
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Rollup refresher error")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="rollup-refresher", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def stop(self):
+        # Дожидаемся текущего прохода, чтобы пул не закрылся под ним
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+
+rollup_refresher = RollupRefresher(app_config.ROLLUP_REFRESH_SECONDS)
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_committed(session: Session):
+    days = session.info.pop(_DIRTY_KEY, None)
+    if days:
+        rollup_refresher.add(days)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty(session: Session):
+    session.info.pop(_DIRTY_KEY, None)
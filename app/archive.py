@@ -0,0 +1,190 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, exists, func, insert, select, text, union_all
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal, engine
+from config.app_config import app_config
+
+logger = logging.getLogger(__name__)
+
+# Основная таблица -> архив и колонка времени, по которой проходит граница архива
+ARCHIVES = {
+    models.Ride: (models.Ride_Archive, "start_time"),
+    models.Payment: (models.Payment_Archive, "payment_date"),
+}
+
+_watermarks: Dict[str, datetime] = {}
+_loaded_at: Optional[float] = None
+_lock = threading.Lock()
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    if moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def watermarks() -> Dict[str, datetime]:
+    """Archive boundaries per hot table, re-read at most every ``ARCHIVE_WATERMARK_TTL_SECONDS``."""
+    global _watermarks, _loaded_at
+    if _loaded_at is None or time.monotonic() - _loaded_at > app_config.ARCHIVE_WATERMARK_TTL_SECONDS:
+        with _lock:
+            if _loaded_at is None or time.monotonic() - _loaded_at > app_config.ARCHIVE_WATERMARK_TTL_SECONDS:
+                watermark = models.Archive_Watermark
+                with engine.connect() as conn:
+                    _watermarks = dict(conn.execute(select(watermark.source, watermark.value)).all())
+                _loaded_at = time.monotonic()
+    return _watermarks
+
+
+def needs_archive(model, time_from: Optional[datetime], time_to: Optional[datetime]) -> bool:
+    """Whether a range on ``model``'s time column reaches rows already moved to its archive.
+
+    Lists without any range read only the hot table.
+    """
+    if model not in ARCHIVES or (time_from is None and time_to is None):
+        return False
+    boundary = watermarks().get(model.__tablename__)
+    return boundary is not None and (time_from is None or _naive_utc(time_from) < boundary)
+
+
+def archive_model(model):
+    return ARCHIVES[model][0]
+
+
+def source(model, time_from: Optional[datetime] = None, time_to: Optional[datetime] = None):
+    """``model``'s table, or UNION ALL of it and its archive when the range needs both."""
+    table = model.__table__
+    if not needs_archive(model, time_from, time_to):
+        return table
+    archive = archive_model(model).__table__
+    return union_all(
+        select(*table.columns),
+        select(*(archive.columns[column.name] for column in table.columns)),
+    ).subquery(f"{table.name}_all")
+
+
+def _month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def cutoff(hot_months: int, now: Optional[datetime] = None) -> datetime:
+    """Start of the oldest month that stays in the hot tables."""
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    return _add_months(_month_start(now), -hot_months)
+
+
+def _movable(month_start: datetime, month_end: datetime, before: datetime):
+    # Поездка уходит в архив вместе с платежом; завершённая после границы или с более поздним платежом остаётся
+    ride, payment = models.Ride, models.Payment
+    late_payment = exists().where(payment.ride_id == ride.ride_id, payment.payment_date >= before)
+    return (ride.start_time >= month_start, ride.start_time < month_end,
+            func.coalesce(ride.end_time, ride.start_time) < before, ~late_payment)
+
+
+def _move(db: Session, model, condition) -> int:
+    table = model.__table__
+    db.execute(insert(archive_model(model)).from_select(
+        [column.name for column in table.columns], select(*table.columns).where(condition)
+    ))
+    return db.execute(delete(model).where(condition).execution_options(synchronize_session=False)).rowcount
+
+
+def _ensure_partitions(db: Session, before: datetime):
+    # Секции создаются до переноса: секция по умолчанию не должна получить строки месяца, которого ещё нет
+    if db.get_bind(models.Ride).dialect.name != "postgresql":
+        return
+    for model, (archive, time_name) in ARCHIVES.items():
+        oldest = db.scalar(select(func.min(getattr(model, time_name))))
+        if oldest is None:
+            continue
+        table = archive.__tablename__
+        month = _month_start(oldest)
+        while month < before:
+            following = _add_months(month, 1)
+            db.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{table}_{month:%Y_%m}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{following:%Y-%m-%d}')"
+            ))
+            month = following
+
+
+def _advance_watermarks(db: Session, before: datetime) -> bool:
+    advanced = False
+    for model in ARCHIVES:
+        watermark = db.get(models.Archive_Watermark, model.__tablename__)
+        if watermark is None:
+            db.add(models.Archive_Watermark(source=model.__tablename__, value=before))
+            advanced = True
+        elif before > watermark.value:
+            watermark.value = before
+            advanced = True
+    return advanced
+
+
+def _archive_month(db: Session, month_start: datetime, month_end: datetime, before: datetime,
+                   batch_size: int) -> Tuple[int, int]:
+    rides = payments = 0
+    while True:
+        ids = db.scalars(
+            select(models.Ride.ride_id).where(*_movable(month_start, month_end, before)).limit(batch_size)
+        ).all()
+        if not ids:
+            return rides, payments
+        try:
+            payments += _move(db, models.Payment, models.Payment.ride_id.in_(ids) & (models.Payment.payment_date < before))
+            rides += _move(db, models.Ride, models.Ride.ride_id.in_(ids))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+
+def archive_closed_months(hot_months: int = app_config.ARCHIVE_HOT_MONTHS,
+                          batch_size: int = app_config.ARCHIVE_BATCH_SIZE,
+                          settle_seconds: float = app_config.ARCHIVE_WATERMARK_TTL_SECONDS) -> Dict[str, int]:
+    """Move rides of months older than the last ``hot_months`` closed ones, with their payments, to the archive.
+
+    The boundary is published first and rows move only after ``settle_seconds``,
+    so every worker already unions the archive into ranged reads by then. Each
+    batch of ``batch_size`` rides is one transaction; an interrupted run resumes
+    where it stopped.
+    """
+    global _loaded_at
+    before = cutoff(hot_months)
+    totals = {"rides": 0, "payments": 0}
+    db = SessionLocal()
+    try:
+        oldest = db.scalar(select(func.min(models.Ride.start_time)))
+        if oldest is None or oldest >= before:
+            logger.info("Nothing to archive before %s", before)
+            return totals
+        if _advance_watermarks(db, before):
+            db.commit()
+            logger.info("Archive boundary moved to %s, waiting %s s for workers", before, settle_seconds)
+            time.sleep(settle_seconds)
+        _ensure_partitions(db, before)
+        db.commit()
+        month = _month_start(oldest)
+        while month < before:
+            following = _add_months(month, 1)
+            rides, payments = _archive_month(db, month, following, before, batch_size)
+            logger.info("Archived %s: %s rides, %s payments", f"{month:%Y-%m}", rides, payments)
+            totals["rides"] += rides
+            totals["payments"] += payments
+            month = following
+    finally:
+        db.close()
+        _loaded_at = None
+    return totals
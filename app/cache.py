@@ -0,0 +1,328 @@
+import inspect
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from itertools import chain
+from typing import Any, Dict, Iterable, Optional, Type
+
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.database import primary_reads
+from config.app_config import app_config
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+# Ключ в session.info, где копятся изменения до коммита
+_PENDING_KEY = "cache_pending"
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+class LRUCache:
+    """In-process LRU cache with per-entry TTL."""
+
+    backend = "memory"
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.stats.misses += 1
+                return MISSING
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    self.stats.invalidations += 1
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            stale = [key for key in self._data if key.startswith(prefix)]
+            for key in stale:
+                del self._data[key]
+            self.stats.invalidations += len(stale)
+
+    def generation(self, table: str) -> int:
+        return self._generations.get(table, 0)
+
+    def bump_generation(self, table: str):
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._generations.clear()
+
+    def ping(self) -> bool:
+        return True
+
+    def info(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "size": len(self._data), "max_size": self.max_size,
+                "ttl_seconds": self.ttl, **self.stats.as_dict()}
+
+
+class RedisCache:
+    """Cache shared between workers through any Redis-compatible server."""
+
+    backend = "redis"
+
+    def __init__(self, url: str, ttl: float, prefix: str = "mtsurent:cache:"):
+        # Импорт по требованию: без CACHE_REDIS_URL клиент redis не грузится при старте
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_REDIS_URL is set but the 'redis' package is not installed")
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = CacheStats()
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Any:
+        raw = self._client.get(self.prefix + key)
+        if raw is None:
+            self.stats.incr("misses")
+            return MISSING
+        self.stats.incr("hits")
+        return pickle.loads(raw)
+
+    def set(self, key: str, value: Any):
+        self._client.set(self.prefix + key, pickle.dumps(value), px=int(self.ttl * 1000))
+
+    def delete(self, keys: Iterable[str]):
+        keys = [self.prefix + key for key in keys]
+        if keys:
+            self.stats.incr("invalidations", self._client.delete(*keys))
+
+    def delete_prefix(self, prefix: str):
+        stale = list(self._client.scan_iter(match=self.prefix + prefix + "*", count=1000))
+        if stale:
+            self.stats.incr("invalidations", self._client.delete(*stale))
+
+    def generation(self, table: str) -> int:
+        return int(self._client.get(self.prefix + "gen:" + table) or 0)
+
+    def bump_generation(self, table: str):
+        self._client.incr(self.prefix + "gen:" + table)
+
+    def clear(self):
+        stale = list(self._client.scan_iter(match=self.prefix + "*", count=1000))
+        if stale:
+            self._client.delete(*stale)
+
+    def ping(self) -> bool:
+        return bool(self._client.ping())
+
+    def info(self) -> Dict[str, Any]:
+        stats = self.stats.as_dict()
+        # Вытеснение по памяти выполняет сам сервер
+        stats["evictions"] = int(self._client.info("stats").get("evicted_keys", 0))
+        return {"backend": self.backend, "ttl_seconds": self.ttl, **stats}
+
+
+def _create_cache():
+    if app_config.CACHE_REDIS_URL:
+        logger.info("Using Redis response cache")
+        return RedisCache(app_config.CACHE_REDIS_URL, app_config.CACHE_TTL_SECONDS)
+    return LRUCache(app_config.CACHE_MAX_SIZE, app_config.CACHE_TTL_SECONDS)
+
+
+response_cache = _create_cache()
+
+
+def _entity_key(table: str, entity_id: Any) -> str:
+    return f"{table}:{entity_id}"
+
+
+def _list_key(table: str, generation: int, params: tuple) -> str:
+    return f"list:{table}:{generation}:{params!r}"
+
+
+def cached_entity(model: Type, schema: Type[BaseModel]):
+    """Cache a ``get_<entity>(db, <entity>_id)`` result as a detached schema object.
+
+    Misses are loaded from the primary, so a lagging replica never refills the cache.
+    """
+    table = model.__tablename__
+
+    def decorator(fn):
+        if not app_config.CACHE_ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(db: Session, *args, **kwargs):
+            entity_id = args[0] if args else next(iter(kwargs.values()))
+            key = _entity_key(table, entity_id)
+            value = response_cache.get(key)
+            if value is not MISSING:
+                return value
+            generation = response_cache.generation(table)
+            # Промах читается с primary: отстающая реплика вернула бы в кэш строку до последней записи
+            with primary_reads(db):
+                db_obj = fn(db, *args, **kwargs)
+            if db_obj is None:
+                return None
+            value = schema.model_validate(db_obj)
+            # Не кэшируем, если таблицу успели изменить, пока шёл запрос
+            if response_cache.generation(table) == generation:
+                response_cache.set(key, value)
+            return value
+
+        wrapper.uncached = fn
+        return wrapper
+
+    return decorator
+
+
+def cached_list(model: Type):
+    """Cache a ``get_<entities>(db, ...)`` page of plain rows keyed by its arguments; misses read the primary."""
+    table = model.__tablename__
+
+    def decorator(fn):
+        if not app_config.CACHE_ENABLED:
+            return fn
+        signature = inspect.signature(fn)
+
+        @wraps(fn)
+        def wrapper(db: Session, *args, **kwargs):
+            bound = signature.bind(db, *args, **kwargs)
+            bound.apply_defaults()
+            params = tuple((name, value) for name, value in bound.arguments.items() if name != "db")
+            generation = response_cache.generation(table)
+            key = _list_key(table, generation, params)
+            value = response_cache.get(key)
+            if value is not MISSING:
+                return value
+            with primary_reads(db):
+                value = fn(db, *args, **kwargs)
+            if response_cache.generation(table) == generation:
+                response_cache.set(key, value)
+            return value
+
+        wrapper.uncached = fn
+        return wrapper
+
+    return decorator
+
+
+def _pending(session: Session) -> Dict[str, Optional[set]]:
+    # table -> множество ключей строк, либо None, если затронута вся таблица
+    return session.info.setdefault(_PENDING_KEY, {})
+
+
+def mark_rows(session: Session, model: Type, ids: Iterable[Any]):
+    """Register rows changed by a set-based statement for invalidation on commit."""
+    pending = _pending(session)
+    table = model.__tablename__
+    if table in pending and pending[table] is None:
+        return
+    pending.setdefault(table, set()).update(_entity_key(table, entity_id) for entity_id in ids)
+
+
+def invalidate(table: str, keys: Optional[Iterable[str]] = None):
+    if keys is None:
+        response_cache.delete_prefix(table + ":")
+    else:
+        response_cache.delete(keys)
+    response_cache.bump_generation(table)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_rows(session: Session, flush_context):
+    pending = _pending(session)
+    for obj in chain(session.new, session.dirty, session.deleted):
+        mapper = sa_inspect(obj).mapper
+        table = mapper.local_table.name
+        if table in pending and pending[table] is None:
+            continue
+        pk = mapper.primary_key_from_instance(obj)
+        entity_id = pk[0] if len(pk) == 1 else tuple(pk)
+        pending.setdefault(table, set()).add(_entity_key(table, entity_id))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_statements(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    if orm_execute_state.execution_options.get("cache_rows_marked"):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None:
+        # Набор строк неизвестен — сбрасываем таблицу целиком
+        _pending(orm_execute_state.session)[mapper.local_table.name] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for table, keys in pending.items():
+        try:
+            invalidate(table, keys)
+        except Exception as e:
+            logger.error(f"Cache invalidation failed for {table}: {str(e)}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def cache_info() -> Dict[str, Any]:
+    return response_cache.info()
@@ -0,0 +1,66 @@
+import hashlib
+from typing import Any, Iterable, Type
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+
+from app.formats import MEDIA_TYPES, encode_list, negotiate_list, representation_tag
+
+
+def _fingerprint(obj: Any, fields: Iterable[str]) -> bytes:
+    if isinstance(obj, dict):
+        return repr(tuple(obj.get(name) for name in fields)).encode()
+    return repr(tuple(getattr(obj, name, None) for name in fields)).encode()
+
+
+def compute_etag(data: Any, schema: Type[BaseModel]) -> str:
+    """Strong ETag over the fields the response schema exposes."""
+    fields = tuple(schema.model_fields)
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(data, list):
+        digest.update(b"list")
+        for obj in data:
+            digest.update(_fingerprint(obj, fields))
+    else:
+        digest.update(_fingerprint(data, fields))
+    return f'"{digest.hexdigest()}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match использует слабое сравнение
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def conditional_response(request: Request, response: Response, data: Any, schema: Type[BaseModel]):
+    """Attach validators to the response, or short-circuit with 304 Not Modified.
+
+    Lists come from crud as plain, already converted rows and are encoded
+    directly in the negotiated format, skipping response model validation;
+    a 304 is answered before anything is encoded.
+    """
+    etag = compute_etag(data, schema)
+    headers = {}
+    if isinstance(data, list):
+        # Сильный ETag на представление: данные + согласованные формат и сжатие; тело одно и то же для одной пары
+        fmt, encoding = negotiate_list(request)
+        etag = etag[:-1] + representation_tag(fmt, encoding) + '"'
+        headers["Vary"] = "Accept, Accept-Encoding"
+    headers["ETag"] = etag
+    # Без Last-Modified: в строках нет времени изменения, только времена событий.
+    # Кэши хранят ответ, но перед каждым использованием сверяют ETag
+    headers["Cache-Control"] = "no-cache"
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if isinstance(data, list):
+        applied, body = encode_list(data, schema, fmt, encoding)
+        if applied is not None:
+            headers["Content-Encoding"] = applied
+        return Response(content=body, media_type=MEDIA_TYPES[fmt], headers=headers)
+    response.headers.update(headers)
+    return data
@@ -1,316 +1,788 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import delete, insert, select, union_all, update
+from sqlalchemy.orm import Session, joinedload, raiseload
+from typing import Any, Dict, List, Optional
 from uuid import UUID
+from datetime import date, datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
 import logging
-from app import models, schemas
+import math
+from app import analytics, archive, geo, models, schemas
+from app.telemetry import telemetry_buffer, with_overlay
+from app.cache import cached_entity, cached_list, mark_rows
+from app.serialization import RowProjection
+from app.database import read_only
+from app.dialects import new_id
 
 logger = logging.getLogger(__name__)
+# Чтения логируются отдельно, чтобы их можно было сэмплировать
+read_logger = logging.getLogger(__name__ + ".reads")
+
+# Списки отдаются проекцией колонок схемы, без ORM-объектов
+_user_rows = RowProjection(models.User, schemas.User)
+_scooter_rows = RowProjection(models.Scooter, schemas.Scooter)
+_tariff_rows = RowProjection(models.Tariff, schemas.Tariff)
+_ride_rows = RowProjection(models.Ride, schemas.Ride)
+_payment_rows = RowProjection(models.Payment, schemas.Payment)
+_ride_archive_rows = RowProjection(models.Ride_Archive, schemas.Ride)
+_payment_archive_rows = RowProjection(models.Payment_Archive, schemas.Payment)
+_maintenance_rows = RowProjection(models.Maintenance, schemas.Maintenance)
+_service_staff_rows = RowProjection(models.ServiceStaff, schemas.ServiceStaff)
+_scooter_status_rows = RowProjection(models.Dictionary_ScooterStatus, schemas.ScooterStatus)
+_payment_status_rows = RowProjection(models.Dictionary_PaymentStatus, schemas.PaymentStatus)
+_daily_tariff_rows = RowProjection(models.Stats_DailyTariff, schemas.DailyTariffStats)
+_daily_scooter_rows = RowProjection(models.Stats_DailyScooter, schemas.DailyScooterStats)
+_daily_payment_status_rows = RowProjection(models.Stats_DailyPaymentStatus, schemas.DailyPaymentStatusStats)
+
+# Фильтры списков: только равенства и полуоткрытые диапазоны по индексированным колонкам
+def _filtered(stmt, *equals, time_column=None, time_from: Optional[datetime] = None, time_to: Optional[datetime] = None):
+    for column, value in equals:
+        if value is not None:
+            stmt = stmt.where(column == value)
+    if time_from is not None:
+        stmt = stmt.where(time_column >= time_from)
+    if time_to is not None:
+        stmt = stmt.where(time_column < time_to)
+    return stmt
+
+def _newest_first(db: Session, sources, time_name: str, build, time_from: Optional[datetime],
+                  time_to: Optional[datetime], skip: int, limit: int):
+    """Page of ``build(model, projection)`` by ``time_name`` descending; archived months join only when the range needs them."""
+    (hot, hot_rows), archived = sources
+    if not archive.needs_archive(hot, time_from, time_to):
+        stmt = build(hot, hot_rows).order_by(getattr(hot, time_name).desc()).offset(skip).limit(limit)
+        return db.execute(stmt).all()
+    # Каждая таблица отдаёт не больше skip + limit строк по своему индексу, общий порядок — снаружи
+    branches = [
+        select(build(model, rows).order_by(getattr(model, time_name).desc()).limit(skip + limit).subquery())
+        for model, rows in ((hot, hot_rows), archived)
+    ]
+    combined = union_all(*branches).subquery()
+    return db.execute(select(combined).order_by(combined.c[time_name].desc()).offset(skip).limit(limit)).all()
+
+# Запись за один запрос: INSERT/UPDATE ... RETURNING и DELETE по первичному ключу
+def _primary_key(model):
+    return model.__mapper__.primary_key[0]
+
+def _insert_returning(db: Session, model, values: Dict[str, Any]):
+    stmt = insert(model).values(**values).returning(model).execution_options(
+        cache_rows_marked=True, geo_index_synced=True
+    )
+    try:
+        db_obj = db.scalars(stmt).one()
+        mark_rows(db, model, [getattr(db_obj, _primary_key(model).key)])
+        _mark_rollups(db, model, db_obj)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return db_obj
+
+def _update_returning(db: Session, model, entity_id: UUID, values: Dict[str, Any]):
+    pk = _primary_key(model)
+    if not values:
+        return db.get(model, entity_id)
+    stmt = update(model).where(pk == entity_id).values(**values).returning(model).execution_options(
+        cache_rows_marked=True, geo_index_synced=True, synchronize_session=False
+    )
+    day_column = analytics.day_column(model)
+    try:
+        if day_column is not None and day_column.key in values:
+            # Дата строки меняется: пересчитать нужно и день, из которого она уходит
+            analytics.mark_dirty(db, db.scalar(select(day_column).where(pk == entity_id)), values[day_column.key])
+        db_obj = db.scalars(stmt).first()
+        if db_obj is not None:
+            mark_rows(db, model, [entity_id])
+            _mark_rollups(db, model, db_obj)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return db_obj
+
+def _delete_by_pk(db: Session, model, entity_id: UUID) -> bool:
+    # Для строк, входящих в агрегаты, RETURNING отдаёт время, чтобы пересчитать их день
+    day_column = analytics.day_column(model)
+    stmt = delete(model).where(_primary_key(model) == entity_id).execution_options(
+        cache_rows_marked=True, geo_index_synced=True, synchronize_session=False
+    )
+    try:
+        if day_column is not None:
+            row = db.execute(stmt.returning(day_column)).first()
+            deleted = row is not None
+            if deleted:
+                analytics.mark_dirty(db, row[0])
+        else:
+            deleted = db.execute(stmt).rowcount == 1
+        if deleted:
+            mark_rows(db, model, [entity_id])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return deleted
+
+def _mark_rollups(db: Session, model, db_obj):
+    day_column = analytics.day_column(model)
+    if day_column is not None:
+        analytics.mark_dirty(db, getattr(db_obj, day_column.key))
+
+def _sync_scooter_index(scooter):
+    if scooter is None or not geo.scooter_index.ready:
+        return
+    point = geo.point_from(scooter.scooter_id, scooter.gps_latitude, scooter.gps_longitude,
+                           scooter.status_code, scooter.current_battery)
+    if point is not None:
+        geo.scooter_index.upsert(point)
 
 # User CRUD
+@cached_entity(models.User, schemas.User)
 def get_user(db: Session, user_id: UUID) -> Optional[models.User]:
-    logger.info(f"Fetching user with ID: {user_id}")
+    read_logger.info("Fetching user with ID: %s", user_id)
     return db.query(models.User).filter(models.User.user_id == user_id).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[models.User]:
-    logger.info(f"Fetching users with skip: {skip}, limit: {limit}")
-    return db.query(models.User).order_by(models.User.registration_date.desc()).offset(skip).limit(limit).all()
+@cached_list(models.User)
+def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    read_logger.info("Fetching users with skip: %s, limit: %s", skip, limit)
+    rows = db.execute(_user_rows.select().order_by(models.User.registration_date.desc()).offset(skip).limit(limit)).all()
+    return _user_rows.to_dicts(rows)
 
 def create_user(db: Session, user: schemas.UserCreate) -> models.User:
-    logger.info(f"Creating user: {user.first_name} {user.last_name}")
-    db_user = models.User(**user.dict())
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    logger.info(f"User created with ID: {db_user.user_id}")
+    logger.info("Creating user: %s %s", user.first_name, user.last_name)
+    db_user = _insert_returning(db, models.User, user.dict())
+    logger.info("User created with ID: %s", db_user.user_id)
     return db_user
 
 def update_user(db: Session, user_id: UUID, user_update: schemas.UserUpdate) -> Optional[models.User]:
-    logger.info(f"Updating user with ID: {user_id}")
-    db_user = get_user(db, user_id)
+    logger.info("Updating user with ID: %s", user_id)
+    db_user = _update_returning(db, models.User, user_id, user_update.dict(exclude_unset=True))
     if db_user:
-        update_data = user_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_user, field, value)
-        db.commit()
-        db.refresh(db_user)
-        logger.info(f"User with ID {user_id} updated successfully")
+        logger.info("User with ID %s updated successfully", user_id)
     else:
-        logger.warning(f"User with ID {user_id} not found for update")
+        logger.warning("User with ID %s not found for update", user_id)
     return db_user
 
 def delete_user(db: Session, user_id: UUID) -> bool:
-    logger.info(f"Deleting user with ID: {user_id}")
-    db_user = get_user(db, user_id)
-    if db_user:
-        db.delete(db_user)
-        db.commit()
-        logger.info(f"User with ID {user_id} deleted successfully")
+    logger.info("Deleting user with ID: %s", user_id)
+    if _delete_by_pk(db, models.User, user_id):
+        logger.info("User with ID %s deleted successfully", user_id)
         return True
-    logger.warning(f"User with ID {user_id} not found for deletion")
+    logger.warning("User with ID %s not found for deletion", user_id)
     return False
 
 # Scooter CRUD
+@with_overlay
+@cached_entity(models.Scooter, schemas.Scooter)
 def get_scooter(db: Session, scooter_id: UUID) -> Optional[models.Scooter]:
-    logger.info(f"Fetching scooter with ID: {scooter_id}")
+    read_logger.info("Fetching scooter with ID: %s", scooter_id)
     return db.query(models.Scooter).filter(models.Scooter.scooter_id == scooter_id).first()
 
-def get_scooters(db: Session, skip: int = 0, limit: int = 100) -> List[models.Scooter]:
-    logger.info(f"Fetching scooters with skip: {skip}, limit: {limit}")
-    return db.query(models.Scooter).order_by(models.Scooter.created_datetime.desc()).offset(skip).limit(limit).all()
+@with_overlay
+@cached_list(models.Scooter)
+def get_scooters(db: Session, skip: int = 0, limit: int = 100, status_code: Optional[str] = None) -> List[Dict[str, Any]]:
+    read_logger.info("Fetching scooters with skip: %s, limit: %s", skip, limit)
+    stmt = _filtered(_scooter_rows.select(), (models.Scooter.status_code, status_code))
+    rows = db.execute(stmt.order_by(models.Scooter.created_datetime.desc()).offset(skip).limit(limit)).all()
+    return _scooter_rows.to_dicts(rows)
 
 def create_scooter(db: Session, scooter: schemas.ScooterCreate) -> models.Scooter:
-    logger.info(f"Creating scooter: {scooter.model}")
-    db_scooter = models.Scooter(**scooter.dict())
-    db.add(db_scooter)
-    db.commit()
-    db.refresh(db_scooter)
-    logger.info(f"Scooter created with ID: {db_scooter.scooter_id}")
+    logger.info("Creating scooter: %s", scooter.model)
+    db_scooter = _insert_returning(db, models.Scooter, scooter.dict())
+    logger.info("Scooter created with ID: %s", db_scooter.scooter_id)
+    _sync_scooter_index(db_scooter)
     return db_scooter
 
 def update_scooter(db: Session, scooter_id: UUID, scooter_update: schemas.ScooterUpdate) -> Optional[models.Scooter]:
-    logger.info(f"Updating scooter with ID: {scooter_id}")
-    db_scooter = get_scooter(db, scooter_id)
+    logger.info("Updating scooter with ID: %s", scooter_id)
+    values = scooter_update.dict(exclude_unset=True)
+    telemetry_buffer.note_write([scooter_id], values)
+    db_scooter = _update_returning(db, models.Scooter, scooter_id, values)
     if db_scooter:
-        update_data = scooter_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_scooter, field, value)
-        db.commit()
-        db.refresh(db_scooter)
-        logger.info(f"Scooter with ID {scooter_id} updated successfully")
+        logger.info("Scooter with ID %s updated successfully", scooter_id)
+        _sync_scooter_index(db_scooter)
     else:
-        logger.warning(f"Scooter with ID {scooter_id} not found for update")
+        logger.warning("Scooter with ID %s not found for update", scooter_id)
     return db_scooter
 
 def delete_scooter(db: Session, scooter_id: UUID) -> bool:
-    logger.info(f"Deleting scooter with ID: {scooter_id}")
-    db_scooter = get_scooter(db, scooter_id)
-    if db_scooter:
-        db.delete(db_scooter)
-        db.commit()
-        logger.info(f"Scooter with ID {scooter_id} deleted successfully")
+    logger.info("Deleting scooter with ID: %s", scooter_id)
+    if _delete_by_pk(db, models.Scooter, scooter_id):
+        logger.info("Scooter with ID %s deleted successfully", scooter_id)
+        if geo.scooter_index.ready:
+            geo.scooter_index.remove(scooter_id)
         return True
-    logger.warning(f"Scooter with ID {scooter_id} not found for deletion")
+    logger.warning("Scooter with ID %s not found for deletion", scooter_id)
     return False
 
+def ingest_telemetry(reports: List[schemas.TelemetryReport]) -> schemas.TelemetryAccepted:
+    scooters = telemetry_buffer.add(reports)
+    return schemas.TelemetryAccepted(accepted=len(reports), scooters=scooters)
+
+def get_nearby_scooters(db: Session, lat: float, lon: float, radius_m: float,
+                        status_code: Optional[str] = "available", limit: int = 20) -> List[Dict[str, Any]]:
+    read_logger.info("Fetching scooters within %s m of (%s, %s)", radius_m, lat, lon)
+    return [
+        {**point._asdict(), "distance_m": round(distance, 1)}
+        for distance, point in geo.find_nearby(db, lat, lon, radius_m, status_code, limit)
+    ]
+
 # Tariff CRUD
+@cached_entity(models.Tariff, schemas.Tariff)
 def get_tariff(db: Session, tariff_id: UUID) -> Optional[models.Tariff]:
-    logger.info(f"Fetching tariff with ID: {tariff_id}")
+    read_logger.info("Fetching tariff with ID: %s", tariff_id)
     return db.query(models.Tariff).filter(models.Tariff.tariff_id == tariff_id).first()
 
-def get_tariffs(db: Session, skip: int = 0, limit: int = 100) -> List[models.Tariff]:
-    logger.info(f"Fetching tariffs with skip: {skip}, limit: {limit}")
-    return db.query(models.Tariff).order_by(models.Tariff.created_datetime.desc()).offset(skip).limit(limit).all()
+@cached_list(models.Tariff)
+def get_tariffs(db: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    read_logger.info("Fetching tariffs with skip: %s, limit: %s", skip, limit)
+    rows = db.execute(_tariff_rows.select().order_by(models.Tariff.created_datetime.desc()).offset(skip).limit(limit)).all()
+    return _tariff_rows.to_dicts(rows)
 
 def create_tariff(db: Session, tariff: schemas.TariffCreate) -> models.Tariff:
-    logger.info(f"Creating tariff: {tariff.tariff_name}")
-    db_tariff = models.Tariff(**tariff.dict())
-    db.add(db_tariff)
-    db.commit()
-    db.refresh(db_tariff)
-    logger.info(f"Tariff created with ID: {db_tariff.tariff_id}")
+    logger.info("Creating tariff: %s", tariff.tariff_name)
+    db_tariff = _insert_returning(db, models.Tariff, tariff.dict())
+    logger.info("Tariff created with ID: %s", db_tariff.tariff_id)
     return db_tariff
 
 def update_tariff(db: Session, tariff_id: UUID, tariff_update: schemas.TariffUpdate) -> Optional[models.Tariff]:
-    logger.info(f"Updating tariff with ID: {tariff_id}")
-    db_tariff = get_tariff(db, tariff_id)
+    logger.info("Updating tariff with ID: %s", tariff_id)
+    db_tariff = _update_returning(db, models.Tariff, tariff_id, tariff_update.dict(exclude_unset=True))
     if db_tariff:
-        update_data = tariff_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_tariff, field, value)
-        db.commit()
-        db.refresh(db_tariff)
-        logger.info(f"Tariff with ID {tariff_id} updated successfully")
+        logger.info("Tariff with ID %s updated successfully", tariff_id)
     else:
-        logger.warning(f"Tariff with ID {tariff_id} not found for update")
+        logger.warning("Tariff with ID %s not found for update", tariff_id)
     return db_tariff
 
 def delete_tariff(db: Session, tariff_id: UUID) -> bool:
-    logger.info(f"Deleting tariff with ID: {tariff_id}")
-    db_tariff = get_tariff(db, tariff_id)
-    if db_tariff:
-        db.delete(db_tariff)
-        db.commit()
-        logger.info(f"Tariff with ID {tariff_id} deleted successfully")
+    logger.info("Deleting tariff with ID: %s", tariff_id)
+    if _delete_by_pk(db, models.Tariff, tariff_id):
+        logger.info("Tariff with ID %s deleted successfully", tariff_id)
         return True
-    logger.warning(f"Tariff with ID {tariff_id} not found for deletion")
+    logger.warning("Tariff with ID %s not found for deletion", tariff_id)
     return False
 
 # Ride CRUD
+@cached_entity(models.Ride, schemas.Ride)
 def get_ride(db: Session, ride_id: UUID) -> Optional[models.Ride]:
-    logger.info(f"Fetching ride with ID: {ride_id}")
+    read_logger.info("Fetching ride with ID: %s", ride_id)
     return db.query(models.Ride).filter(models.Ride.ride_id == ride_id).first()
 
-def get_rides(db: Session, skip: int = 0, limit: int = 100) -> List[models.Ride]:
-    logger.info(f"Fetching rides with skip: {skip}, limit: {limit}")
-    return db.query(models.Ride).order_by(models.Ride.start_time.desc()).offset(skip).limit(limit).all()
+@cached_list(models.Ride)
+@read_only
+def get_rides(db: Session, skip: int = 0, limit: int = 100, user_id: Optional[UUID] = None,
+              scooter_id: Optional[UUID] = None, tariff_id: Optional[UUID] = None,
+              start_time_from: Optional[datetime] = None, start_time_to: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    read_logger.info("Fetching rides with skip: %s, limit: %s", skip, limit)
+
+    def build(model, projection):
+        return _filtered(
+            projection.select(),
+            (model.user_id, user_id), (model.scooter_id, scooter_id), (model.tariff_id, tariff_id),
+            time_column=model.start_time, time_from=start_time_from, time_to=start_time_to,
+        )
+
+    rows = _newest_first(db, ((models.Ride, _ride_rows), (models.Ride_Archive, _ride_archive_rows)), "start_time",
+                         build, start_time_from, start_time_to, skip, limit)
+    return _ride_rows.to_dicts(rows)
 
 def create_ride(db: Session, ride: schemas.RideCreate) -> models.Ride:
-    logger.info(f"Creating ride for user: {ride.user_id}")
-    db_ride = models.Ride(**ride.dict())
-    db.add(db_ride)
-    db.commit()
-    db.refresh(db_ride)
-    logger.info(f"Ride created with ID: {db_ride.ride_id}")
+    logger.info("Creating ride for user: %s", ride.user_id)
+    db_ride = _insert_returning(db, models.Ride, ride.dict())
+    logger.info("Ride created with ID: %s", db_ride.ride_id)
     return db_ride
 
 def update_ride(db: Session, ride_id: UUID, ride_update: schemas.RideUpdate) -> Optional[models.Ride]:
-    logger.info(f"Updating ride with ID: {ride_id}")
-    db_ride = get_ride(db, ride_id)
+    logger.info("Updating ride with ID: %s", ride_id)
+    db_ride = _update_returning(db, models.Ride, ride_id, ride_update.dict(exclude_unset=True))
     if db_ride:
-        update_data = ride_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_ride, field, value)
-        db.commit()
-        db.refresh(db_ride)
-        logger.info(f"Ride with ID {ride_id} updated successfully")
+        logger.info("Ride with ID %s updated successfully", ride_id)
     else:
-        logger.warning(f"Ride with ID {ride_id} not found for update")
+        logger.warning("Ride with ID %s not found for update", ride_id)
     return db_ride
 
 def delete_ride(db: Session, ride_id: UUID) -> bool:
-    logger.info(f"Deleting ride with ID: {ride_id}")
-    db_ride = get_ride(db, ride_id)
-    if db_ride:
-        db.delete(db_ride)
-        db.commit()
-        logger.info(f"Ride with ID {ride_id} deleted successfully")
+    logger.info("Deleting ride with ID: %s", ride_id)
+    if _delete_by_pk(db, models.Ride, ride_id):
+        logger.info("Ride with ID %s deleted successfully", ride_id)
         return True
-    logger.warning(f"Ride with ID {ride_id} not found for deletion")
+    logger.warning("Ride with ID %s not found for deletion", ride_id)
     return False
 
+# Ride lifecycle
+SCOOTER_AVAILABLE = "available"
+SCOOTER_IN_USE = "in_use"
+SCOOTER_MAINTENANCE = "maintenance"
+MAINTENANCE_COMPLETED = "completed"
+
+class ConflictError(Exception):
+    """The request conflicts with the current state: a disallowed transition or a job already running."""
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _money(value) -> Decimal:
+    return Decimal(str(value or 0))
+
+def calculate_ride_cost(tariff, start_time: datetime, end_time: datetime, distance: float) -> Decimal:
+    """Unlock fee + every started minute + kilometers, rounded to kopecks."""
+    minutes = max(1, math.ceil((end_time - start_time).total_seconds() / 60))
+    cost = (_money(tariff.unlock_fee)
+            + _money(tariff.rate_per_minute) * minutes
+            + _money(tariff.rate_per_km) * _money(distance))
+    return cost.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+def _set_scooter(db: Session, scooter_id: UUID, values: Dict[str, Any], expected_status: Optional[str] = None):
+    stmt = update(models.Scooter).where(models.Scooter.scooter_id == scooter_id)
+    if expected_status is not None:
+        stmt = stmt.where(models.Scooter.status_code == expected_status)
+    stmt = stmt.values(**values).returning(*geo.POSITION_COLUMNS).execution_options(
+        cache_rows_marked=True, geo_index_synced=True, synchronize_session=False
+    )
+    row = db.execute(stmt).first()
+    if row is not None:
+        mark_rows(db, models.Scooter, [scooter_id])
+    return row
+
+def start_ride(db: Session, ride: schemas.RideCreate) -> schemas.Ride:
+    logger.info("Starting ride for user %s on scooter %s", ride.user_id, ride.scooter_id)
+    tariff = get_tariff(db, ride.tariff_id)
+    if tariff is None or not tariff.is_active:
+        raise ConflictError("Tariff is not active")
+    try:
+        # Занимаем самокат только если он свободен: проверка и смена статуса одним UPDATE
+        scooter = _set_scooter(db, ride.scooter_id, {"status_code": SCOOTER_IN_USE}, expected_status=SCOOTER_AVAILABLE)
+        if scooter is None:
+            raise ConflictError("Scooter is not available")
+        stmt = insert(models.Ride).values(**ride.dict()).returning(models.Ride).execution_options(cache_rows_marked=True)
+        db_ride = db.scalars(stmt).one()
+        result = schemas.Ride.model_validate(db_ride)
+        mark_rows(db, models.Ride, [result.ride_id])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    _sync_scooter_index(scooter)
+    logger.info("Ride %s started", result.ride_id)
+    return result
+
+def complete_ride(db: Session, ride_id: UUID, end_lat: float, end_lon: float, distance: float) -> Optional[schemas.Ride]:
+    logger.info("Completing ride with ID: %s", ride_id)
+    # start_time и tariff_id не меняются после создания, поэтому их можно брать из кэша
+    ride = get_ride(db, ride_id)
+    if ride is None:
+        logger.warning("Ride with ID %s not found for completion", ride_id)
+        return None
+    if ride.end_time is not None:
+        raise ConflictError("Ride is already completed")
+    tariff = get_tariff(db, ride.tariff_id)
+    end_time = _utcnow()
+    cost = calculate_ride_cost(tariff, ride.start_time, end_time, distance)
+    stmt = update(models.Ride).where(
+        models.Ride.ride_id == ride_id, models.Ride.end_time.is_(None)
+    ).values(
+        end_time=end_time, end_latitude=end_lat, end_longitude=end_lon, distance=distance, ride_cost=cost
+    ).returning(models.Ride).execution_options(cache_rows_marked=True, synchronize_session=False)
+    try:
+        db_ride = db.scalars(stmt).first()
+        if db_ride is None:
+            raise ConflictError("Ride is already completed")
+        result = schemas.Ride.model_validate(db_ride)
+        mark_rows(db, models.Ride, [ride_id])
+        analytics.mark_dirty(db, end_time)
+        telemetry_buffer.note_write([ride.scooter_id], ("gps_latitude", "gps_longitude"))
+        scooter = _set_scooter(db, ride.scooter_id, {
+            "status_code": SCOOTER_AVAILABLE, "gps_latitude": end_lat, "gps_longitude": end_lon
+        })
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    _sync_scooter_index(scooter)
+    logger.info("Ride %s completed, cost %s", ride_id, cost)
+    return result
+
 # Payment CRUD
+@cached_entity(models.Payment, schemas.Payment)
 def get_payment(db: Session, payment_id: UUID) -> Optional[models.Payment]:
-    logger.info(f"Fetching payment with ID: {payment_id}")
+    read_logger.info("Fetching payment with ID: %s", payment_id)
     return db.query(models.Payment).filter(models.Payment.payment_id == payment_id).first()
 
-def get_payments(db: Session, skip: int = 0, limit: int = 100) -> List[models.Payment]:
-    logger.info(f"Fetching payments with skip: {skip}, limit: {limit}")
-    return db.query(models.Payment).order_by(models.Payment.payment_date.desc()).offset(skip).limit(limit).all()
+@cached_list(models.Payment)
+@read_only
+def get_payments(db: Session, skip: int = 0, limit: int = 100, status_code: Optional[str] = None,
+                 ride_id: Optional[UUID] = None, payment_date_from: Optional[datetime] = None,
+                 payment_date_to: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    read_logger.info("Fetching payments with skip: %s, limit: %s", skip, limit)
+
+    def build(model, projection):
+        return _filtered(
+            projection.select(),
+            (model.status_code, status_code), (model.ride_id, ride_id),
+            time_column=model.payment_date, time_from=payment_date_from, time_to=payment_date_to,
+        )
+
+    rows = _newest_first(db, ((models.Payment, _payment_rows), (models.Payment_Archive, _payment_archive_rows)),
+                         "payment_date", build, payment_date_from, payment_date_to, skip, limit)
+    return _payment_rows.to_dicts(rows)
 
 def create_payment(db: Session, payment: schemas.PaymentCreate) -> models.Payment:
-    logger.info(f"Creating payment for ride: {payment.ride_id}")
-    db_payment = models.Payment(**payment.dict())
-    db.add(db_payment)
-    db.commit()
-    db.refresh(db_payment)
-    logger.info(f"Payment created with ID: {db_payment.payment_id}")
+    logger.info("Creating payment for ride: %s", payment.ride_id)
+    db_payment = _insert_returning(db, models.Payment, payment.dict())
+    logger.info("Payment created with ID: %s", db_payment.payment_id)
     return db_payment
 
 def update_payment(db: Session, payment_id: UUID, payment_update: schemas.PaymentUpdate) -> Optional[models.Payment]:
-    logger.info(f"Updating payment with ID: {payment_id}")
-    db_payment = get_payment(db, payment_id)
+    logger.info("Updating payment with ID: %s", payment_id)
+    db_payment = _update_returning(db, models.Payment, payment_id, payment_update.dict(exclude_unset=True))
     if db_payment:
-        update_data = payment_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_payment, field, value)
-        db.commit()
-        db.refresh(db_payment)
-        logger.info(f"Payment with ID {payment_id} updated successfully")
+        logger.info("Payment with ID %s updated successfully", payment_id)
     else:
-        logger.warning(f"Payment with ID {payment_id} not found for update")
+        logger.warning("Payment with ID %s not found for update", payment_id)
     return db_payment
 
 def delete_payment(db: Session, payment_id: UUID) -> bool:
-    logger.info(f"Deleting payment with ID: {payment_id}")
-    db_payment = get_payment(db, payment_id)
-    if db_payment:
-        db.delete(db_payment)
-        db.commit()
-        logger.info(f"Payment with ID {payment_id} deleted successfully")
+    logger.info("Deleting payment with ID: %s", payment_id)
+    if _delete_by_pk(db, models.Payment, payment_id):
+        logger.info("Payment with ID %s deleted successfully", payment_id)
         return True
-    logger.warning(f"Payment with ID {payment_id} not found for deletion")
+    logger.warning("Payment with ID %s not found for deletion", payment_id)
     return False
 
 # Maintenance CRUD
+@cached_entity(models.Maintenance, schemas.Maintenance)
 def get_maintenance(db: Session, maintenance_id: UUID) -> Optional[models.Maintenance]:
-    logger.info(f"Fetching maintenance with ID: {maintenance_id}")
+    read_logger.info("Fetching maintenance with ID: %s", maintenance_id)
     return db.query(models.Maintenance).filter(models.Maintenance.maintenance_id == maintenance_id).first()
 
-def get_maintenances(db: Session, skip: int = 0, limit: int = 100) -> List[models.Maintenance]:
-    logger.info(f"Fetching maintenances with skip: {skip}, limit: {limit}")
-    return db.query(models.Maintenance).order_by(models.Maintenance.scheduled_date.desc()).offset(skip).limit(limit).all()
+@cached_list(models.Maintenance)
+@read_only
+def get_maintenances(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None,
+                     scooter_id: Optional[UUID] = None, staff_id: Optional[UUID] = None) -> List[Dict[str, Any]]:
+    read_logger.info("Fetching maintenances with skip: %s, limit: %s", skip, limit)
+    stmt = _filtered(
+        _maintenance_rows.select(),
+        (models.Maintenance.status, status), (models.Maintenance.scooter_id, scooter_id),
+        (models.Maintenance.staff_id, staff_id),
+    )
+    rows = db.execute(stmt.order_by(models.Maintenance.scheduled_date.desc()).offset(skip).limit(limit)).all()
+    return _maintenance_rows.to_dicts(rows)
 
 def create_maintenance(db: Session, maintenance: schemas.MaintenanceCreate) -> models.Maintenance:
-    logger.info(f"Creating maintenance for scooter: {maintenance.scooter_id}")
-    db_maintenance = models.Maintenance(**maintenance.dict())
-    db.add(db_maintenance)
-    db.commit()
-    db.refresh(db_maintenance)
-    logger.info(f"Maintenance created with ID: {db_maintenance.maintenance_id}")
+    logger.info("Creating maintenance for scooter: %s", maintenance.scooter_id)
+    db_maintenance = _insert_returning(db, models.Maintenance, maintenance.dict())
+    logger.info("Maintenance created with ID: %s", db_maintenance.maintenance_id)
     return db_maintenance
 
 def update_maintenance(db: Session, maintenance_id: UUID, maintenance_update: schemas.MaintenanceUpdate) -> Optional[models.Maintenance]:
-    logger.info(f"Updating maintenance with ID: {maintenance_id}")
-    db_maintenance = get_maintenance(db, maintenance_id)
+    logger.info("Updating maintenance with ID: %s", maintenance_id)
+    db_maintenance = _update_returning(db, models.Maintenance, maintenance_id, maintenance_update.dict(exclude_unset=True))
     if db_maintenance:
-        update_data = maintenance_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_maintenance, field, value)
-        db.commit()
-        db.refresh(db_maintenance)
-        logger.info(f"Maintenance with ID {maintenance_id} updated successfully")
+        logger.info("Maintenance with ID %s updated successfully", maintenance_id)
     else:
-        logger.warning(f"Maintenance with ID {maintenance_id} not found for update")
+        logger.warning("Maintenance with ID %s not found for update", maintenance_id)
     return db_maintenance
 
 def delete_maintenance(db: Session, maintenance_id: UUID) -> bool:
-    logger.info(f"Deleting maintenance with ID: {maintenance_id}")
-    db_maintenance = get_maintenance(db, maintenance_id)
-    if db_maintenance:
-        db.delete(db_maintenance)
-        db.commit()
-        logger.info(f"Maintenance with ID {maintenance_id} deleted successfully")
+    logger.info("Deleting maintenance with ID: %s", maintenance_id)
+    if _delete_by_pk(db, models.Maintenance, maintenance_id):
+        logger.info("Maintenance with ID %s deleted successfully", maintenance_id)
         return True
-    logger.warning(f"Maintenance with ID {maintenance_id} not found for deletion")
+    logger.warning("Maintenance with ID %s not found for deletion", maintenance_id)
     return False
 
+def complete_maintenance(db: Session, maintenance_id: UUID) -> Optional[schemas.Maintenance]:
+    logger.info("Completing maintenance with ID: %s", maintenance_id)
+    stmt = update(models.Maintenance).where(
+        models.Maintenance.maintenance_id == maintenance_id,
+        models.Maintenance.status != MAINTENANCE_COMPLETED,
+    ).values(
+        status=MAINTENANCE_COMPLETED, completed_date=_utcnow().date()
+    ).returning(models.Maintenance).execution_options(cache_rows_marked=True, synchronize_session=False)
+    try:
+        db_maintenance = db.scalars(stmt).first()
+        if db_maintenance is None:
+            exists = db.scalar(select(models.Maintenance.maintenance_id).where(models.Maintenance.maintenance_id == maintenance_id))
+            db.rollback()
+            if exists is None:
+                logger.warning("Maintenance with ID %s not found for completion", maintenance_id)
+                return None
+            raise ConflictError("Maintenance is already completed")
+        result = schemas.Maintenance.model_validate(db_maintenance)
+        mark_rows(db, models.Maintenance, [maintenance_id])
+        # Самокат возвращается в парк, только если его не успели перевести в другой статус
+        scooter = _set_scooter(db, result.scooter_id, {"status_code": SCOOTER_AVAILABLE}, expected_status=SCOOTER_MAINTENANCE)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    _sync_scooter_index(scooter)
+    logger.info("Maintenance %s completed", maintenance_id)
+    return result
+
 # ServiceStaff CRUD
+@cached_entity(models.ServiceStaff, schemas.ServiceStaff)
 def get_service_staff(db: Session, staff_id: UUID) -> Optional[models.ServiceStaff]:
-    logger.info(f"Fetching service staff with ID: {staff_id}")
+    read_logger.info("Fetching service staff with ID: %s", staff_id)
     return db.query(models.ServiceStaff).filter(models.ServiceStaff.staff_id == staff_id).first()
 
-def get_all_service_staff(db: Session, skip: int = 0, limit: int = 100) -> List[models.ServiceStaff]:
-    logger.info(f"Fetching service staff with skip: {skip}, limit: {limit}")
-    return db.query(models.ServiceStaff).order_by(models.ServiceStaff.created_datetime.desc()).offset(skip).limit(limit).all()
+@cached_list(models.ServiceStaff)
+def get_all_service_staff(db: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    read_logger.info("Fetching service staff with skip: %s, limit: %s", skip, limit)
+    rows = db.execute(_service_staff_rows.select().order_by(models.ServiceStaff.created_datetime.desc()).offset(skip).limit(limit)).all()
+    return _service_staff_rows.to_dicts(rows)
 
 def create_service_staff(db: Session, staff: schemas.ServiceStaffCreate) -> models.ServiceStaff:
-    logger.info(f"Creating service staff: {staff.first_name} {staff.last_name}")
-    db_staff = models.ServiceStaff(**staff.dict())
-    db.add(db_staff)
-    db.commit()
-    db.refresh(db_staff)
-    logger.info(f"Service staff created with ID: {db_staff.staff_id}")
+    logger.info("Creating service staff: %s %s", staff.first_name, staff.last_name)
+    db_staff = _insert_returning(db, models.ServiceStaff, staff.dict())
+    logger.info("Service staff created with ID: %s", db_staff.staff_id)
     return db_staff
 
 def update_service_staff(db: Session, staff_id: UUID, staff_update: schemas.ServiceStaffUpdate) -> Optional[models.ServiceStaff]:
-    logger.info(f"Updating service staff with ID: {staff_id}")
-    db_staff = get_service_staff(db, staff_id)
+    logger.info("Updating service staff with ID: %s", staff_id)
+    db_staff = _update_returning(db, models.ServiceStaff, staff_id, staff_update.dict(exclude_unset=True))
     if db_staff:
-        update_data = staff_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_staff, field, value)
-        db.commit()
-        db.refresh(db_staff)
-        logger.info(f"Service staff with ID {staff_id} updated successfully")
+        logger.info("Service staff with ID %s updated successfully", staff_id)
     else:
-        logger.warning(f"Service staff with ID {staff_id} not found for update")
+        logger.warning("Service staff with ID %s not found for update", staff_id)
     return db_staff
 
 def delete_service_staff(db: Session, staff_id: UUID) -> bool:
-    logger.info(f"Deleting service staff with ID: {staff_id}")
-    db_staff = get_service_staff(db, staff_id)
-    if db_staff:
-        db.delete(db_staff)
-        db.commit()
-        logger.info(f"Service staff with ID {staff_id} deleted successfully")
+    logger.info("Deleting service staff with ID: %s", staff_id)
+    if _delete_by_pk(db, models.ServiceStaff, staff_id):
+        logger.info("Service staff with ID %s deleted successfully", staff_id)
         return True
-    logger.warning(f"Service staff with ID {staff_id} not found for deletion")
+    logger.warning("Service staff with ID %s not found for deletion", staff_id)
     return False
-# Dictionary CRUD operations
-def get_scooter_statuses(db: Session, skip: int = 0, limit: int = 100) -> List[models.Dictionary_ScooterStatus]:
-    logger.info("Fetching scooter statuses")
-    return db.query(models.Dictionary_ScooterStatus).order_by(models.Dictionary_ScooterStatus.status_name).offset(skip).limit(limit).all()
 
-def get_payment_statuses(db: Session, skip: int = 0, limit: int = 100) -> List[models.Dictionary_PaymentStatus]:
-    logger.info("Fetching payment statuses")
-    return db.query(models.Dictionary_PaymentStatus).order_by(models.Dictionary_PaymentStatus.status_name).offset(skip).limit(limit).all()
\ No newline at end of file
+# Dictionary CRUD operations
+@cached_list(models.Dictionary_ScooterStatus)
+def get_scooter_statuses(db: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    read_logger.info("Fetching scooter statuses")
+    rows = db.execute(_scooter_status_rows.select().order_by(models.Dictionary_ScooterStatus.status_name).offset(skip).limit(limit)).all()
+    return _scooter_status_rows.to_dicts(rows)
+
+@cached_list(models.Dictionary_PaymentStatus)
+def get_payment_statuses(db: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    read_logger.info("Fetching payment statuses")
+    rows = db.execute(_payment_status_rows.select().order_by(models.Dictionary_PaymentStatus.status_name).offset(skip).limit(limit)).all()
+    return _payment_status_rows.to_dicts(rows)
+
+# Analytics
+# Читаются только агрегаты: стоимость зависит от диапазона дат, а не от объёма истории
+def _daily(db: Session, projection: RowProjection, model, key_column, key, date_from: date, date_to: date,
+           skip: int, limit: int) -> List[Dict[str, Any]]:
+    stmt = projection.select().where(model.stat_date >= date_from, model.stat_date <= date_to)
+    if key is not None:
+        stmt = stmt.where(key_column == key)
+    rows = db.execute(stmt.order_by(model.stat_date, key_column).offset(skip).limit(limit)).all()
+    return projection.to_dicts(rows)
+
+@cached_list(models.Stats_DailyTariff)
+@read_only
+def get_daily_tariff_stats(db: Session, date_from: date, date_to: date, tariff_id: Optional[UUID] = None,
+                           skip: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+    read_logger.info("Fetching daily tariff stats from %s to %s", date_from, date_to)
+    return _daily(db, _daily_tariff_rows, models.Stats_DailyTariff, models.Stats_DailyTariff.tariff_id,
+                  tariff_id, date_from, date_to, skip, limit)
+
+@cached_list(models.Stats_DailyScooter)
+@read_only
+def get_daily_scooter_stats(db: Session, date_from: date, date_to: date, scooter_id: Optional[UUID] = None,
+                            skip: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+    read_logger.info("Fetching daily scooter stats from %s to %s", date_from, date_to)
+    return _daily(db, _daily_scooter_rows, models.Stats_DailyScooter, models.Stats_DailyScooter.scooter_id,
+                  scooter_id, date_from, date_to, skip, limit)
+
+@cached_list(models.Stats_DailyPaymentStatus)
+@read_only
+def get_daily_payment_stats(db: Session, date_from: date, date_to: date, status_code: Optional[str] = None,
+                            skip: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+    read_logger.info("Fetching daily payment stats from %s to %s", date_from, date_to)
+    return _daily(db, _daily_payment_status_rows, models.Stats_DailyPaymentStatus,
+                  models.Stats_DailyPaymentStatus.status_code, status_code, date_from, date_to, skip, limit)
+
+def rebuild_rollups(db: Session, date_from: date, date_to: date) -> schemas.RollupRefreshResult:
+    logger.info("Rebuilding rollups from %s to %s", date_from, date_to)
+    try:
+        # Та же блокировка, что у фонового прохода: иначе обе вставки в Stats_* столкнутся по ключу
+        if not analytics.try_refresh_lock(db):
+            raise ConflictError("Rollup refresh is already running")
+        days = analytics.refresh_days(db, analytics.days_between(date_from, date_to))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    logger.info("Rollups rebuilt for %s days", days)
+    return schemas.RollupRefreshResult(days=days)
+
+# Detail views
+# Связи «к одному» подгружаются joinedload в том же запросе, коллекции — отдельной
+# постраничной выборкой; raiseload не даёт случайно добавить ленивую загрузку.
+def _page(db: Session, projection: RowProjection, criterion, order_by, skip: int, limit: int) -> List[Dict[str, Any]]:
+    rows = db.execute(projection.select().where(criterion).order_by(order_by).offset(skip).limit(limit)).all()
+    return projection.to_dicts(rows)
+
+def _get_with(db: Session, model, entity_id: UUID, *relationships):
+    options = [joinedload(relationship) for relationship in relationships]
+    stmt = select(model).where(_primary_key(model) == entity_id).options(*options, raiseload("*"))
+    return db.scalars(stmt).unique().first()
+
+@read_only
+def get_user_details(db: Session, user_id: UUID, rides_skip: int = 0, rides_limit: int = 20) -> Optional[schemas.UserWithRides]:
+    read_logger.info("Fetching user details with ID: %s", user_id)
+    user = get_user(db, user_id)
+    if user is None:
+        return None
+    rides = _page(db, _ride_rows, models.Ride.user_id == user_id, models.Ride.start_time.desc(), rides_skip, rides_limit)
+    # Без кэша get_user возвращает строку ORM, с кэшем — уже схему
+    return schemas.UserWithRides(**schemas.User.model_validate(user).model_dump(), rides=rides)
+
+@read_only
+def get_scooter_details(db: Session, scooter_id: UUID, rides_skip: int = 0, rides_limit: int = 20,
+                        maintenance_skip: int = 0, maintenance_limit: int = 20) -> Optional[schemas.ScooterWithDetails]:
+    read_logger.info("Fetching scooter details with ID: %s", scooter_id)
+    db_scooter = _get_with(db, models.Scooter, scooter_id, models.Scooter.status)
+    if db_scooter is None:
+        return None
+    scooter = telemetry_buffer.overlay(schemas.Scooter.model_validate(db_scooter))
+    rides = _page(db, _ride_rows, models.Ride.scooter_id == scooter_id, models.Ride.start_time.desc(),
+                  rides_skip, rides_limit)
+    maintenance_records = _page(db, _maintenance_rows, models.Maintenance.scooter_id == scooter_id,
+                                models.Maintenance.scheduled_date.desc(), maintenance_skip, maintenance_limit)
+    return schemas.ScooterWithDetails(
+        **scooter.model_dump(), rides=rides, maintenance_records=maintenance_records,
+        status=schemas.ScooterStatus.model_validate(db_scooter.status) if db_scooter.status else None
+    )
+
+@read_only
+def get_tariff_details(db: Session, tariff_id: UUID, rides_skip: int = 0, rides_limit: int = 20) -> Optional[schemas.TariffWithRides]:
+    read_logger.info("Fetching tariff details with ID: %s", tariff_id)
+    tariff = get_tariff(db, tariff_id)
+    if tariff is None:
+        return None
+    rides = _page(db, _ride_rows, models.Ride.tariff_id == tariff_id, models.Ride.start_time.desc(), rides_skip, rides_limit)
+    return schemas.TariffWithRides(**schemas.Tariff.model_validate(tariff).model_dump(), rides=rides)
+
+@read_only
+def get_ride_details(db: Session, ride_id: UUID) -> Optional[schemas.RideWithDetails]:
+    read_logger.info("Fetching ride details with ID: %s", ride_id)
+    db_ride = _get_with(db, models.Ride, ride_id, models.Ride.user, models.Ride.scooter,
+                        models.Ride.tariff, models.Ride.payment)
+    if db_ride is None:
+        return None
+    ride = schemas.RideWithDetails.model_validate(db_ride)
+    if ride.scooter is not None:
+        ride.scooter = telemetry_buffer.overlay(ride.scooter)
+    return ride
+
+@read_only
+def get_payment_details(db: Session, payment_id: UUID) -> Optional[schemas.PaymentWithDetails]:
+    read_logger.info("Fetching payment details with ID: %s", payment_id)
+    db_payment = _get_with(db, models.Payment, payment_id, models.Payment.ride, models.Payment.payment_status)
+    return schemas.PaymentWithDetails.model_validate(db_payment) if db_payment else None
+
+@read_only
+def get_maintenance_details(db: Session, maintenance_id: UUID) -> Optional[schemas.MaintenanceWithDetails]:
+    read_logger.info("Fetching maintenance details with ID: %s", maintenance_id)
+    db_maintenance = _get_with(db, models.Maintenance, maintenance_id, models.Maintenance.scooter, models.Maintenance.staff)
+    if db_maintenance is None:
+        return None
+    maintenance = schemas.MaintenanceWithDetails.model_validate(db_maintenance)
+    if maintenance.scooter is not None:
+        maintenance.scooter = telemetry_buffer.overlay(maintenance.scooter)
+    return maintenance
+
+@read_only
+def get_service_staff_details(db: Session, staff_id: UUID, maintenance_skip: int = 0,
+                              maintenance_limit: int = 20) -> Optional[schemas.ServiceStaffWithMaintenance]:
+    read_logger.info("Fetching service staff details with ID: %s", staff_id)
+    staff = get_service_staff(db, staff_id)
+    if staff is None:
+        return None
+    maintenance_records = _page(db, _maintenance_rows, models.Maintenance.staff_id == staff_id,
+                                models.Maintenance.scheduled_date.desc(), maintenance_skip, maintenance_limit)
+    return schemas.ServiceStaffWithMaintenance(**schemas.ServiceStaff.model_validate(staff).model_dump(),
+                                               maintenance_records=maintenance_records)
+
+# Bulk operations
+def bulk_create(db: Session, model, items: List) -> schemas.BulkResult:
+    table = model.__tablename__
+    logger.info("Bulk creating %s rows in %s", len(items), table)
+    pk = _primary_key(model)
+    # Ключи генерируются здесь: обычный executemany без RETURNING и без сортировки по порядку параметров
+    dialect = db.get_bind(model).dialect.name
+    rows = [{**item.dict(), pk.key: new_id(dialect)} for item in items]
+    ids = [row[pk.key] for row in rows]
+    day_column = analytics.day_column(model)
+    try:
+        db.execute(insert(model).execution_options(cache_rows_marked=True), rows)
+        mark_rows(db, model, ids)
+        if day_column is not None:
+            # Без значения колонку заполнит server_default текущим временем
+            default = _utcnow() if day_column.server_default is not None else None
+            analytics.mark_dirty(db, *(row.get(day_column.key) or default for row in rows))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    logger.info("Bulk created %s rows in %s", len(ids), table)
+    return schemas.BulkResult(results=[
+        schemas.BulkItemResult(index=index, id=entity_id, status="created")
+        for index, entity_id in enumerate(ids)
+    ])
+
+def bulk_update(db: Session, model, items: List) -> schemas.BulkResult:
+    table = model.__tablename__
+    logger.info("Bulk updating %s rows in %s", len(items), table)
+    pk = _primary_key(model)
+    rows = [item.dict(exclude_unset=True) for item in items]
+    ids = [row[pk.key] for row in rows]
+    day_column = analytics.day_column(model)
+    try:
+        if day_column is not None:
+            found = db.execute(select(pk, day_column).where(pk.in_(ids))).all()
+            analytics.mark_dirty(db, *(moment for _, moment in found))
+            existing = {entity_id for entity_id, _ in found}
+        else:
+            existing = set(db.scalars(select(pk).where(pk.in_(ids))))
+        # ORM bulk UPDATE по первичному ключу: один executemany на набор колонок
+        changes = [row for row in rows if row[pk.key] in existing and len(row) > 1]
+        if day_column is not None:
+            analytics.mark_dirty(db, *(row[day_column.key] for row in changes if day_column.key in row))
+        if model is models.Scooter:
+            for row in changes:
+                telemetry_buffer.note_write([row[pk.key]], row)
+        if changes:
+            db.execute(update(model).execution_options(cache_rows_marked=True), changes)
+        mark_rows(db, model, existing)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    logger.info("Bulk updated %s rows in %s", len(existing), table)
+    return schemas.BulkResult(results=[
+        schemas.BulkItemResult(index=index, id=entity_id, status="updated" if entity_id in existing else "not_found")
+        for index, entity_id in enumerate(ids)
+    ])
+
+def bulk_delete(db: Session, model, ids: List[UUID]) -> schemas.BulkResult:
+    table = model.__tablename__
+    logger.info("Bulk deleting %s rows in %s", len(ids), table)
+    pk = _primary_key(model)
+    day_column = analytics.day_column(model)
+    returning = (pk,) if day_column is None else (pk, day_column)
+    stmt = delete(model).where(pk.in_(ids)).returning(*returning).execution_options(cache_rows_marked=True, synchronize_session=False)
+    try:
+        rows = db.execute(stmt).all()
+        if day_column is not None:
+            analytics.mark_dirty(db, *(row[1] for row in rows))
+        deleted = {row[0] for row in rows}
+        mark_rows(db, model, deleted)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    logger.info("Bulk deleted %s rows in %s", len(deleted), table)
+    return schemas.BulkResult(results=[
+        schemas.BulkItemResult(index=index, id=entity_id, status="deleted" if entity_id in deleted else "not_found")
+        for index, entity_id in enumerate(ids)
+    ])
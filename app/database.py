@@ -1,42 +1,204 @@
+import itertools
+import logging
 import os
-from sqlalchemy import create_engine
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import List, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.selectable import CompoundSelect, Select
+from fastapi import Request
 from dotenv import load_dotenv
-import logging
 
 # Load environment variables
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Реплики только для чтения, через запятую
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# Сколько секунд не выбирать реплику после ошибки соединения с ней
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "10"))
+
+logger = logging.getLogger(__name__)
+
+# Пул соединений; пул потоков для sync-маршрутов выравнивается по его размеру
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+
+def is_memory_database(url) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+pool_options = {}
+if is_memory_database(DATABASE_URL):
+    # База в памяти живёт в одном соединении: его делят все потоки процесса
+    pool_options = dict(poolclass=StaticPool, connect_args={"check_same_thread": False})
+elif not DATABASE_URL.startswith("sqlite"):
+    pool_options = dict(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite проверяет внешние ключи, только если включить их на каждом соединении
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _configure(new_engine):
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine, "connect", _enable_sqlite_foreign_keys)
+    return new_engine
+
 
 # Create engine
-engine = create_engine(
+engine = _configure(create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
-    echo=False  # Set to True for SQL query logging
-)
+    echo=False,  # Set to True for SQL query logging
+    **pool_options
+))
+
+
+
+class Replica:
+    """Read-only engine with a simple up/down flag."""
+
+    def __init__(self, url: str):
+        self.engine = _configure(create_engine(url, pool_pre_ping=True, echo=False, **pool_options))
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        self.failed_at: Optional[float] = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.failed_at is None or time.monotonic() - self.failed_at > DB_REPLICA_RETRY_SECONDS
+
+    def mark(self, up: bool):
+        if not up and self.failed_at is None:
+            logger.warning("Read replica %s is unavailable, reads fall back to the primary", self.name)
+        self.failed_at = None if up else time.monotonic()
+
+
+class ReplicaSet:
+    """Round-robin over the replicas that are currently healthy."""
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(url) for url in urls]
+        self._counter = itertools.count()
+        for replica in self.replicas:
+            event.listen(replica.engine, "handle_error", self._on_error(replica))
+
+    @staticmethod
+    def _on_error(replica: Replica):
+        def handle_error(context):
+            if context.is_disconnect or context.connection is None:
+                replica.mark(False)
+        return handle_error
+
+    def pick(self) -> Optional[Replica]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def info(self):
+        return {replica.name: {"healthy": replica.healthy, "pool": replica.engine.pool.status()} for replica in self.replicas}
+
+
+replica_set = ReplicaSet(DATABASE_REPLICA_URLS)
+
+# Флаги в session.info
+REPLICA_READS = "replica_reads"
+PRIMARY_PINNED = "primary_pinned"
+PRIMARY_READS = "primary_reads"
+
+
+def _replica_safe(clause) -> bool:
+    if isinstance(clause, Select):
+        return clause._for_update_arg is None
+    return isinstance(clause, CompoundSelect)
+
+
+class RoutingSession(Session):
+    """Session that sends plain SELECTs to a replica when reads are allowed there.
+
+    Anything else goes to the primary; once the session writes, it stays on
+    the primary so later reads in the same request see its own changes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info[PRIMARY_PINNED] = True
+        elif (self.info.get(REPLICA_READS) and not self.info.get(PRIMARY_PINNED) and not self.info.get(PRIMARY_READS)
+              and _replica_safe(clause)):
+            replica = replica_set.pick()
+            if replica is not None:
+                return replica.engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+def dispose_engines(close: bool = True):
+    engine.dispose(close=close)
+    for replica in replica_set.replicas:
+        replica.engine.dispose(close=close)
+
+
+# Соединения пула не переживают fork: воркер (например, gunicorn с preload) открывает свои,
+# не закрывая сокеты родителя
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: dispose_engines(close=False))
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: объекты из RETURNING остаются загруженными после коммита
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 # Create Base class
 Base = declarative_base()
 
+
+@contextmanager
+def replica_reads(db: Session):
+    """Allow the session's plain reads to go to a replica inside the block."""
+    previous = db.info.get(REPLICA_READS)
+    db.info[REPLICA_READS] = True
+    try:
+        yield db
+    finally:
+        db.info[REPLICA_READS] = previous
+
+
+@contextmanager
+def primary_reads(db: Session):
+    """Read from the primary inside the block, even where replica reads are allowed."""
+    previous = db.info.get(PRIMARY_READS)
+    db.info[PRIMARY_READS] = True
+    try:
+        yield db
+    finally:
+        db.info[PRIMARY_READS] = previous
+
+
+def read_only(fn):
+    """Mark a ``crud`` function as safe to serve from a replica."""
+    @wraps(fn)
+    def wrapper(db: Session, *args, **kwargs):
+        with replica_reads(db):
+            return fn(db, *args, **kwargs)
+    return wrapper
+
+
 # Dependency to get DB session
-def get_db():
+# GET/HEAD-обработчики читают с реплик, остальные методы работают с primary
+def get_db(request: Request):
     db = SessionLocal()
+    db.info[REPLICA_READS] = request.method in ("GET", "HEAD")
     try:
         yield db
     finally:
         db.close()
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/api.log'),
-        logging.StreamHandler()
-    ]
-)
\ No newline at end of file
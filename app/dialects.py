@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from typing import Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import DateTime, Uuid
+from sqlalchemy.exc import CompileError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class utcnow(FunctionElement):
+    """Current UTC timestamp, compiled to each dialect's native function."""
+
+    type = DateTime()
+    inherit_cache = True
+
+
+class new_uuid(FunctionElement):
+    """UUID generated by the database for rows inserted without an id."""
+
+    type = Uuid()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "mssql")
+def _utcnow_mssql(element, compiler, **kw):
+    return "GETUTCDATE()"
+
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "(CURRENT_TIMESTAMP AT TIME ZONE 'utc')"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw):
+    # CURRENT_TIMESTAMP в SQLite уже в UTC
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(new_uuid)
+def _new_uuid_default(element, compiler, **kw):
+    raise CompileError(
+        f"new_uuid() has no server-side implementation for the {compiler.dialect.name} dialect; "
+        f"add a @compiles(new_uuid, \"{compiler.dialect.name}\") rule in app/dialects.py"
+    )
+
+
+@compiles(new_uuid, "mssql")
+def _new_uuid_mssql(element, compiler, **kw):
+    # Допустим только в DEFAULT; упорядочен так же, как sequential_guid
+    return "NEWSEQUENTIALID()"
+
+
+@compiles(new_uuid, "postgresql")
+def _new_uuid_postgresql(element, compiler, **kw):
+    return "gen_random_uuid()"
+
+
+@compiles(new_uuid, "sqlite")
+def _new_uuid_sqlite(element, compiler, **kw):
+    # Uuid хранится в SQLite как CHAR(32) из шестнадцатеричных цифр без дефисов
+    return "(lower(hex(randomblob(16))))"
+
+
+_clock_lock = threading.Lock()
+_last_ms = 0
+_sequence = 0
+# 12 бит счётчика внутри миллисекунды (rand_a в UUIDv7)
+_SEQUENCE_BITS = 12
+
+
+def _tick() -> Tuple[int, int]:
+    """Milliseconds since the epoch and a counter that keeps ids from one process increasing."""
+    global _last_ms, _sequence
+    with _clock_lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms, _sequence = now_ms, int.from_bytes(os.urandom(1), "big")
+        else:
+            # Та же миллисекунда или часы ушли назад: продолжаем счётчик, при переполнении занимаем следующую
+            _sequence += 1
+            if _sequence >> _SEQUENCE_BITS:
+                _last_ms, _sequence = _last_ms + 1, 0
+        return _last_ms, _sequence
+
+
+def uuid7() -> UUID:
+    """RFC 9562 UUIDv7: 48-bit millisecond timestamp, 12-bit counter, 62 random bits."""
+    ms, sequence = _tick()
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    return UUID(int=(ms << 80) | (0x7 << 76) | (sequence << 64) | (0b10 << 62) | rand_b)
+
+
+def sequential_guid() -> UUID:
+    """Time-ordered GUID for SQL Server's uniqueidentifier sort order.
+
+    SQL Server compares the last six bytes first and then bytes 8-9, so the
+    millisecond timestamp goes there and the counter follows; the leading
+    eight bytes stay random.
+    """
+    ms, sequence = _tick()
+    head = bytearray(os.urandom(8))
+    head[6] = (head[6] & 0x0F) | 0x40
+    tail = ((0b10 << 14) | (sequence & 0x3FFF)).to_bytes(2, "big") + ms.to_bytes(6, "big")
+    return UUID(bytes=bytes(head) + tail)
+
+
+def new_id(dialect: Optional[str] = None) -> UUID:
+    """Time-ordered primary key in the layout the dialect's index sorts by."""
+    return sequential_guid() if dialect == "mssql" else uuid7()
+
+
+def default_id(context) -> UUID:
+    """Column default: the id is known before INSERT, so no RETURNING or refresh is needed for it."""
+    return new_id(context.dialect.name)
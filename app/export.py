@@ -0,0 +1,130 @@
+import csv
+import io
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, Iterator, List, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from app import archive, formats
+from app.database import SessionLocal, replica_reads
+from app.serialization import json_default
+from config.app_config import app_config
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("ndjson", "csv", formats.ARROW, formats.MSGPACK)
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    formats.ARROW: formats.MEDIA_TYPES[formats.ARROW],
+    formats.MSGPACK: formats.MEDIA_TYPES[formats.MSGPACK],
+}
+
+
+def _csv_value(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def resolve_columns(model, columns: Optional[str]) -> List:
+    table_columns = model.__table__.columns
+    if not columns:
+        return list(table_columns)
+    names = [name.strip() for name in columns.split(",") if name.strip()]
+    unknown = [name for name in names if name not in table_columns]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown columns: {', '.join(unknown)}"
+        )
+    return [table_columns[name] for name in names]
+
+
+def _encode_chunk(fmt: str, names: List[str], rows) -> bytes:
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps(dict(zip(names, row)), default=json_default, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode()
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+def _encode_partitions(result, fmt: str, names: List[str], types) -> Iterator[bytes]:
+    if fmt == "csv":
+        yield _encode_chunk(fmt, [], [names])
+    if fmt == formats.ARROW:
+        # Один поток IPC: схема один раз, далее по record batch на каждую порцию курсора
+        stream = formats.ArrowStream(types)
+        for partition in result.partitions():
+            yield stream.write_columns(list(zip(*partition)))
+        yield stream.close()
+        return
+    for partition in result.partitions():
+        if fmt == formats.MSGPACK:
+            # Последовательность карт {колонка: [значения]}, по одной на порцию
+            yield formats.encode_columns(fmt, types, list(zip(*partition)))
+        else:
+            yield _encode_chunk(fmt, names, partition)
+
+
+def _generate(stmt, fmt: str, names: List[str], types, chunk_size: int) -> Iterator[bytes]:
+    # Собственная сессия: живёт ровно столько, сколько идёт выгрузка
+    db = SessionLocal()
+    try:
+        with replica_reads(db):
+            result = db.execute(stmt.execution_options(yield_per=chunk_size))
+        yield from _encode_partitions(result, fmt, names, types)
+    except Exception as e:
+        logger.error(f"Export failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+def stream_export(model, time_column, fmt: Optional[str] = None, columns: Optional[str] = None,
+                  date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                  accept: Optional[str] = None, accept_encoding: Optional[str] = None) -> StreamingResponse:
+    """Stream a table as NDJSON, CSV, Arrow IPC or MessagePack from a server-side cursor.
+
+    Without an explicit ``fmt`` the format is negotiated from ``accept``.
+    """
+    if fmt is None:
+        # application/json (так спрашивает Swagger UI) — построчный JSON
+        fmt = formats.negotiate(accept, offered=MEDIA_TYPES, default="ndjson", aliases={"application/json": "ndjson"})
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format: {fmt}"
+        )
+    if not formats.available(fmt):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Export format {fmt} is not available on this server"
+        )
+    selected = resolve_columns(model, columns)
+    # Диапазон, уходящий в закрытые месяцы, читается из основной таблицы и архива вместе
+    table = archive.source(model, date_from, date_to)
+    time_column = table.columns[time_column.key]
+    stmt = select(*(table.columns[column.name] for column in selected))
+    if date_from is not None:
+        stmt = stmt.where(time_column >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(time_column < date_to)
+    stmt = stmt.order_by(time_column)
+
+    names = [column.name for column in selected]
+    encoding = formats.choose_encoding(accept_encoding)
+    logger.info("Exporting %s as %s (%s), columns: %s", model.__tablename__, fmt, encoding or "identity", names)
+    filename = f"{model.__tablename__.lower()}.{fmt}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "Vary": "Accept, Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    body = _generate(stmt, fmt, names, formats.column_types(selected), app_config.EXPORT_CHUNK_SIZE)
+    return StreamingResponse(formats.compress_stream(body, encoding), media_type=MEDIA_TYPES[fmt], headers=headers)
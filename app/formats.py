@@ -0,0 +1,264 @@
+import gzip
+import importlib
+import io
+import typing
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import types as sqltypes
+
+from app.serialization import FastJSONResponse, ProjectedRows, json_default, wire_converter
+from config.app_config import app_config
+
+JSON = "json"
+ARROW = "arrow"
+MSGPACK = "msgpack"
+
+MEDIA_TYPES = {
+    JSON: "application/json",
+    ARROW: "application/vnd.apache.arrow.stream",
+    MSGPACK: "application/msgpack",
+}
+# Синонимы, которые встречаются у клиентов
+_ACCEPT_ALIASES = {
+    "application/json": JSON,
+    "application/vnd.apache.arrow.stream": ARROW,
+    "application/vnd.apache.arrow.file": ARROW,
+    "application/msgpack": MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+_REQUIRED_MODULE = {ARROW: "pyarrow", MSGPACK: "msgpack"}
+
+
+@lru_cache(maxsize=None)
+def _module(name: str):
+    # Необязательные зависимости грузятся при первом запросе формата, а не при старте
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def available(fmt: str) -> bool:
+    module = _REQUIRED_MODULE.get(fmt)
+    return module is None or _module(module) is not None
+
+
+def _parse_header(header: Optional[str]) -> List[Tuple[str, float]]:
+    # "a/b;q=0.5, c/d" -> [("a/b", 0.5), ("c/d", 1.0)] по убыванию q, порядок внутри q сохраняется
+    items = []
+    for index, part in enumerate(filter(None, (item.strip() for item in (header or "").split(",")))):
+        token, *params = (piece.strip() for piece in part.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        items.append((token.lower(), quality, index))
+    items.sort(key=lambda item: (-item[1], item[2]))
+    return [(token, quality) for token, quality, _ in items]
+
+
+def negotiate(accept: Optional[str], offered: Dict[str, str] = MEDIA_TYPES, default: str = JSON,
+              aliases: Optional[Dict[str, str]] = None) -> str:
+    """Format for an Accept header among ``offered``; ``default`` when nothing offered matches.
+
+    ``aliases`` maps extra media types onto offered formats.
+    """
+    parsed = _parse_header(accept)
+    if not parsed:
+        return default
+    known = {media_type.split(";")[0]: fmt for fmt, media_type in offered.items()}
+    known.update((media_type, fmt) for media_type, fmt in _ACCEPT_ALIASES.items() if fmt in offered)
+    known.update(aliases or {})
+    for media_type, quality in parsed:
+        if quality <= 0:
+            continue
+        if media_type in ("*/*", "application/*"):
+            return default
+        fmt = known.get(media_type)
+        if fmt is not None and available(fmt):
+            return fmt
+    # Браузеры, Swagger UI и прочие клиенты с «чужим» Accept получают формат по умолчанию, а не 406
+    return default
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Preferred content coding: br when brotli is installed, otherwise gzip."""
+    accepted = {token: quality for token, quality in _parse_header(accept_encoding) if quality > 0}
+    if "br" in accepted and _module("brotli") is not None:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return _module("brotli").compress(body, quality=app_config.RESPONSE_BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=app_config.RESPONSE_GZIP_LEVEL, mtime=0)
+    return body
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """Compress a streamed body chunk by chunk, flushing after each so clients can decode progressively."""
+    if encoding is None:
+        yield from chunks
+        return
+    if encoding == "br":
+        compressor = _module("brotli").Compressor(quality=app_config.RESPONSE_BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(app_config.RESPONSE_GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def _unwrap(annotation):
+    # Optional[X] -> X
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+        return args[0]
+    return annotation
+
+
+def _sample(values: Sequence) -> Any:
+    return next((value for value in values if value is not None), None)
+
+
+def _arrow_type(column_type):
+    """Arrow type for a SQL column type or, for rows without one, a Python type."""
+    pa = _module("pyarrow")
+    if isinstance(column_type, sqltypes.TypeEngine):
+        if (isinstance(column_type, sqltypes.Numeric) and not isinstance(column_type, sqltypes.Float)
+                and column_type.asdecimal and column_type.precision):
+            # Суммы и координаты — точным десятичным, без округления до float64
+            return pa.decimal128(column_type.precision, column_type.scale or 0)
+        if isinstance(column_type, sqltypes.Uuid) and column_type.as_uuid and hasattr(pa, "uuid"):
+            # Канонический тип arrow.uuid: 16 байт вместо строки из 36 символов
+            return pa.uuid()
+        try:
+            column_type = column_type.python_type
+        except NotImplementedError:
+            return pa.string()
+    if column_type is bool:
+        return pa.bool_()
+    if column_type is int:
+        return pa.int64()
+    if column_type in (float, Decimal):
+        return pa.float64()
+    if column_type is datetime:
+        return pa.timestamp("us")
+    if column_type is date:
+        return pa.date32()
+    return pa.string()
+
+
+def _arrow_array(values: Sequence, arrow_type):
+    # Преобразуем только то, что pyarrow не принимает как есть: UUID и Decimal в float64
+    pa = _module("pyarrow")
+    if isinstance(arrow_type, pa.ExtensionType):
+        storage = pa.array([None if value is None else value.bytes for value in values], arrow_type.storage_type)
+        return pa.ExtensionArray.from_storage(arrow_type, storage)
+    sample = _sample(values)
+    if arrow_type == pa.string() and sample is not None and not isinstance(sample, str):
+        values = [None if value is None else str(value) for value in values]
+    elif arrow_type == pa.float64() and isinstance(sample, Decimal):
+        values = [None if value is None else float(value) for value in values]
+    return pa.array(values, type=arrow_type)
+
+
+def _msgpack_values(values: Sequence) -> Sequence:
+    # Колонка преобразуется целиком по первому значению, без обратного вызова на каждое
+    convert = wire_converter(_sample(values))
+    if convert is not None:
+        return [None if value is None else convert(value) for value in values]
+    return values
+
+
+def schema_types(schema: Type[BaseModel]) -> Dict[str, type]:
+    return {name: _unwrap(field.annotation) for name, field in schema.model_fields.items()}
+
+
+def column_types(columns) -> Dict[str, Any]:
+    return {column.name: column.type for column in columns}
+
+
+class ArrowStream:
+    """Arrow IPC stream built one record batch at a time."""
+
+    def __init__(self, types: Dict[str, Any]):
+        pa = _module("pyarrow")
+        self.names = list(types)
+        self.schema = pa.schema([(name, _arrow_type(column_type)) for name, column_type in types.items()])
+        self._sink = io.BytesIO()
+        self._writer = pa.ipc.new_stream(self._sink, self.schema)
+
+    def _drain(self) -> bytes:
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+        return data
+
+    def write_columns(self, columns: Sequence[Sequence]) -> bytes:
+        pa = _module("pyarrow")
+        arrays = [_arrow_array(values, field.type) for values, field in zip(columns, self.schema)]
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        return self._drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._drain()
+
+
+def encode_columns(fmt: str, types: Dict[str, Any], columns: Sequence[Sequence]) -> bytes:
+    """One complete Arrow IPC stream or MessagePack map ``{column: [values]}``.
+
+    ``types`` maps column names to SQL column types or Python types.
+    """
+    if fmt == ARROW:
+        stream = ArrowStream(types)
+        return stream.write_columns(columns) + stream.close()
+    return _module("msgpack").packb(dict(zip(types, map(_msgpack_values, columns))), default=json_default)
+
+
+def negotiate_list(request) -> Tuple[str, Optional[str]]:
+    """Format and content coding a list response will use, decided from the headers alone."""
+    return negotiate(request.headers.get("accept")), choose_encoding(request.headers.get("accept-encoding"))
+
+
+def encode_list(rows: List[Dict[str, Any]], schema: Type[BaseModel], fmt: str,
+                encoding: Optional[str]) -> Tuple[Optional[str], bytes]:
+    """Encode list rows from crud in ``fmt``, compressed with ``encoding`` if large enough.
+
+    Returns the content coding actually applied (None when the body is below
+    ``RESPONSE_COMPRESSION_MIN_BYTES``) and the body.
+    """
+    if fmt == JSON:
+        body = FastJSONResponse(content=rows).body
+    elif isinstance(rows, ProjectedRows):
+        # Колонки прямо из результата запроса, с типами SQL
+        body = encode_columns(fmt, rows.types, rows.columns)
+    else:
+        types = schema_types(schema)
+        body = encode_columns(fmt, types, [[row[name] for row in rows] for name in types])
+    if encoding is not None and len(body) >= app_config.RESPONSE_COMPRESSION_MIN_BYTES:
+        return encoding, compress(body, encoding)
+    return None, body
+
+
+def representation_tag(fmt: str, encoding: Optional[str]) -> str:
+    """Suffix that keeps strong ETags distinct across formats and negotiated content codings."""
+    return "" if fmt == JSON and encoding is None else f"-{fmt}" + (f"+{encoding}" if encoding else "")
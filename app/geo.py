@@ -0,0 +1,271 @@
+import heapq
+import logging
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+from config.app_config import app_config
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_DEGREE_LAT = 111320.0
+
+# Ключи в session.info, где копятся изменения самокатов до коммита
+_PENDING_KEY = "geo_pending"
+_STALE_KEY = "geo_stale"
+
+
+class ScooterPoint(NamedTuple):
+    scooter_id: UUID
+    gps_latitude: float
+    gps_longitude: float
+    status_code: str
+    current_battery: int
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lon: float, radius_m: float) -> Tuple[float, float, float, float]:
+    dlat = radius_m / METERS_PER_DEGREE_LAT
+    dlon = radius_m / (METERS_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+
+class ScooterGridIndex:
+    """Uniform lat/lon grid over scooter positions.
+
+    Every worker keeps its own copy: local writes are applied on commit,
+    writes made by other workers are picked up by a periodic rebuild.
+    """
+
+    def __init__(self, cell_degrees: float, refresh_seconds: float):
+        self.cell_degrees = cell_degrees
+        self.refresh_seconds = refresh_seconds
+        self._cells: Dict[Tuple[int, int], Dict[UUID, ScooterPoint]] = {}
+        self._points: Dict[UUID, Tuple[Tuple[int, int], ScooterPoint]] = {}
+        self._lock = threading.RLock()
+        self._built_at: Optional[float] = None
+        self._stale = False
+
+    @property
+    def ready(self) -> bool:
+        return self._built_at is not None
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def upsert(self, point: ScooterPoint):
+        cell = self._cell(point.gps_latitude, point.gps_longitude)
+        with self._lock:
+            self._discard(point.scooter_id)
+            self._cells.setdefault(cell, {})[point.scooter_id] = point
+            self._points[point.scooter_id] = (cell, point)
+
+    def remove(self, scooter_id: UUID):
+        with self._lock:
+            self._discard(scooter_id)
+
+    def _discard(self, scooter_id: UUID):
+        current = self._points.pop(scooter_id, None)
+        if current is None:
+            return
+        bucket = self._cells.get(current[0])
+        if bucket is not None:
+            bucket.pop(scooter_id, None)
+            if not bucket:
+                del self._cells[current[0]]
+
+    def get(self, scooter_id: UUID) -> Optional[ScooterPoint]:
+        current = self._points.get(scooter_id)
+        return current[1] if current else None
+
+    def rebuild(self, points: Iterable[ScooterPoint]):
+        cells: Dict[Tuple[int, int], Dict[UUID, ScooterPoint]] = {}
+        index: Dict[UUID, Tuple[Tuple[int, int], ScooterPoint]] = {}
+        for point in points:
+            cell = self._cell(point.gps_latitude, point.gps_longitude)
+            cells.setdefault(cell, {})[point.scooter_id] = point
+            index[point.scooter_id] = (cell, point)
+        with self._lock:
+            self._cells, self._points = cells, index
+            self._built_at = time.monotonic()
+            self._stale = False
+
+    def mark_stale(self):
+        self._stale = True
+
+    def is_stale(self) -> bool:
+        if self._built_at is None or self._stale:
+            return True
+        return time.monotonic() - self._built_at > self.refresh_seconds
+
+    def nearby(self, lat: float, lon: float, radius_m: float, status_code: Optional[str],
+               limit: int) -> List[Tuple[float, ScooterPoint]]:
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_m)
+        row_from, col_from = self._cell(min_lat, min_lon)
+        row_to, col_to = self._cell(max_lat, max_lon)
+        candidates = []
+        with self._lock:
+            for row in range(row_from, row_to + 1):
+                for col in range(col_from, col_to + 1):
+                    bucket = self._cells.get((row, col))
+                    if bucket:
+                        candidates.extend(bucket.values())
+        matches = []
+        for point in candidates:
+            if status_code is not None and point.status_code != status_code:
+                continue
+            distance = haversine_m(lat, lon, point.gps_latitude, point.gps_longitude)
+            if distance <= radius_m:
+                matches.append((distance, point))
+        return heapq.nsmallest(limit, matches, key=lambda item: item[0])
+
+
+scooter_index = ScooterGridIndex(app_config.GEO_CELL_DEGREES, app_config.GEO_INDEX_REFRESH_SECONDS)
+_load_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+
+
+def point_from(scooter_id, lat, lon, status_code, battery) -> Optional[ScooterPoint]:
+    if lat is None or lon is None:
+        return None
+    return ScooterPoint(scooter_id, float(lat), float(lon), status_code, battery)
+
+
+POSITION_COLUMNS = (models.Scooter.scooter_id, models.Scooter.gps_latitude, models.Scooter.gps_longitude,
+                    models.Scooter.status_code, models.Scooter.current_battery)
+
+
+def load_index(db: Session):
+    started = time.perf_counter()
+    stmt = select(*POSITION_COLUMNS).where(
+        models.Scooter.gps_latitude.is_not(None), models.Scooter.gps_longitude.is_not(None)
+    ).execution_options(yield_per=app_config.EXPORT_CHUNK_SIZE)
+    scooter_index.rebuild(point_from(*row) for row in db.execute(stmt))
+    logger.info("Scooter index built: %s scooters in %.1f ms", len(scooter_index), (time.perf_counter() - started) * 1000)
+
+
+def _refresh_in_background():
+    db = SessionLocal()
+    try:
+        load_index(db)
+    except Exception as e:
+        logger.error(f"Scooter index refresh failed: {str(e)}")
+    finally:
+        db.close()
+        _refresh_lock.release()
+
+
+def _ensure_index(db: Session) -> bool:
+    if not app_config.GEO_INDEX_ENABLED:
+        return False
+    if not scooter_index.ready:
+        with _load_lock:
+            if not scooter_index.ready:
+                load_index(db)
+        return True
+    if scooter_index.is_stale() and _refresh_lock.acquire(blocking=False):
+        threading.Thread(target=_refresh_in_background, name="scooter-index-refresh", daemon=True).start()
+    return True
+
+
+def _query_bounding_box(db: Session, lat: float, lon: float, radius_m: float, status_code: Optional[str],
+                        limit: int) -> List[Tuple[float, ScooterPoint]]:
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_m)
+    stmt = select(*POSITION_COLUMNS).where(
+        models.Scooter.gps_latitude.between(min_lat, max_lat),
+        models.Scooter.gps_longitude.between(min_lon, max_lon),
+    )
+    if status_code is not None:
+        stmt = stmt.where(models.Scooter.status_code == status_code)
+    matches = []
+    for row in db.execute(stmt):
+        point = point_from(*row)
+        distance = haversine_m(lat, lon, point.gps_latitude, point.gps_longitude)
+        if distance <= radius_m:
+            matches.append((distance, point))
+    return heapq.nsmallest(limit, matches, key=lambda item: item[0])
+
+
+def find_nearby(db: Session, lat: float, lon: float, radius_m: float, status_code: Optional[str],
+                limit: int) -> List[Tuple[float, ScooterPoint]]:
+    """Nearest scooters within ``radius_m``, from the grid index or a bounding-box query."""
+    try:
+        if _ensure_index(db):
+            return scooter_index.nearby(lat, lon, radius_m, status_code, limit)
+    except Exception as e:
+        logger.error(f"Scooter index unavailable, falling back to bounding-box query: {str(e)}")
+    return _query_bounding_box(db, lat, lon, radius_m, status_code, limit)
+
+
+def _pending(session: Session) -> Dict[UUID, Optional[ScooterPoint]]:
+    # scooter_id -> новая позиция, либо None, если самокат удалён
+    return session.info.setdefault(_PENDING_KEY, {})
+
+
+@event.listens_for(models.Scooter, "after_insert")
+@event.listens_for(models.Scooter, "after_update")
+def _track_scooter(mapper, connection, target: models.Scooter):
+    session = Session.object_session(target)
+    if session is not None:
+        _pending(session)[target.scooter_id] = point_from(
+            target.scooter_id, target.gps_latitude, target.gps_longitude,
+            target.status_code, target.current_battery
+        )
+
+
+@event.listens_for(models.Scooter, "after_delete")
+def _track_scooter_delete(mapper, connection, target: models.Scooter):
+    session = Session.object_session(target)
+    if session is not None:
+        _pending(session)[target.scooter_id] = None
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_statements(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    if orm_execute_state.execution_options.get("geo_index_synced"):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is models.Scooter:
+        # Изменённые строки неизвестны — индекс перестроится при следующем запросе
+        orm_execute_state.session.info[_STALE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session: Session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    stale = session.info.pop(_STALE_KEY, False)
+    if not scooter_index.ready:
+        return
+    for scooter_id, point in (pending or {}).items():
+        if point is None:
+            scooter_index.remove(scooter_id)
+        else:
+            scooter_index.upsert(point)
+    if stale:
+        scooter_index.mark_stale()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_STALE_KEY, None)
@@ -0,0 +1,149 @@
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.cache import response_cache
+from app.database import engine, replica_set
+from config.app_config import app_config
+
+logger = logging.getLogger(__name__)
+
+
+class Check:
+    """Outcome of the latest run of one probe."""
+
+    def __init__(self):
+        self.up: Optional[bool] = None
+        self.latency_ms: Optional[float] = None
+        self.last_success: Optional[str] = None
+        self.error: Optional[str] = None
+
+    def run(self, probe: Callable[[], Any]):
+        started = time.perf_counter()
+        try:
+            probe()
+        except Exception as e:
+            self.up, self.error = False, str(e)
+        else:
+            self.up, self.error = True, None
+            self.last_success = datetime.now(timezone.utc).isoformat()
+        self.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    def info(self) -> Dict[str, Any]:
+        status = "unknown" if self.up is None else "up" if self.up else "down"
+        return {"status": status, "latency_ms": self.latency_ms, "last_success": self.last_success, "error": self.error}
+
+
+def pool_info() -> Dict[str, Any]:
+    pool = engine.pool
+    info: Dict[str, Any] = {"class": type(pool).__name__}
+    if hasattr(pool, "checkedout"):
+        info.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+        limit = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+        info["saturated"] = pool.checkedout() >= limit
+    return info
+
+
+class HealthProber:
+    """Background thread that probes the database, pool and cache on an interval.
+
+    The database and each read replica are probed over their own unpooled
+    connections, so a saturated pool is reported as degraded instead of
+    making the probe wait for a slot.
+    """
+
+    def __init__(self, interval_seconds: float, stale_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.stale_seconds = stale_seconds
+        self.database = Check()
+        self.cache = Check()
+        self.replicas = {replica.name: Check() for replica in replica_set.replicas}
+        self.pool: Dict[str, Any] = {}
+        self.probed_at: Optional[float] = None
+        self.checked_at: Optional[str] = None
+        self.probe_ms: Optional[float] = None
+        self._probe_engines: Dict[str, Any] = {}
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _ping(self, name: str, url):
+        probe_engine = self._probe_engines.get(name)
+        if probe_engine is None:
+            probe_engine = self._probe_engines[name] = create_engine(url, poolclass=NullPool)
+        with probe_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    def probe(self):
+        started = time.perf_counter()
+        self.database.run(lambda: self._ping("primary", engine.url))
+        for replica in replica_set.replicas:
+            check = self.replicas[replica.name]
+            check.run(lambda: self._ping(replica.name, replica.engine.url))
+            # Реплика, снова отвечающая на проверку, возвращается в ротацию
+            replica.mark(check.up)
+        self.cache.run(response_cache.ping)
+        self.pool = pool_info()
+        self.probe_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.probed_at = time.monotonic()
+        self.checked_at = datetime.now(timezone.utc).isoformat()
+        if not self.database.up:
+            logger.error(f"Health probe: database is down: {self.database.error}")
+
+    def status(self) -> str:
+        if self.probed_at is None:
+            return "starting"
+        if not self.database.up or time.monotonic() - self.probed_at > self.stale_seconds:
+            return "unhealthy"
+        if not self.cache.up or self.pool.get("saturated") or not all(check.up for check in self.replicas.values()):
+            return "degraded"
+        return "healthy"
+
+    def snapshot(self) -> Dict[str, Any]:
+        age = None if self.probed_at is None else round(time.monotonic() - self.probed_at, 3)
+        return {
+            "status": self.status(),
+            "checked_at": self.checked_at,
+            "age_seconds": age,
+            "probe_ms": self.probe_ms,
+            "checks": {
+                "database": self.database.info(),
+                "pool": self.pool,
+                "replicas": {name: check.info() for name, check in self.replicas.items()},
+                "cache": {"backend": response_cache.backend, **self.cache.info()},
+            },
+        }
+
+    def _run(self):
+        while True:
+            try:
+                self.probe()
+            except Exception:
+                logger.exception("Health prober error")
+            if self._stop.wait(self.interval_seconds):
+                return
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+health_prober = HealthProber(app_config.HEALTH_PROBE_SECONDS, app_config.HEALTH_STALE_SECONDS)
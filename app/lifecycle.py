@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from anyio import to_thread
+from sqlalchemy import text
+
+from app import crud, geo
+from app.admission import configure_threadpool
+from app.analytics import rollup_refresher
+from app.database import SessionLocal, dispose_engines, engine, is_memory_database
+from app.health import health_prober
+from app.schema import create_schema, missing_tables
+from app.telemetry import telemetry_buffer
+from config.app_config import app_config
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Whether the worker has finished warming up and may receive traffic."""
+
+    def __init__(self):
+        self.ready = False
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.warmup_ms: Optional[float] = None
+
+    def info(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "attempts": self.attempts, "error": self.error, "warmup_ms": self.warmup_ms}
+
+
+readiness = Readiness()
+
+
+def _warm_pool(connections: int):
+    # Соединения открываются заранее, чтобы первые запросы не платили за подключение
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+
+
+def _warm_caches():
+    db = SessionLocal()
+    try:
+        crud.get_scooter_statuses(db)
+        crud.get_payment_statuses(db)
+        if app_config.GEO_INDEX_ENABLED:
+            geo.load_index(db)
+    finally:
+        db.close()
+
+
+def warm_up() -> float:
+    """Check the schema, open pool connections and fill caches; returns elapsed ms."""
+    started = time.perf_counter()
+    if is_memory_database(engine.url):
+        # Новая база в памяти всегда пуста: схему создаём сами, внешней команды для неё нет
+        create_schema(engine)
+    missing = missing_tables(engine)
+    if missing:
+        raise RuntimeError(f"Missing tables: {', '.join(missing)}; run python init_db.py")
+    _warm_pool(max(1, app_config.STARTUP_WARMUP_CONNECTIONS))
+    if app_config.STARTUP_WARM_CACHES:
+        _warm_caches()
+    return (time.perf_counter() - started) * 1000
+
+
+async def _warm_up_until_ready():
+    # Недоступная база не роняет процесс: liveness отвечает, readiness ждёт успешного прогрева
+    while True:
+        readiness.attempts += 1
+        try:
+            readiness.warmup_ms = round(await to_thread.run_sync(warm_up), 1)
+        except Exception as e:
+            readiness.error = str(e)
+            logger.error(f"Warmup failed (attempt {readiness.attempts}): {str(e)}")
+            await asyncio.sleep(app_config.STARTUP_RETRY_SECONDS)
+            continue
+        readiness.error = None
+        readiness.ready = True
+        logger.info("Worker ready: warmup took %.1f ms", readiness.warmup_ms)
+        if app_config.ROLLUP_REFRESH_ENABLED:
+            rollup_refresher.start()
+        return
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Size the threadpool, start the health prober and warm up in the background; release resources on shutdown."""
+    configure_threadpool()
+    health_prober.start()
+    warmup = asyncio.create_task(_warm_up_until_ready())
+    try:
+        yield
+    finally:
+        readiness.ready = False
+        warmup.cancel()
+        health_prober.stop()
+        rollup_refresher.stop()
+        # Буфер телеметрии сбрасывается до закрытия пула
+        telemetry_buffer.stop()
+        dispose_engines()
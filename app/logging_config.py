@@ -0,0 +1,113 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from config.app_config import app_config
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Pass only a fraction of records below WARNING for the configured loggers."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.name)
+        return rate is None or random.random() < rate
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The queue is in-process, so records travel as-is and the message is
+    only interpolated when a handler actually writes it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    # "app.crud.reads=0.01,app.cache=0.1"
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+def _file_handler() -> logging.Handler:
+    directory = os.path.dirname(app_config.LOG_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if app_config.LOG_ROTATION == "time":
+        return logging.handlers.TimedRotatingFileHandler(
+            app_config.LOG_FILE, when=app_config.LOG_ROTATION_WHEN,
+            backupCount=app_config.LOG_BACKUP_COUNT, encoding="utf-8", delay=True
+        )
+    return logging.handlers.RotatingFileHandler(
+        app_config.LOG_FILE, maxBytes=app_config.LOG_MAX_BYTES,
+        backupCount=app_config.LOG_BACKUP_COUNT, encoding="utf-8", delay=True
+    )
+
+
+def setup_logging():
+    """Route all records through a queue drained by a background listener thread."""
+    global _listener
+    if _listener is not None:
+        return
+
+    file_handler = _file_handler()
+    file_handler.setFormatter(JsonFormatter())
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    # Сэмплирование до постановки в очередь: отброшенные записи ничего не стоят
+    queue_handler.addFilter(SamplingFilter(parse_sampling(app_config.LOG_SAMPLING)))
+
+    root = logging.getLogger()
+    root.setLevel(app_config.LOG_LEVEL)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
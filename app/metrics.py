@@ -0,0 +1,249 @@
+import asyncio
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config.app_config import app_config
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class RequestStats:
+    """Per-request accounting, shared with the worker thread through a context variable."""
+
+    __slots__ = ("scope", "queries", "db_seconds", "endpoint_done")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.endpoint_done: Optional[float] = None
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return route.path if route is not None else UNMATCHED_ROUTE
+
+    @property
+    def method(self) -> str:
+        return self.scope["method"]
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, List] = {}
+
+    def observe(self, labels: Labels, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            # [счётчики по корзинам..., +Inf, сумма]
+            series = self._series.setdefault(labels, [0] * (len(self.buckets) + 1) + [0.0])
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(labels)} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._series: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels, value: float = 1):
+        self._series[labels] = self._series.get(labels, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_labels(labels)} {value}" for labels, value in sorted(self._series.items()))
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Labels) -> str:
+    # Каждый воркер отвечает только за себя: метка worker разводит серии разных процессов
+    labels = (("worker", str(os.getpid())),) + labels
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def render_family(name: str, help_text: str, kind: str, series: Dict[Labels, float]) -> List[str]:
+    """Text lines for an externally owned gauge or counter family."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_labels(labels)} {value}" for labels, value in sorted(series.items()))
+    return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter("http_requests_total", "HTTP requests by route and status code.")
+        self.latency = Histogram("http_request_duration_seconds", "HTTP request latency.", LATENCY_BUCKETS)
+        self.request_queries = Histogram("http_request_db_queries", "SQL statements per HTTP request.", QUERY_COUNT_BUCKETS)
+        self.request_db_time = Histogram("http_request_db_duration_seconds", "SQL time per HTTP request.", LATENCY_BUCKETS)
+        self.queries = Counter("db_queries_total", "SQL statements executed, by origin.")
+        self.db_time = Counter("db_query_duration_seconds_total", "SQL execution time, by origin.")
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        route_labels = (("method", method), ("route", route))
+        with self._lock:
+            self.requests.inc(route_labels + (("status", str(status)),))
+            self.latency.observe(route_labels, seconds)
+            self.request_queries.observe(route_labels, stats.queries)
+            self.request_db_time.observe(route_labels, stats.db_seconds)
+
+    def observe_query(self, seconds: float, in_request: bool):
+        labels = (("origin", "request" if in_request else "background"),)
+        with self._lock:
+            self.queries.inc(labels)
+            self.db_time.inc(labels, seconds)
+
+    def render(self, extra: Sequence[str] = ()) -> str:
+        with self._lock:
+            lines = []
+            for metric in (self.requests, self.latency, self.request_queries, self.request_db_time,
+                           self.queries, self.db_time):
+                lines.extend(metric.render())
+        lines.extend(extra)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+# Слушатели длительности запросов (например, журнал медленных запросов): время меряется один раз, здесь
+_query_observers: List[Callable] = []
+
+
+def add_query_observer(observer: Callable):
+    """Call ``observer(conn, statement, parameters, seconds, executemany)`` after every statement."""
+    _query_observers.append(observer)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    registry.observe_query(elapsed, stats is not None)
+    for observer in _query_observers:
+        observer(conn, statement, parameters, elapsed, executemany)
+
+
+def _timed_endpoint(call):
+    # Момент возврата из обработчика отделяет его работу от сериализации ответа
+    if asyncio.iscoroutinefunction(call):
+        @wraps(call)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+
+        return async_wrapper
+
+    @wraps(call)
+    def wrapper(*args, **kwargs):
+        try:
+            return call(*args, **kwargs)
+        finally:
+            _mark_endpoint_done()
+
+    return wrapper
+
+
+def _mark_endpoint_done():
+    stats = _current.get()
+    if stats is not None:
+        stats.endpoint_done = time.perf_counter()
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that records when the endpoint function returns."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dependant.call = _timed_endpoint(self.dependant.call)
+
+
+def _server_timing(stats: RequestStats, started: float, headers_at: float) -> str:
+    parts = [f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"']
+    if stats.endpoint_done is not None:
+        parts.append(f"serialize;dur={(headers_at - stats.endpoint_done) * 1000:.1f}")
+    parts.append(f"total;dur={(headers_at - started) * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """Record latency, status and SQL accounting per route; add a Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if app_config.SERVER_TIMING_ENABLED:
+                    timing = _server_timing(stats, started, time.perf_counter())
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            registry.observe_request(stats.method, stats.route, status_code, time.perf_counter() - started, stats)
@@ -1,8 +1,7 @@
-from sqlalchemy import Column, String, Integer, DateTime, Date, Numeric, SmallInteger, Text, ForeignKey, CheckConstraint, Boolean
-from sqlalchemy.dialects.mssql import UNIQUEIDENTIFIER
+from sqlalchemy import Column, String, Integer, DateTime, Date, Numeric, SmallInteger, Text, ForeignKey, CheckConstraint, Boolean, Index, Uuid, DDL, event
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
 from app.database import Base
+from app.dialects import default_id, new_uuid, utcnow
 
 
 class Dictionary_ScooterStatus(Base):
@@ -30,13 +29,13 @@ class Dictionary_PaymentStatus(Base):
 class User(Base):
     __tablename__ = 'User'
 
-    user_id = Column(UNIQUEIDENTIFIER, primary_key=True, server_default=func.newid())
+    user_id = Column(Uuid, primary_key=True, default=default_id, server_default=new_uuid())
     phone_number = Column(String(15), nullable=False, unique=True)
     first_name = Column(String(50), nullable=False)
     last_name = Column(String(50), nullable=False)
     email = Column(String(100))
     date_of_birth = Column(Date)
-    registration_date = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    registration_date = Column(DateTime, nullable=False, server_default=utcnow())
     rating = Column(Numeric(3, 2), nullable=False, server_default='0.00')
 
     # Relationships
@@ -44,14 +43,13 @@ class User(Base):
 
     __table_args__ = (
         CheckConstraint('rating >= 0 AND rating <= 5', name='CHK_User_Rating'),
-        CheckConstraint('driver_license_verified IN (0, 1)', name='CHK_User_LicenseVerified'),
     )
 
 
 class Scooter(Base):
     __tablename__ = 'Scooter'
 
-    scooter_id = Column(UNIQUEIDENTIFIER, primary_key=True, server_default=func.newid())
+    scooter_id = Column(Uuid, primary_key=True, default=default_id, server_default=new_uuid())
     model = Column(String(100), nullable=False)
     manufacture_date = Column(Date, nullable=False)
     current_battery = Column(SmallInteger, nullable=False, server_default='100')
@@ -59,7 +57,7 @@ class Scooter(Base):
     gps_longitude = Column(Numeric(11, 8))
     status_code = Column(String(20), ForeignKey('Dictionary_ScooterStatus.status_code'), nullable=False)
     qr_code = Column(String(100), nullable=False, unique=True)
-    created_datetime = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    created_datetime = Column(DateTime, nullable=False, server_default=utcnow())
 
     # Relationships
     status = relationship("Dictionary_ScooterStatus", back_populates="scooters")
@@ -68,19 +66,21 @@ class Scooter(Base):
 
     __table_args__ = (
         CheckConstraint('current_battery >= 0 AND current_battery <= 100', name='CHK_Scooter_Battery'),
+        Index('IX_Scooter_Location', 'gps_latitude', 'gps_longitude'),
+        Index('IX_Scooter_Status', 'status_code', 'created_datetime'),
     )
 
 
 class Tariff(Base):
     __tablename__ = 'Tariff'
 
-    tariff_id = Column(UNIQUEIDENTIFIER, primary_key=True, server_default=func.newid())
+    tariff_id = Column(Uuid, primary_key=True, default=default_id, server_default=new_uuid())
     tariff_name = Column(String(100), nullable=False)
     unlock_fee = Column(Numeric(10, 2), nullable=False, server_default='0')
     rate_per_minute = Column(Numeric(10, 2), nullable=False, server_default='0')
     rate_per_km = Column(Numeric(10, 2))
     is_active = Column(SmallInteger, nullable=False, server_default='1')
-    created_datetime = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    created_datetime = Column(DateTime, nullable=False, server_default=utcnow())
 
     # Relationships
     rides = relationship("Ride", back_populates="tariff")
@@ -95,11 +95,11 @@ class Tariff(Base):
 class ServiceStaff(Base):
     __tablename__ = 'ServiceStaff'
 
-    staff_id = Column(UNIQUEIDENTIFIER, primary_key=True, server_default=func.newid())
+    staff_id = Column(Uuid, primary_key=True, default=default_id, server_default=new_uuid())
     first_name = Column(String(50), nullable=False)
     last_name = Column(String(50), nullable=False)
     phone_number = Column(String(15), nullable=False)
-    created_datetime = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    created_datetime = Column(DateTime, nullable=False, server_default=utcnow())
 
     # Relationships
     maintenances = relationship("Maintenance", back_populates="staff")
@@ -108,8 +108,8 @@ class ServiceStaff(Base):
 class Ride(Base):
     __tablename__ = 'Ride'
 
-    ride_id = Column(UNIQUEIDENTIFIER, primary_key=True, server_default=func.newid())
-    start_time = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    ride_id = Column(Uuid, primary_key=True, default=default_id, server_default=new_uuid())
+    start_time = Column(DateTime, nullable=False, server_default=utcnow())
     end_time = Column(DateTime)
     start_latitude = Column(Numeric(10, 8), nullable=False)
     start_longitude = Column(Numeric(11, 8), nullable=False)
@@ -117,10 +117,10 @@ class Ride(Base):
     end_longitude = Column(Numeric(11, 8))
     distance = Column(Numeric(8, 2), nullable=False, server_default='0')
     ride_cost = Column(Numeric(10, 2), nullable=False, server_default='0')
-    user_id = Column(UNIQUEIDENTIFIER, ForeignKey('User.user_id'), nullable=False)
-    scooter_id = Column(UNIQUEIDENTIFIER, ForeignKey('Scooter.scooter_id'), nullable=False)
-    tariff_id = Column(UNIQUEIDENTIFIER, ForeignKey('Tariff.tariff_id'), nullable=False)
-    created_datetime = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    user_id = Column(Uuid, ForeignKey('User.user_id'), nullable=False)
+    scooter_id = Column(Uuid, ForeignKey('Scooter.scooter_id'), nullable=False)
+    tariff_id = Column(Uuid, ForeignKey('Tariff.tariff_id'), nullable=False)
+    created_datetime = Column(DateTime, nullable=False, server_default=utcnow())
 
     # Relationships
     user = relationship("User", back_populates="rides")
@@ -132,19 +132,25 @@ class Ride(Base):
         CheckConstraint('distance >= 0', name='CHK_Ride_Distance'),
         CheckConstraint('ride_cost >= 0', name='CHK_Ride_Cost'),
         CheckConstraint('end_time IS NULL OR end_time > start_time', name='CHK_Ride_Dates'),
+        Index('IX_Ride_EndTime', 'end_time'),
+        # Фильтры списка поездок: равенство по ключу + диапазон/сортировка по start_time
+        Index('IX_Ride_StartTime', 'start_time'),
+        Index('IX_Ride_User', 'user_id', 'start_time'),
+        Index('IX_Ride_Scooter', 'scooter_id', 'start_time'),
+        Index('IX_Ride_Tariff', 'tariff_id', 'start_time'),
     )
 
 
 class Payment(Base):
     __tablename__ = 'Payment'
 
-    payment_id = Column(UNIQUEIDENTIFIER, primary_key=True, server_default=func.newid())
+    payment_id = Column(Uuid, primary_key=True, default=default_id, server_default=new_uuid())
     amount = Column(Numeric(10, 2), nullable=False)
-    payment_date = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    payment_date = Column(DateTime, nullable=False, server_default=utcnow())
     payment_method = Column(String(50), nullable=False)
     status_code = Column(String(20), ForeignKey('Dictionary_PaymentStatus.status_code'), nullable=False)
-    ride_id = Column(UNIQUEIDENTIFIER, ForeignKey('Ride.ride_id'), nullable=False, unique=True)
-    created_datetime = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    ride_id = Column(Uuid, ForeignKey('Ride.ride_id'), nullable=False, unique=True)
+    created_datetime = Column(DateTime, nullable=False, server_default=utcnow())
 
     # Relationships
     payment_status = relationship("Dictionary_PaymentStatus", back_populates="payments")
@@ -152,21 +158,86 @@ class Payment(Base):
 
     __table_args__ = (
         CheckConstraint('amount > 0', name='CHK_Payment_Amount'),
+        Index('IX_Payment_PaymentDate', 'payment_date'),
+        Index('IX_Payment_Status', 'status_code', 'payment_date'),
     )
 
 
+# Архив закрытых месяцев: те же колонки без внешних ключей, строки переносит app.archive.
+# В PostgreSQL таблицы секционированы по месяцам (ключ секции входит в первичный ключ)
+class Ride_Archive(Base):
+    __tablename__ = 'Ride_Archive'
+
+    ride_id = Column(Uuid, primary_key=True)
+    start_time = Column(DateTime, primary_key=True)
+    end_time = Column(DateTime)
+    start_latitude = Column(Numeric(10, 8), nullable=False)
+    start_longitude = Column(Numeric(11, 8), nullable=False)
+    end_latitude = Column(Numeric(10, 8))
+    end_longitude = Column(Numeric(11, 8))
+    distance = Column(Numeric(8, 2), nullable=False)
+    ride_cost = Column(Numeric(10, 2), nullable=False)
+    user_id = Column(Uuid, nullable=False)
+    scooter_id = Column(Uuid, nullable=False)
+    tariff_id = Column(Uuid, nullable=False)
+    created_datetime = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('IX_Ride_Archive_EndTime', 'end_time'),
+        Index('IX_Ride_Archive_StartTime', 'start_time'),
+        Index('IX_Ride_Archive_User', 'user_id', 'start_time'),
+        Index('IX_Ride_Archive_Scooter', 'scooter_id', 'start_time'),
+        Index('IX_Ride_Archive_Tariff', 'tariff_id', 'start_time'),
+        {'postgresql_partition_by': 'RANGE (start_time)'},
+    )
+
+
+class Payment_Archive(Base):
+    __tablename__ = 'Payment_Archive'
+
+    payment_id = Column(Uuid, primary_key=True)
+    amount = Column(Numeric(10, 2), nullable=False)
+    payment_date = Column(DateTime, primary_key=True)
+    payment_method = Column(String(50), nullable=False)
+    status_code = Column(String(20), nullable=False)
+    ride_id = Column(Uuid, nullable=False)
+    created_datetime = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('IX_Payment_Archive_PaymentDate', 'payment_date'),
+        Index('IX_Payment_Archive_Status', 'status_code', 'payment_date'),
+        Index('IX_Payment_Archive_Ride', 'ride_id'),
+        {'postgresql_partition_by': 'RANGE (payment_date)'},
+    )
+
+
+# Секция по умолчанию принимает строки, для месяца которых секция ещё не создана
+for _archive in (Ride_Archive.__table__, Payment_Archive.__table__):
+    event.listen(_archive, "after_create", DDL(
+        f'CREATE TABLE IF NOT EXISTS "{_archive.name}_Default" PARTITION OF "{_archive.name}" DEFAULT'
+    ).execute_if(dialect="postgresql"))
+
+
+class Archive_Watermark(Base):
+    __tablename__ = 'Archive_Watermark'
+
+    # Все строки архива source старше value
+    source = Column(String(50), primary_key=True)
+    value = Column(DateTime, nullable=False)
+
+
 class Maintenance(Base):
     __tablename__ = 'Maintenance'
 
-    maintenance_id = Column(UNIQUEIDENTIFIER, primary_key=True, server_default=func.newid())
+    maintenance_id = Column(Uuid, primary_key=True, default=default_id, server_default=new_uuid())
     maintenance_type = Column(String(50), nullable=False)
     scheduled_date = Column(Date, nullable=False)
     completed_date = Column(Date)
     description = Column(String(500))
     status = Column(String(20), nullable=False, server_default='scheduled')
-    scooter_id = Column(UNIQUEIDENTIFIER, ForeignKey('Scooter.scooter_id'), nullable=False)
-    staff_id = Column(UNIQUEIDENTIFIER, ForeignKey('ServiceStaff.staff_id'), nullable=False)
-    created_datetime = Column(DateTime, nullable=False, server_default=func.getutcdate())
+    scooter_id = Column(Uuid, ForeignKey('Scooter.scooter_id'), nullable=False)
+    staff_id = Column(Uuid, ForeignKey('ServiceStaff.staff_id'), nullable=False)
+    created_datetime = Column(DateTime, nullable=False, server_default=utcnow())
 
     # Relationships
     scooter = relationship("Scooter", back_populates="maintenances")
@@ -174,4 +245,50 @@ class Maintenance(Base):
 
     __table_args__ = (
         CheckConstraint('completed_date IS NULL OR completed_date >= scheduled_date', name='CHK_Maintenance_Dates'),
-    )
\ No newline at end of file
+        Index('IX_Maintenance_Status', 'status', 'scheduled_date'),
+        Index('IX_Maintenance_Scooter', 'scooter_id', 'scheduled_date'),
+        Index('IX_Maintenance_Staff', 'staff_id', 'scheduled_date'),
+    )
+
+# Агрегаты по дням: пересчитываются app.analytics, читаются /api/analytics
+class Stats_DailyTariff(Base):
+    __tablename__ = 'Stats_DailyTariff'
+
+    stat_date = Column(Date, primary_key=True)
+    tariff_id = Column(Uuid, primary_key=True)
+    rides_count = Column(Integer, nullable=False, server_default='0')
+    revenue = Column(Numeric(14, 2), nullable=False, server_default='0')
+    distance = Column(Numeric(14, 2), nullable=False, server_default='0')
+    updated_datetime = Column(DateTime, nullable=False, server_default=utcnow())
+
+
+class Stats_DailyScooter(Base):
+    __tablename__ = 'Stats_DailyScooter'
+
+    stat_date = Column(Date, primary_key=True)
+    scooter_id = Column(Uuid, primary_key=True)
+    rides_count = Column(Integer, nullable=False, server_default='0')
+    revenue = Column(Numeric(14, 2), nullable=False, server_default='0')
+    distance = Column(Numeric(14, 2), nullable=False, server_default='0')
+    updated_datetime = Column(DateTime, nullable=False, server_default=utcnow())
+
+    __table_args__ = (
+        Index('IX_Stats_DailyScooter_Scooter', 'scooter_id', 'stat_date'),
+    )
+
+
+class Stats_DailyPaymentStatus(Base):
+    __tablename__ = 'Stats_DailyPaymentStatus'
+
+    stat_date = Column(Date, primary_key=True)
+    status_code = Column(String(20), primary_key=True)
+    payments_count = Column(Integer, nullable=False, server_default='0')
+    amount = Column(Numeric(14, 2), nullable=False, server_default='0')
+    updated_datetime = Column(DateTime, nullable=False, server_default=utcnow())
+
+
+class Stats_Watermark(Base):
+    __tablename__ = 'Stats_Watermark'
+
+    source = Column(String(50), primary_key=True)
+    value = Column(DateTime, nullable=False)
@@ -0,0 +1,19 @@
+from typing import Annotated
+
+from fastapi import HTTPException, Query, status
+
+from config.app_config import app_config
+
+# Общие параметры страницы для списков
+Skip = Annotated[int, Query(ge=0)]
+Limit = Annotated[int, Query(ge=1, le=app_config.LIST_MAX_LIMIT)]
+
+
+def check_scan(skip: int, *filters):
+    """Reject deep pages of an unfiltered list: they scan and discard ``skip`` rows."""
+    if skip > app_config.LIST_MAX_UNFILTERED_OFFSET and all(value is None for value in filters):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"skip is limited to {app_config.LIST_MAX_UNFILTERED_OFFSET} without filters; "
+                   f"narrow the list with filters or use /export"
+        )
@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from uuid import UUID
+from datetime import date, datetime, timedelta, timezone
+import logging
+
+from app.database import get_db
+from app.metrics import TimedRoute
+from app import crud, schemas
+from app.conditional import conditional_response
+from config.app_config import app_config
+
+logger = logging.getLogger(__name__)
+router = APIRouter(route_class=TimedRoute)
+
+DEFAULT_DAYS = 30
+
+
+def _date_range(date_from: Optional[date], date_to: Optional[date]) -> Tuple[date, date]:
+    # Границы включительно; по умолчанию — последние 30 дней
+    date_to = date_to or datetime.now(timezone.utc).date()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from must not be after date_to")
+    if (date_to - date_from).days + 1 > app_config.ANALYTICS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range is limited to {app_config.ANALYTICS_MAX_DAYS} days"
+        )
+    return date_from, date_to
+
+@router.get("/tariffs/daily", response_model=List[schemas.DailyTariffStats])
+def read_daily_tariff_stats(
+    request: Request,
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    tariff_id: Optional[UUID] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+):
+    date_from, date_to = _date_range(date_from, date_to)
+    stats = crud.get_daily_tariff_stats(db, date_from, date_to, tariff_id=tariff_id, skip=skip, limit=limit)
+    return conditional_response(request, response, stats, schemas.DailyTariffStats)
+
+@router.get("/scooters/daily", response_model=List[schemas.DailyScooterStats])
+def read_daily_scooter_stats(
+    request: Request,
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    scooter_id: Optional[UUID] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+):
+    date_from, date_to = _date_range(date_from, date_to)
+    stats = crud.get_daily_scooter_stats(db, date_from, date_to, scooter_id=scooter_id, skip=skip, limit=limit)
+    return conditional_response(request, response, stats, schemas.DailyScooterStats)
+
+@router.get("/payments/daily", response_model=List[schemas.DailyPaymentStatusStats])
+def read_daily_payment_stats(
+    request: Request,
+    response: Response,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status_code: Optional[str] = Query(None, alias="status"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+):
+    date_from, date_to = _date_range(date_from, date_to)
+    stats = crud.get_daily_payment_stats(db, date_from, date_to, status_code=status_code, skip=skip, limit=limit)
+    return conditional_response(request, response, stats, schemas.DailyPaymentStatusStats)
+
+@router.post("/refresh", response_model=schemas.RollupRefreshResult)
+def rebuild_rollups(date_from: date, date_to: date, db: Session = Depends(get_db)):
+    date_from, date_to = _date_range(date_from, date_to)
+    try:
+        return crud.rebuild_rollups(db, date_from, date_to)
+    except crud.ConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error rebuilding rollups: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not rebuild rollups"
+        )
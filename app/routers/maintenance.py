@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Annotated, List, Optional
 from uuid import UUID
+from datetime import datetime
 import logging
 
 from app.database import get_db
-from app import crud, schemas
+from app.metrics import TimedRoute
+from app import crud, models, schemas
+from app.conditional import conditional_response
+from app.pagination import Limit, Skip
+from app.export import stream_export
+from config.app_config import app_config
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/", response_model=schemas.Maintenance, status_code=status.HTTP_201_CREATED)
 def create_maintenance(maintenance: schemas.MaintenanceCreate, db: Session = Depends(get_db)):
@@ -22,15 +28,78 @@ def create_maintenance(maintenance: schemas.MaintenanceCreate, db: Session = Dep
         )
 
 @router.get("/", response_model=List[schemas.Maintenance])
-def read_maintenances(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_maintenances(db, skip=skip, limit=limit)
+def read_maintenances(
+    request: Request,
+    response: Response,
+    skip: Skip = 0,
+    limit: Limit = 100,
+    maintenance_status: Optional[str] = Query(None, alias="status"),
+    scooter_id: Optional[UUID] = None,
+    staff_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+):
+    db_maintenances = crud.get_maintenances(db, skip=skip, limit=limit, status=maintenance_status,
+                                            scooter_id=scooter_id, staff_id=staff_id)
+    return conditional_response(request, response, db_maintenances, schemas.Maintenance)
+
+@router.get("/export")
+def export_maintenances(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", description="ndjson, csv, arrow or msgpack; from Accept if omitted"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    return stream_export(models.Maintenance, models.Maintenance.scheduled_date, fmt=fmt, columns=columns,
+                         date_from=date_from, date_to=date_to,
+                         accept=request.headers.get("accept"), accept_encoding=request.headers.get("accept-encoding"))
+
+@router.post("/bulk", response_model=schemas.BulkResult, status_code=status.HTTP_201_CREATED)
+def bulk_create_maintenances(items: Annotated[List[schemas.MaintenanceCreate], Body(max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_create(db, models.Maintenance, items)
+    except Exception as e:
+        logger.error(f"Error bulk creating maintenance: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not create maintenance"
+        )
+
+@router.patch("/bulk", response_model=schemas.BulkResult)
+def bulk_update_maintenances(items: Annotated[List[schemas.MaintenanceBulkUpdate], Body(max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_update(db, models.Maintenance, items)
+    except Exception as e:
+        logger.error(f"Error bulk updating maintenance: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not update maintenance"
+        )
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_maintenances(ids: Annotated[List[UUID], Body(embed=True, max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_delete(db, models.Maintenance, ids)
+    except Exception as e:
+        logger.error(f"Error bulk deleting maintenance: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not delete maintenance"
+        )
 
 @router.get("/{maintenance_id}", response_model=schemas.Maintenance)
-def read_maintenance(maintenance_id: UUID, db: Session = Depends(get_db)):
+def read_maintenance(maintenance_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_maintenance = crud.get_maintenance(db, maintenance_id=maintenance_id)
     if db_maintenance is None:
         logger.warning(f"Maintenance with id {maintenance_id} not found")
         raise HTTPException(status_code=404, detail="Maintenance not found")
+    return conditional_response(request, response, db_maintenance, schemas.Maintenance)
+
+@router.get("/{maintenance_id}/details", response_model=schemas.MaintenanceWithDetails)
+def read_maintenance_details(maintenance_id: UUID, db: Session = Depends(get_db)):
+    db_maintenance = crud.get_maintenance_details(db, maintenance_id=maintenance_id)
+    if db_maintenance is None:
+        raise HTTPException(status_code=404, detail="Maintenance not found")
     return db_maintenance
 
 @router.put("/{maintenance_id}", response_model=schemas.Maintenance)
@@ -50,10 +119,15 @@ def delete_maintenance(maintenance_id: UUID, db: Session = Depends(get_db)):
 @router.post("/{maintenance_id}/complete", response_model=schemas.Maintenance)
 def complete_maintenance(maintenance_id: UUID, db: Session = Depends(get_db)):
     try:
-        return crud.complete_maintenance(db=db, maintenance_id=maintenance_id)
+        db_maintenance = crud.complete_maintenance(db=db, maintenance_id=maintenance_id)
+    except crud.ConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         logger.error(f"Error completing maintenance: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Could not complete maintenance"
-        )
\ No newline at end of file
+        )
+    if db_maintenance is None:
+        raise HTTPException(status_code=404, detail="Maintenance not found")
+    return db_maintenance
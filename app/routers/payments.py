@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Annotated, List, Optional
 from uuid import UUID
+from datetime import datetime
 import logging
 
 from app.database import get_db
-from app import crud, schemas
+from app.metrics import TimedRoute
+from app import crud, models, schemas
+from app.conditional import conditional_response
+from app.pagination import Limit, Skip, check_scan
+from app.export import stream_export
+from config.app_config import app_config
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/", response_model=schemas.Payment, status_code=status.HTTP_201_CREATED)
 def create_payment(payment: schemas.PaymentCreate, db: Session = Depends(get_db)):
@@ -22,15 +28,80 @@ def create_payment(payment: schemas.PaymentCreate, db: Session = Depends(get_db)
         )
 
 @router.get("/", response_model=List[schemas.Payment])
-def read_payments(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_payments(db, skip=skip, limit=limit)
+def read_payments(
+    request: Request,
+    response: Response,
+    skip: Skip = 0,
+    limit: Limit = 100,
+    status_code: Optional[str] = Query(None, alias="status"),
+    ride_id: Optional[UUID] = None,
+    payment_date_from: Optional[datetime] = None,
+    payment_date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    check_scan(skip, status_code, ride_id, payment_date_from, payment_date_to)
+    db_payments = crud.get_payments(db, skip=skip, limit=limit, status_code=status_code, ride_id=ride_id,
+                                    payment_date_from=payment_date_from, payment_date_to=payment_date_to)
+    return conditional_response(request, response, db_payments, schemas.Payment)
+
+@router.get("/export")
+def export_payments(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", description="ndjson, csv, arrow or msgpack; from Accept if omitted"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    return stream_export(models.Payment, models.Payment.payment_date, fmt=fmt, columns=columns,
+                         date_from=date_from, date_to=date_to,
+                         accept=request.headers.get("accept"), accept_encoding=request.headers.get("accept-encoding"))
+
+@router.post("/bulk", response_model=schemas.BulkResult, status_code=status.HTTP_201_CREATED)
+def bulk_create_payments(items: Annotated[List[schemas.PaymentCreate], Body(max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_create(db, models.Payment, items)
+    except Exception as e:
+        logger.error(f"Error bulk creating payment: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not create payment"
+        )
+
+@router.patch("/bulk", response_model=schemas.BulkResult)
+def bulk_update_payments(items: Annotated[List[schemas.PaymentBulkUpdate], Body(max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_update(db, models.Payment, items)
+    except Exception as e:
+        logger.error(f"Error bulk updating payment: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not update payment"
+        )
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_payments(ids: Annotated[List[UUID], Body(embed=True, max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_delete(db, models.Payment, ids)
+    except Exception as e:
+        logger.error(f"Error bulk deleting payment: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not delete payment"
+        )
 
 @router.get("/{payment_id}", response_model=schemas.Payment)
-def read_payment(payment_id: UUID, db: Session = Depends(get_db)):
+def read_payment(payment_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_payment = crud.get_payment(db, payment_id=payment_id)
     if db_payment is None:
         logger.warning(f"Payment with id {payment_id} not found")
         raise HTTPException(status_code=404, detail="Payment not found")
+    return conditional_response(request, response, db_payment, schemas.Payment)
+
+@router.get("/{payment_id}/details", response_model=schemas.PaymentWithDetails)
+def read_payment_details(payment_id: UUID, db: Session = Depends(get_db)):
+    db_payment = crud.get_payment_details(db, payment_id=payment_id)
+    if db_payment is None:
+        raise HTTPException(status_code=404, detail="Payment not found")
     return db_payment
 
 @router.put("/{payment_id}", response_model=schemas.Payment)
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Annotated, List, Optional
 from uuid import UUID
+from datetime import datetime
 import logging
 
 from app.database import get_db
-from app import crud, schemas
+from app.metrics import TimedRoute
+from app import crud, models, schemas
+from app.conditional import conditional_response
+from app.pagination import Limit, Skip, check_scan
+from app.export import stream_export
+from config.app_config import app_config
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/", response_model=schemas.Ride, status_code=status.HTTP_201_CREATED)
 def create_ride(ride: schemas.RideCreate, db: Session = Depends(get_db)):
@@ -22,15 +28,94 @@ def create_ride(ride: schemas.RideCreate, db: Session = Depends(get_db)):
         )
 
 @router.get("/", response_model=List[schemas.Ride])
-def read_rides(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_rides(db, skip=skip, limit=limit)
+def read_rides(
+    request: Request,
+    response: Response,
+    skip: Skip = 0,
+    limit: Limit = 100,
+    user_id: Optional[UUID] = None,
+    scooter_id: Optional[UUID] = None,
+    tariff_id: Optional[UUID] = None,
+    start_time_from: Optional[datetime] = None,
+    start_time_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    check_scan(skip, user_id, scooter_id, tariff_id, start_time_from, start_time_to)
+    db_rides = crud.get_rides(db, skip=skip, limit=limit, user_id=user_id, scooter_id=scooter_id, tariff_id=tariff_id,
+                              start_time_from=start_time_from, start_time_to=start_time_to)
+    return conditional_response(request, response, db_rides, schemas.Ride)
+
+@router.get("/export")
+def export_rides(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", description="ndjson, csv, arrow or msgpack; from Accept if omitted"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    return stream_export(models.Ride, models.Ride.start_time, fmt=fmt, columns=columns,
+                         date_from=date_from, date_to=date_to,
+                         accept=request.headers.get("accept"), accept_encoding=request.headers.get("accept-encoding"))
+
+@router.post("/start", response_model=schemas.Ride, status_code=status.HTTP_201_CREATED)
+def start_ride(ride: schemas.RideCreate, db: Session = Depends(get_db)):
+    try:
+        return crud.start_ride(db=db, ride=ride)
+    except crud.ConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error starting ride: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not start ride"
+        )
+
+@router.post("/bulk", response_model=schemas.BulkResult, status_code=status.HTTP_201_CREATED)
+def bulk_create_rides(items: Annotated[List[schemas.RideCreate], Body(max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_create(db, models.Ride, items)
+    except Exception as e:
+        logger.error(f"Error bulk creating ride: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not create ride"
+        )
+
+@router.patch("/bulk", response_model=schemas.BulkResult)
+def bulk_update_rides(items: Annotated[List[schemas.RideBulkUpdate], Body(max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_update(db, models.Ride, items)
+    except Exception as e:
+        logger.error(f"Error bulk updating ride: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not update ride"
+        )
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_rides(ids: Annotated[List[UUID], Body(embed=True, max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_delete(db, models.Ride, ids)
+    except Exception as e:
+        logger.error(f"Error bulk deleting ride: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not delete ride"
+        )
 
 @router.get("/{ride_id}", response_model=schemas.Ride)
-def read_ride(ride_id: UUID, db: Session = Depends(get_db)):
+def read_ride(ride_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_ride = crud.get_ride(db, ride_id=ride_id)
     if db_ride is None:
         logger.warning(f"Ride with id {ride_id} not found")
         raise HTTPException(status_code=404, detail="Ride not found")
+    return conditional_response(request, response, db_ride, schemas.Ride)
+
+@router.get("/{ride_id}/details", response_model=schemas.RideWithDetails)
+def read_ride_details(ride_id: UUID, db: Session = Depends(get_db)):
+    db_ride = crud.get_ride_details(db, ride_id=ride_id)
+    if db_ride is None:
+        raise HTTPException(status_code=404, detail="Ride not found")
     return db_ride
 
 @router.put("/{ride_id}", response_model=schemas.Ride)
@@ -48,12 +133,17 @@ def delete_ride(ride_id: UUID, db: Session = Depends(get_db)):
     return None
 
 @router.post("/{ride_id}/complete", response_model=schemas.Ride)
-def complete_ride(ride_id: UUID, end_lat: float, end_lon: float, distance: float, cost: float, db: Session = Depends(get_db)):
+def complete_ride(ride_id: UUID, end_lat: float, end_lon: float, distance: float = Query(0, ge=0), db: Session = Depends(get_db)):
     try:
-        return crud.complete_ride(db=db, ride_id=ride_id, end_lat=end_lat, end_lon=end_lon, distance=distance, cost=cost)
+        db_ride = crud.complete_ride(db=db, ride_id=ride_id, end_lat=end_lat, end_lon=end_lon, distance=distance)
+    except crud.ConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         logger.error(f"Error completing ride: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Could not complete ride"
-        )
\ No newline at end of file
+        )
+    if db_ride is None:
+        raise HTTPException(status_code=404, detail="Ride not found")
+    return db_ride
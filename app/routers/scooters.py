@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Annotated, List, Optional
 from uuid import UUID
+from datetime import datetime
 import logging
 
 from app.database import get_db
-from app import crud, schemas
+from app.metrics import TimedRoute
+from app import crud, models, schemas
+from app.conditional import conditional_response
+from app.pagination import Limit, Skip
+from app.export import stream_export
+from app.serialization import FastJSONResponse
+from config.app_config import app_config
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/", response_model=schemas.Scooter, status_code=status.HTTP_201_CREATED)
 def create_scooter(scooter: schemas.ScooterCreate, db: Session = Depends(get_db)):
@@ -22,15 +29,98 @@ def create_scooter(scooter: schemas.ScooterCreate, db: Session = Depends(get_db)
         )
 
 @router.get("/", response_model=List[schemas.Scooter])
-def read_scooters(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_scooters(db, skip=skip, limit=limit)
+def read_scooters(
+    request: Request,
+    response: Response,
+    skip: Skip = 0,
+    limit: Limit = 100,
+    status_code: Optional[str] = Query(None, alias="status"),
+    db: Session = Depends(get_db),
+):
+    db_scooters = crud.get_scooters(db, skip=skip, limit=limit, status_code=status_code)
+    return conditional_response(request, response, db_scooters, schemas.Scooter)
+
+@router.get("/export")
+def export_scooters(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", description="ndjson, csv, arrow or msgpack; from Accept if omitted"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    return stream_export(models.Scooter, models.Scooter.created_datetime, fmt=fmt, columns=columns,
+                         date_from=date_from, date_to=date_to,
+                         accept=request.headers.get("accept"), accept_encoding=request.headers.get("accept-encoding"))
+
+@router.post("/bulk", response_model=schemas.BulkResult, status_code=status.HTTP_201_CREATED)
+def bulk_create_scooters(items: Annotated[List[schemas.ScooterCreate], Body(max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_create(db, models.Scooter, items)
+    except Exception as e:
+        logger.error(f"Error bulk creating scooter: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not create scooter"
+        )
+
+@router.patch("/bulk", response_model=schemas.BulkResult)
+def bulk_update_scooters(items: Annotated[List[schemas.ScooterBulkUpdate], Body(max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_update(db, models.Scooter, items)
+    except Exception as e:
+        logger.error(f"Error bulk updating scooter: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not update scooter"
+        )
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_scooters(ids: Annotated[List[UUID], Body(embed=True, max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_delete(db, models.Scooter, ids)
+    except Exception as e:
+        logger.error(f"Error bulk deleting scooter: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not delete scooter"
+        )
+
+@router.post("/telemetry", response_model=schemas.TelemetryAccepted, status_code=status.HTTP_202_ACCEPTED)
+def ingest_telemetry(reports: Annotated[List[schemas.TelemetryReport], Body(max_length=app_config.TELEMETRY_MAX_BATCH)]):
+    return crud.ingest_telemetry(reports)
+
+@router.get("/nearby", response_model=List[schemas.NearbyScooter])
+def read_nearby_scooters(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(300, gt=0, le=app_config.GEO_MAX_RADIUS_M, description="Radius in meters"),
+    status_code: Optional[str] = Query("available", alias="status"),
+    limit: int = Query(20, gt=0, le=100),
+    db: Session = Depends(get_db),
+):
+    return FastJSONResponse(content=crud.get_nearby_scooters(db, lat, lon, radius, status_code=status_code, limit=limit))
 
 @router.get("/{scooter_id}", response_model=schemas.Scooter)
-def read_scooter(scooter_id: UUID, db: Session = Depends(get_db)):
+def read_scooter(scooter_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_scooter = crud.get_scooter(db, scooter_id=scooter_id)
     if db_scooter is None:
         logger.warning(f"Scooter with id {scooter_id} not found")
         raise HTTPException(status_code=404, detail="Scooter not found")
+    return conditional_response(request, response, db_scooter, schemas.Scooter)
+
+@router.get("/{scooter_id}/details", response_model=schemas.ScooterWithDetails)
+def read_scooter_details(
+    scooter_id: UUID,
+    rides_skip: int = Query(0, ge=0),
+    rides_limit: int = Query(app_config.DETAILS_PAGE_SIZE, ge=1, le=app_config.DETAILS_MAX_PAGE_SIZE),
+    maintenance_skip: int = Query(0, ge=0),
+    maintenance_limit: int = Query(app_config.DETAILS_PAGE_SIZE, ge=1, le=app_config.DETAILS_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    db_scooter = crud.get_scooter_details(db, scooter_id=scooter_id, rides_skip=rides_skip, rides_limit=rides_limit,
+                                          maintenance_skip=maintenance_skip, maintenance_limit=maintenance_limit)
+    if db_scooter is None:
+        raise HTTPException(status_code=404, detail="Scooter not found")
     return db_scooter
 
 @router.put("/{scooter_id}", response_model=schemas.Scooter)
@@ -1,15 +1,19 @@
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 import logging
 
 from app.database import get_db
+from app.metrics import TimedRoute
 from app import crud, schemas
+from app.conditional import conditional_response
+from app.pagination import Limit, Skip
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.get("/", response_model=List[schemas.ScooterStatus])
-def read_scooter_statuses(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_scooter_statuses(db, skip=skip, limit=limit)
\ No newline at end of file
+def read_scooter_statuses(request: Request, response: Response, skip: Skip = 0, limit: Limit = 100, db: Session = Depends(get_db)):
+    db_statuses = crud.get_scooter_statuses(db, skip=skip, limit=limit)
+    return conditional_response(request, response, db_statuses, schemas.ScooterStatus)
\ No newline at end of file
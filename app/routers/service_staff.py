@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Annotated, List, Optional
 from uuid import UUID
+from datetime import datetime
 import logging
 
 from app.database import get_db
-from app import crud, schemas
+from app.metrics import TimedRoute
+from app import crud, models, schemas
+from app.conditional import conditional_response
+from app.pagination import Limit, Skip
+from app.export import stream_export
+from config.app_config import app_config
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/", response_model=schemas.ServiceStaff, status_code=status.HTTP_201_CREATED)
 def create_service_staff(staff: schemas.ServiceStaffCreate, db: Session = Depends(get_db)):
@@ -22,16 +28,74 @@ def create_service_staff(staff: schemas.ServiceStaffCreate, db: Session = Depend
         )
 
 @router.get("/", response_model=List[schemas.ServiceStaff])
-def read_service_staff(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_service_staff(db, skip=skip, limit=limit)
+def read_service_staff(request: Request, response: Response, skip: Skip = 0, limit: Limit = 100, db: Session = Depends(get_db)):
+    db_staff = crud.get_all_service_staff(db, skip=skip, limit=limit)
+    return conditional_response(request, response, db_staff, schemas.ServiceStaff)
+
+@router.get("/export")
+def export_service_staff(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", description="ndjson, csv, arrow or msgpack; from Accept if omitted"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    return stream_export(models.ServiceStaff, models.ServiceStaff.created_datetime, fmt=fmt, columns=columns,
+                         date_from=date_from, date_to=date_to,
+                         accept=request.headers.get("accept"), accept_encoding=request.headers.get("accept-encoding"))
+
+@router.post("/bulk", response_model=schemas.BulkResult, status_code=status.HTTP_201_CREATED)
+def bulk_create_service_staff(items: Annotated[List[schemas.ServiceStaffCreate], Body(max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_create(db, models.ServiceStaff, items)
+    except Exception as e:
+        logger.error(f"Error bulk creating service staff: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not create service staff"
+        )
+
+@router.patch("/bulk", response_model=schemas.BulkResult)
+def bulk_update_service_staff(items: Annotated[List[schemas.ServiceStaffBulkUpdate], Body(max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_update(db, models.ServiceStaff, items)
+    except Exception as e:
+        logger.error(f"Error bulk updating service staff: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not update service staff"
+        )
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_service_staff(ids: Annotated[List[UUID], Body(embed=True, max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_delete(db, models.ServiceStaff, ids)
+    except Exception as e:
+        logger.error(f"Error bulk deleting service staff: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not delete service staff"
+        )
 
 @router.get("/{staff_id}", response_model=schemas.ServiceStaff)
-def read_service_staff_member(staff_id: UUID, db: Session = Depends(get_db)):
+def read_service_staff_member(staff_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_staff = crud.get_service_staff(db, staff_id=staff_id)
     if db_staff is None:
         logger.warning(f"Service staff with id {staff_id} not found")
         raise HTTPException(status_code=404, detail="Service staff not found")
-    return db_staff
+    return conditional_response(request, response, db_staff, schemas.ServiceStaff)
+
+@router.get("/{staff_id}/details", response_model=schemas.ServiceStaffWithMaintenance)
+def read_service_staff_details(
+    staff_id: UUID,
+    maintenance_skip: int = Query(0, ge=0),
+    maintenance_limit: int = Query(app_config.DETAILS_PAGE_SIZE, ge=1, le=app_config.DETAILS_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    db_service_staff = crud.get_service_staff_details(db, staff_id=staff_id, maintenance_skip=maintenance_skip, maintenance_limit=maintenance_limit)
+    if db_service_staff is None:
+        raise HTTPException(status_code=404, detail="Service staff not found")
+    return db_service_staff
 
 @router.put("/{staff_id}", response_model=schemas.ServiceStaff)
 def update_service_staff(staff_id: UUID, staff: schemas.ServiceStaffUpdate, db: Session = Depends(get_db)):
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Annotated, List, Optional
 from uuid import UUID
+from datetime import datetime
 import logging
 
 from app.database import get_db
-from app import crud, schemas
+from app.metrics import TimedRoute
+from app import crud, models, schemas
+from app.conditional import conditional_response
+from app.pagination import Limit, Skip
+from app.export import stream_export
+from config.app_config import app_config
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/", response_model=schemas.Tariff, status_code=status.HTTP_201_CREATED)
 def create_tariff(tariff: schemas.TariffCreate, db: Session = Depends(get_db)):
@@ -22,15 +28,73 @@ def create_tariff(tariff: schemas.TariffCreate, db: Session = Depends(get_db)):
         )
 
 @router.get("/", response_model=List[schemas.Tariff])
-def read_tariffs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_tariffs(db, skip=skip, limit=limit)
+def read_tariffs(request: Request, response: Response, skip: Skip = 0, limit: Limit = 100, db: Session = Depends(get_db)):
+    db_tariffs = crud.get_tariffs(db, skip=skip, limit=limit)
+    return conditional_response(request, response, db_tariffs, schemas.Tariff)
+
+@router.get("/export")
+def export_tariffs(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", description="ndjson, csv, arrow or msgpack; from Accept if omitted"),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    return stream_export(models.Tariff, models.Tariff.created_datetime, fmt=fmt, columns=columns,
+                         date_from=date_from, date_to=date_to,
+                         accept=request.headers.get("accept"), accept_encoding=request.headers.get("accept-encoding"))
+
+@router.post("/bulk", response_model=schemas.BulkResult, status_code=status.HTTP_201_CREATED)
+def bulk_create_tariffs(items: Annotated[List[schemas.TariffCreate], Body(max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_create(db, models.Tariff, items)
+    except Exception as e:
+        logger.error(f"Error bulk creating tariff: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not create tariff"
+        )
+
+@router.patch("/bulk", response_model=schemas.BulkResult)
+def bulk_update_tariffs(items: Annotated[List[schemas.TariffBulkUpdate], Body(max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_update(db, models.Tariff, items)
+    except Exception as e:
+        logger.error(f"Error bulk updating tariff: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not update tariff"
+        )
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def bulk_delete_tariffs(ids: Annotated[List[UUID], Body(embed=True, max_length=app_config.BULK_MAX_ITEMS)], db: Session = Depends(get_db)):
+    try:
+        return crud.bulk_delete(db, models.Tariff, ids)
+    except Exception as e:
+        logger.error(f"Error bulk deleting tariff: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not delete tariff"
+        )
 
 @router.get("/{tariff_id}", response_model=schemas.Tariff)
-def read_tariff(tariff_id: UUID, db: Session = Depends(get_db)):
+def read_tariff(tariff_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_tariff = crud.get_tariff(db, tariff_id=tariff_id)
     if db_tariff is None:
         logger.warning(f"Tariff with id {tariff_id} not found")
         raise HTTPException(status_code=404, detail="Tariff not found")
+    return conditional_response(request, response, db_tariff, schemas.Tariff)
+
+@router.get("/{tariff_id}/details", response_model=schemas.TariffWithRides)
+def read_tariff_details(
+    tariff_id: UUID,
+    rides_skip: int = Query(0, ge=0),
+    rides_limit: int = Query(app_config.DETAILS_PAGE_SIZE, ge=1, le=app_config.DETAILS_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    db_tariff = crud.get_tariff_details(db, tariff_id=tariff_id, rides_skip=rides_skip, rides_limit=rides_limit)
+    if db_tariff is None:
+        raise HTTPException(status_code=404, detail="Tariff not found")
     return db_tariff
 
 @router.put("/{tariff_id}", response_model=schemas.Tariff)
@@ -0,0 +1,21 @@
+import logging
+from typing import List
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+
+def create_schema(bind: Engine):
+    """Create missing tables and indexes; existing ones are left untouched."""
+    models.Base.metadata.create_all(bind=bind)
+    logger.info("Schema is up to date: %s tables", len(models.Base.metadata.tables))
+
+
+def missing_tables(bind: Engine) -> List[str]:
+    # Один запрос к каталогу вместо проверки каждой таблицы
+    existing = set(inspect(bind).get_table_names())
+    return sorted(name for name in models.Base.metadata.tables if name not in existing)
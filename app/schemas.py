@@ -27,6 +27,9 @@ class UserUpdate(BaseModel):
     date_of_birth: Optional[date] = None
     rating: Optional[float] = None
 
+class UserBulkUpdate(UserUpdate):
+    user_id: UUID
+
 class User(UserBase):
     user_id: UUID
     registration_date: datetime
@@ -61,6 +64,9 @@ class ScooterUpdate(BaseModel):
     gps_longitude: Optional[float] = None
     status_code: Optional[str] = None
 
+class ScooterBulkUpdate(ScooterUpdate):
+    scooter_id: UUID
+
 class Scooter(ScooterBase):
     scooter_id: UUID
     created_datetime: datetime
@@ -68,6 +74,37 @@ class Scooter(ScooterBase):
     class Config:
         from_attributes = True
 
+class NearbyScooter(BaseModel):
+    scooter_id: UUID
+    gps_latitude: float
+    gps_longitude: float
+    status_code: str
+    current_battery: int
+    distance_m: float
+
+class TelemetryReport(BaseModel):
+    scooter_id: UUID
+    current_battery: Optional[int] = None
+    gps_latitude: Optional[float] = None
+    gps_longitude: Optional[float] = None
+    reported_at: Optional[datetime] = None
+
+    @validator('current_battery')
+    def validate_battery(cls, v):
+        if v is not None and not 0 <= v <= 100:
+            raise ValueError('Battery must be between 0 and 100')
+        return v
+
+    @validator('gps_longitude', always=True)
+    def validate_position(cls, v, values):
+        if (v is None) != (values.get('gps_latitude') is None):
+            raise ValueError('gps_latitude and gps_longitude must be reported together')
+        return v
+
+class TelemetryAccepted(BaseModel):
+    accepted: int
+    scooters: int
+
 # Scooter Status schemas
 class ScooterStatusBase(BaseModel):
     status_code: str
@@ -126,6 +163,9 @@ class TariffUpdate(BaseModel):
     rate_per_km: Optional[float] = None
     is_active: Optional[bool] = None
 
+class TariffBulkUpdate(TariffUpdate):
+    tariff_id: UUID
+
 class Tariff(TariffBase):
     tariff_id: UUID
     created_datetime: datetime
@@ -147,6 +187,9 @@ class ServiceStaffUpdate(BaseModel):
     last_name: Optional[str] = None
     phone_number: Optional[str] = None
 
+class ServiceStaffBulkUpdate(ServiceStaffUpdate):
+    staff_id: UUID
+
 class ServiceStaff(ServiceStaffBase):
     staff_id: UUID
     created_datetime: datetime
@@ -171,6 +214,9 @@ class RideUpdate(BaseModel):
     distance: Optional[float] = None
     ride_cost: Optional[float] = None
 
+class RideBulkUpdate(RideUpdate):
+    ride_id: UUID
+
 class Ride(RideBase):
     ride_id: UUID
     start_time: datetime
@@ -205,6 +251,9 @@ class PaymentUpdate(BaseModel):
     payment_method: Optional[str] = None
     status_code: Optional[str] = None
 
+class PaymentBulkUpdate(PaymentUpdate):
+    payment_id: UUID
+
 class Payment(PaymentBase):
     payment_id: UUID
     payment_date: datetime
@@ -231,6 +280,9 @@ class MaintenanceUpdate(BaseModel):
     description: Optional[str] = None
     status: Optional[str] = None
 
+class MaintenanceBulkUpdate(MaintenanceUpdate):
+    maintenance_id: UUID
+
 class Maintenance(MaintenanceBase):
     maintenance_id: UUID
     completed_date: Optional[date] = None
@@ -267,4 +319,49 @@ class MaintenanceWithDetails(Maintenance):
     staff: Optional[ServiceStaff] = None
 
 class ServiceStaffWithMaintenance(ServiceStaff):
-    maintenance_records: List[Maintenance] = []
\ No newline at end of file
+    maintenance_records: List[Maintenance] = []
+
+# Analytics rollups
+class DailyTariffStats(BaseModel):
+    stat_date: date
+    tariff_id: UUID
+    rides_count: int
+    revenue: float
+    distance: float
+    updated_datetime: datetime
+
+    class Config:
+        from_attributes = True
+
+class DailyScooterStats(BaseModel):
+    stat_date: date
+    scooter_id: UUID
+    rides_count: int
+    revenue: float
+    distance: float
+    updated_datetime: datetime
+
+    class Config:
+        from_attributes = True
+
+class DailyPaymentStatusStats(BaseModel):
+    stat_date: date
+    status_code: str
+    payments_count: int
+    amount: float
+    updated_datetime: datetime
+
+    class Config:
+        from_attributes = True
+
+class RollupRefreshResult(BaseModel):
+    days: int
+
+# Bulk operation schemas
+class BulkItemResult(BaseModel):
+    index: int
+    id: UUID
+    status: str
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
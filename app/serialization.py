@@ -0,0 +1,98 @@
+import json
+import typing
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import select
+
+try:
+    import orjson
+except ImportError:  # без orjson остаётся стандартный json
+    orjson = None
+
+
+# Представление на проводе для типов, которых нет в JSON; общее для JSON, NDJSON и MessagePack
+_WIRE_CONVERTERS = ((UUID, str), ((datetime, date), lambda value: value.isoformat()), (Decimal, float))
+
+
+def wire_converter(value: Any) -> Optional[Callable[[Any], Any]]:
+    """Function giving the wire form of ``value``'s type, or None for types the encoders handle natively."""
+    for kind, convert in _WIRE_CONVERTERS:
+        if isinstance(value, kind):
+            return convert
+    return None
+
+
+def json_default(value: Any):
+    convert = wire_converter(value)
+    if convert is None:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return convert(value)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that encodes with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=json_default)
+        return json.dumps(content, default=json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _converter(annotation) -> Optional[Callable[[Any], Any]]:
+    # Optional[X] -> X
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+        annotation = args[0]
+    if annotation is float:
+        return float
+    if annotation is bool:
+        return bool
+    return None
+
+
+class ProjectedRows(list):
+    """Row dicts of a list page that keep the raw column values and SQL types they were built from.
+
+    Columnar formats encode ``columns`` directly instead of walking the dicts.
+    """
+
+    def __init__(self, dicts: List[Dict[str, Any]], types: Dict[str, Any], columns: List[Sequence]):
+        super().__init__(dicts)
+        self.types = types
+        self.columns = columns
+
+
+class RowProjection:
+    """Columns of a model that a response schema exposes, plus per-column converters."""
+
+    def __init__(self, model, schema: Type[BaseModel]):
+        table_columns = model.__table__.columns
+        self.names: Tuple[str, ...] = tuple(name for name in schema.model_fields if name in table_columns)
+        self.columns = [getattr(model, name) for name in self.names]
+        self.types = {name: table_columns[name].type for name in self.names}
+        self.converters = [_converter(schema.model_fields[name].annotation) for name in self.names]
+
+    def to_columns(self, rows: Sequence) -> List[Sequence]:
+        # Транспонирование на уровне C: по кортежу значений на колонку
+        return list(zip(*rows)) if rows else [() for _ in self.names]
+
+    def select(self):
+        return select(*self.columns)
+
+    def to_dicts(self, rows: Sequence) -> ProjectedRows:
+        names = self.names
+        converted = [(name, convert) for name, convert in zip(names, self.converters) if convert is not None]
+        result = []
+        for row in rows:
+            item = dict(zip(names, row))
+            for name, convert in converted:
+                value = item[name]
+                if value is not None:
+                    item[name] = convert(value)
+            result.append(item)
+        return ProjectedRows(result, self.types, self.to_columns(rows))
@@ -0,0 +1,208 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.metrics import add_query_observer, current_stats
+from config.app_config import app_config
+
+logger = logging.getLogger(__name__)
+
+# Планы запрашиваются только для чтений: SHOWPLAN/EXPLAIN не должны трогать DML
+_EXPLAINABLE = ("select", "with")
+
+
+def redact(parameters, mode: str) -> Any:
+    """Parameters as they may appear in the log: full, type/length only, or nothing."""
+    if mode == "none" or parameters is None:
+        return None
+    if mode == "full":
+        return parameters
+    if isinstance(parameters, dict):
+        return {name: _redact_value(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(item, mode) if isinstance(item, (list, tuple, dict)) else _redact_value(item) for item in parameters]
+    return _redact_value(parameters)
+
+
+def _redact_value(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def _plan(dialect: str, cursor, statement: str, parameters) -> Optional[str]:
+    if dialect == "sqlite":
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+    if dialect == "postgresql":
+        cursor.execute("EXPLAIN " + statement, parameters)
+        return "\n".join(row[0] for row in cursor.fetchall())
+    if dialect == "mssql":
+        cursor.execute("SET SHOWPLAN_TEXT ON")
+        try:
+            cursor.execute(statement, parameters)
+            lines = []
+            while True:
+                lines.extend(str(row[0]) for row in cursor.fetchall())
+                if not cursor.nextset():
+                    break
+            return "\n".join(lines)
+        finally:
+            cursor.execute("SET SHOWPLAN_TEXT OFF")
+    return None
+
+
+class SlowQueryRecorder:
+    """Collects statements slower than ``SLOW_QUERY_THRESHOLD_MS``.
+
+    The engine hook only enqueues a record; a background thread captures the
+    plan on its own pooled connection, appends the JSONL line and updates the
+    per-statement totals behind the admin endpoint.
+    """
+
+    def __init__(self, threshold_ms: float, max_statements: int):
+        self.threshold_ms = threshold_ms
+        self.max_statements = max_statements
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._totals: Dict[str, Dict[str, Any]] = {}
+        self._plans: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._writer: Optional[logging.Logger] = None
+
+    def record(self, engine, statement: str, parameters, duration_ms: float, executemany: bool):
+        stats = current_stats()
+        self._queue.put({
+            # Движок у каждой записи свой: план снимается там же, где выполнялся запрос (основная база или реплика)
+            "engine": engine,
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration_ms, 2),
+            "statement": statement,
+            "parameters": parameters,
+            "executemany": executemany,
+            "route": f"{stats.method} {stats.route}" if stats is not None else None,
+        })
+        self.start()
+
+    def _writer_logger(self) -> logging.Logger:
+        if self._writer is None:
+            directory = os.path.dirname(app_config.SLOW_QUERY_LOG_FILE)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                app_config.SLOW_QUERY_LOG_FILE, maxBytes=app_config.LOG_MAX_BYTES,
+                backupCount=app_config.LOG_BACKUP_COUNT, encoding="utf-8", delay=True
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            writer = logging.getLogger(__name__ + ".file")
+            writer.propagate = False
+            writer.setLevel(logging.INFO)
+            writer.addHandler(handler)
+            self._writer = writer
+        return self._writer
+
+    def _capture_plan(self, entry: Dict[str, Any]) -> Optional[str]:
+        statement = entry["statement"]
+        if not app_config.SLOW_QUERY_EXPLAIN or entry["executemany"]:
+            return None
+        if not statement.lstrip().lower().startswith(_EXPLAINABLE):
+            return None
+        if statement in self._plans:
+            return self._plans[statement]
+        # Сырое DBAPI-соединение: события движка не срабатывают, EXPLAIN не попадёт в лог сам
+        engine = entry["engine"]
+        raw = engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            try:
+                plan = _plan(engine.dialect.name, cursor, statement, entry["parameters"])
+            finally:
+                cursor.close()
+            raw.rollback()
+        except Exception as e:
+            logger.warning("Could not capture plan for slow query: %s", e)
+            plan = None
+        finally:
+            raw.close()
+        if len(self._plans) < self.max_statements:
+            self._plans[statement] = plan
+        return plan
+
+    def _process(self, entry: Dict[str, Any]):
+        entry["plan"] = self._capture_plan(entry)
+        del entry["engine"]
+        raw_parameters = entry.pop("parameters")
+        entry["parameters"] = redact(raw_parameters, app_config.SLOW_QUERY_PARAMS)
+        self._writer_logger().info(json.dumps(entry, ensure_ascii=False, default=str))
+        with self._lock:
+            totals = self._totals.get(entry["statement"])
+            if totals is None:
+                if len(self._totals) >= self.max_statements:
+                    # Вытесняем запрос с наименьшим суммарным временем
+                    del self._totals[min(self._totals, key=lambda key: self._totals[key]["total_ms"])]
+                totals = self._totals[entry["statement"]] = {
+                    "statement": entry["statement"], "count": 0, "total_ms": 0.0, "max_ms": 0.0, "routes": {},
+                }
+            totals["count"] += 1
+            totals["total_ms"] += entry["duration_ms"]
+            totals["max_ms"] = max(totals["max_ms"], entry["duration_ms"])
+            totals["last_seen"] = entry["ts"]
+            if entry["route"]:
+                totals["routes"][entry["route"]] = totals["routes"].get(entry["route"], 0) + 1
+            if entry["plan"]:
+                totals["plan"] = entry["plan"]
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            try:
+                self._process(entry)
+            except Exception:
+                logger.exception("Slow query recorder error")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-query-recorder", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> List[Dict[str, Any]]:
+        with self._lock:
+            ranked = sorted(self._totals.values(), key=lambda item: item[order_by], reverse=True)[:limit]
+            return [
+                {**item, "avg_ms": round(item["total_ms"] / item["count"], 2), "total_ms": round(item["total_ms"], 2),
+                 "routes": dict(item["routes"])}
+                for item in ranked
+            ]
+
+
+slow_query_recorder = SlowQueryRecorder(app_config.SLOW_QUERY_THRESHOLD_MS, app_config.SLOW_QUERY_MAX_STATEMENTS)
+
+
+def _observe(conn, statement, parameters, seconds, executemany):
+    duration_ms = seconds * 1000
+    if app_config.SLOW_QUERY_ENABLED and duration_ms >= slow_query_recorder.threshold_ms:
+        slow_query_recorder.record(conn.engine, statement, parameters, duration_ms, executemany)
+
+
+add_query_observer(_observe)
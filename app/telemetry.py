@@ -0,0 +1,237 @@
+import atexit
+import logging
+import threading
+import time
+from datetime import timezone
+from functools import wraps
+from typing import Any, Dict, Iterable, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import bindparam
+
+from app import geo, models, schemas
+from app.cache import mark_rows
+from app.database import SessionLocal
+from config.app_config import app_config
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_FIELDS = ("current_battery", "gps_latitude", "gps_longitude")
+
+# scooter_id -> {поле: (время отчёта, время получения, значение)}
+Snapshot = Dict[UUID, Dict[str, Tuple[float, float, Any]]]
+
+
+def _report_time(report: schemas.TelemetryReport) -> float:
+    if report.reported_at is None:
+        return time.time()
+    reported_at = report.reported_at
+    if reported_at.tzinfo is None:
+        reported_at = reported_at.replace(tzinfo=timezone.utc)
+    return reported_at.timestamp()
+
+
+def _merge(target: Snapshot, source: Snapshot):
+    for scooter_id, fields in source.items():
+        current = target.setdefault(scooter_id, {})
+        for name, item in fields.items():
+            if name not in current or current[name][0] <= item[0]:
+                current[name] = item
+
+
+class TelemetryBuffer:
+    """Latest battery/GPS value per scooter, written to the database in batches.
+
+    Reports are collapsed field by field in memory and flushed every
+    ``TELEMETRY_FLUSH_SECONDS`` with set-based executemany UPDATEs. Until a value
+    is committed, reads see it through ``overlay``. A field written through the
+    API after a report was received is not overwritten by that report. At most
+    ``max_pending`` scooters are buffered; the oldest are dropped beyond that.
+    """
+
+    def __init__(self, flush_seconds: float, max_pending: int):
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._pending: Snapshot = {}
+        self._inflight: Snapshot = {}
+        # scooter_id -> {поле: время записи через API}
+        self._written: Dict[UUID, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, reports: List[schemas.TelemetryReport]) -> int:
+        incoming: Snapshot = {}
+        received = time.time()
+        for report in reports:
+            reported = _report_time(report)
+            values = report.dict(include=set(TELEMETRY_FIELDS), exclude_none=True)
+            fields = incoming.setdefault(report.scooter_id, {})
+            for name, value in values.items():
+                if name not in fields or fields[name][0] <= reported:
+                    fields[name] = (reported, received, value)
+        with self._lock:
+            _merge(self._pending, incoming)
+            dropped = self._trim()
+        if dropped:
+            logger.warning("Telemetry buffer is full, dropped %s oldest scooters", dropped)
+        self._update_index(incoming)
+        self.start()
+        return len(incoming)
+
+    def _trim(self) -> int:
+        # Под self._lock. Порядок ключей — порядок поступления, первыми уходят самые старые самокаты
+        excess = len(self._pending) - self.max_pending
+        for scooter_id in list(self._pending)[:max(excess, 0)]:
+            del self._pending[scooter_id]
+        return max(excess, 0)
+
+    def _is_current(self, scooter_id: UUID, name: str, item: Tuple[float, float, Any]) -> bool:
+        # Под self._lock: значение из отчёта, полученного до записи поля через API, устарело
+        written = self._written.get(scooter_id)
+        return written is None or written.get(name, 0) < item[1]
+
+    def note_write(self, scooter_ids: Iterable[UUID], names: Iterable[str]):
+        """Record that the API is writing telemetry fields of these scooters.
+
+        Called before the write is executed, so buffered values received
+        earlier are neither flushed over it nor shown by ``overlay``.
+        """
+        names = [name for name in names if name in TELEMETRY_FIELDS]
+        if not names:
+            return
+        now = time.time()
+        with self._lock:
+            for scooter_id in scooter_ids:
+                self._written.setdefault(scooter_id, {}).update(dict.fromkeys(names, now))
+                pending = self._pending.get(scooter_id)
+                if pending:
+                    for name in names:
+                        pending.pop(name, None)
+
+    def _update_index(self, snapshot: Snapshot):
+        if not geo.scooter_index.ready:
+            return
+        for scooter_id, fields in snapshot.items():
+            point = geo.scooter_index.get(scooter_id)
+            if point is None:
+                continue
+            changes = {name: item[2] for name, item in fields.items()}
+            geo.scooter_index.upsert(point._replace(**changes))
+
+    def buffered(self, scooter_id: UUID) -> Dict[str, Any]:
+        with self._lock:
+            fields = {name: item for name, item in self._inflight.get(scooter_id, {}).items()
+                      if self._is_current(scooter_id, name, item)}
+            for name, item in self._pending.get(scooter_id, {}).items():
+                if name not in fields or fields[name][0] <= item[0]:
+                    fields[name] = item
+        return {name: item[2] for name, item in fields.items()}
+
+    def overlay(self, scooter: Any) -> Any:
+        """Return ``scooter`` (schema object or row dict) with buffered values applied."""
+        if scooter is None or not (self._pending or self._inflight):
+            return scooter
+        if isinstance(scooter, dict):
+            changes = self.buffered(scooter["scooter_id"])
+            return {**scooter, **changes} if changes else scooter
+        changes = self.buffered(scooter.scooter_id)
+        if not changes:
+            return scooter
+        if not isinstance(scooter, schemas.Scooter):
+            scooter = schemas.Scooter.model_validate(scooter)
+        return scooter.model_copy(update=changes)
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                self._inflight, self._pending = self._pending, {}
+                snapshot = self._inflight
+                # Поля, записанные через API после получения отчёта, не трогаем
+                current = {scooter_id: {name: item for name, item in fields.items()
+                                        if self._is_current(scooter_id, name, item)}
+                           for scooter_id, fields in snapshot.items()}
+                swapped_at = time.time()
+            if not snapshot:
+                return 0
+            # Один executemany на каждый набор полей; неизвестные id просто не обновят ни одной строки
+            groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+            for scooter_id, fields in current.items():
+                if not fields:
+                    continue
+                params = {"b_" + name: item[2] for name, item in fields.items()}
+                params["b_scooter_id"] = scooter_id
+                groups.setdefault(tuple(sorted(fields)), []).append(params)
+            db = SessionLocal()
+            try:
+                table = models.Scooter.__table__
+                for names, params in groups.items():
+                    stmt = table.update().where(table.c.scooter_id == bindparam("b_scooter_id")).values(
+                        {name: bindparam("b_" + name) for name in names}
+                    )
+                    db.execute(stmt, params)
+                mark_rows(db, models.Scooter, snapshot.keys())
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Telemetry flush failed, keeping {len(snapshot)} scooters buffered: {str(e)}")
+                with self._lock:
+                    # Несохранённые значения старше новых: встают в начало и первыми уходят при переполнении
+                    _merge(snapshot, self._pending)
+                    self._pending, self._inflight = snapshot, {}
+                    dropped = self._trim()
+                if dropped:
+                    logger.warning("Telemetry buffer is full, dropped %s oldest scooters", dropped)
+                return 0
+            finally:
+                db.close()
+            with self._lock:
+                self._inflight = {}
+                # Отчёты, полученные после обмена буферов, новее всех записей до него
+                for scooter_id in list(self._written):
+                    fields = self._written[scooter_id]
+                    for name in [name for name, written in fields.items() if written < swapped_at]:
+                        del fields[name]
+                    if not fields:
+                        del self._written[scooter_id]
+            if geo.scooter_index.ready and any(geo.scooter_index.get(scooter_id) is None for scooter_id in snapshot):
+                geo.scooter_index.mark_stale()
+            logger.debug("Flushed telemetry for %s scooters", len(snapshot))
+            return len(snapshot)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Telemetry flusher error")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telemetry-flusher", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+
+telemetry_buffer = TelemetryBuffer(app_config.TELEMETRY_FLUSH_SECONDS, app_config.TELEMETRY_MAX_PENDING_SCOOTERS)
+
+
+def with_overlay(fn):
+    """Apply buffered telemetry to the scooter(s) returned by a crud getter."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        result = fn(*args, **kwargs)
+        if isinstance(result, list):
+            return [telemetry_buffer.overlay(item) for item in result]
+        return telemetry_buffer.overlay(result)
+
+    return wrapper
@@ -0,0 +1,87 @@
+"""Замер холодного старта воркера: от запуска интерпретатора до готовности (readiness).
+
+Каждый прогон — отдельный процесс: импорт main, lifespan и ожидание окончания прогрева.
+Если медиана превышает COLD_START_BUDGET_MS, скрипт завершается с кодом 1.
+Нужна база со схемой (python init_db.py).
+
+Запуск из корня репозитория:
+    python -m benchmarks.cold_start --runs 5
+"""
+import time
+
+CHILD_STARTED = time.perf_counter()
+
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+
+from config.app_config import app_config
+
+
+async def _until_ready(timeout: float) -> dict:
+    imported = time.perf_counter()
+    from main import app
+    from app.lifecycle import readiness
+
+    import_ms = (time.perf_counter() - imported) * 1000
+    async with app.router.lifespan_context(app):
+        deadline = time.perf_counter() + timeout
+        while not readiness.ready and time.perf_counter() < deadline:
+            await asyncio.sleep(0.005)
+        return {
+            "ready": readiness.ready,
+            "import_ms": round(import_ms, 1),
+            "warmup_ms": readiness.warmup_ms,
+            "in_process_ms": round((time.perf_counter() - CHILD_STARTED) * 1000, 1),
+            "error": readiness.error,
+        }
+
+
+def child(timeout: float):
+    print(json.dumps(asyncio.run(_until_ready(timeout))), flush=True)
+
+
+def measure(timeout: float) -> dict:
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "benchmarks.cold_start", "--child", "--timeout", str(timeout)],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    # Готовность фиксируется по первой строке ребёнка, а не по его завершению
+    total_ms = (time.perf_counter() - started) * 1000
+    process.wait()
+    if not line:
+        raise SystemExit("Worker process exited without reporting readiness")
+    return {**json.loads(line), "spawn_to_ready_ms": round(total_ms, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=10, help="seconds to wait for readiness")
+    parser.add_argument("--budget-ms", type=float, default=app_config.COLD_START_BUDGET_MS)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.timeout)
+
+    runs = []
+    for index in range(args.runs):
+        run = measure(args.timeout)
+        runs.append(run)
+        print(f"run {index + 1}: ready={run['ready']} total={run['spawn_to_ready_ms']} ms "
+              f"import={run['import_ms']} ms warmup={run['warmup_ms']} ms")
+        if not run["ready"]:
+            print(f"  not ready: {run['error']}")
+            sys.exit(1)
+    median = statistics.median(run["spawn_to_ready_ms"] for run in runs)
+    print(f"median {median:.1f} ms, max {max(run['spawn_to_ready_ms'] for run in runs):.1f} ms, "
+          f"budget {args.budget_ms:.0f} ms")
+    if median > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""Нагрузочный тест HTTP API: смешанные чтения и записи по всем роутерам.
+
+Сценарий выполняется при нескольких фиксированных уровнях конкурентности; для каждого
+эндпоинта считаются пропускная способность и задержки p50/p95/p99. Результаты пишутся
+в JSON-базу, с которой можно сравнить следующий прогон (--compare) и поймать регрессии.
+
+База заранее наполняется через benchmarks.seed. Без --base-url приложение поднимается
+в процессе (ASGI-транспорт, без сети), иначе запросы идут на запущенный сервер.
+
+Запуск из корня репозитория:
+    python -m benchmarks.load_test --concurrency 1,8,32 --duration 30 --output benchmarks/baseline.json
+    python -m benchmarks.load_test --compare benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.seed import CENTER
+
+# Ответы, которые для нагрузочного сценария считаются штатными
+EXPECTED = {200, 201, 202, 204, 304, 404, 409}
+POOL_SIZE = 500
+
+
+class Recorder:
+    """Latencies and error counts per endpoint label."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[int, int]] = {}
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[label] = self.errors.get(label, 0) + 1
+            return None
+        self.latencies.setdefault(label, []).append(time.perf_counter() - started)
+        counts = self.statuses.setdefault(label, {})
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+        if response.status_code not in EXPECTED:
+            self.errors[label] = self.errors.get(label, 0) + 1
+        return response
+
+
+def percentile(values: List[float], q: float) -> float:
+    # Ближайший ранг по отсортированной выборке
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))]
+
+
+class Pool:
+    """Identifiers of existing rows the workload picks from."""
+
+    def __init__(self):
+        self.ids: Dict[str, List[str]] = {}
+
+    async def fill(self, client: httpx.AsyncClient):
+        for name, path, key in (
+            ("users", "/api/users/", "user_id"),
+            ("scooters", "/api/scooters/", "scooter_id"),
+            ("tariffs", "/api/tariffs/", "tariff_id"),
+            ("staff", "/api/service-staff/", "staff_id"),
+            ("maintenance", "/api/maintenance/", "maintenance_id"),
+            ("rides", "/api/rides/", "ride_id"),
+            ("payments", "/api/payments/", "payment_id"),
+        ):
+            response = await client.get(path, params={"limit": POOL_SIZE})
+            response.raise_for_status()
+            self.ids[name] = [row[key] for row in response.json()]
+        empty = [name for name, ids in self.ids.items() if not ids]
+        if empty:
+            raise SystemExit(f"No rows for {', '.join(empty)}; seed the database first (python -m benchmarks.seed)")
+
+    def pick(self, name: str) -> str:
+        return random.choice(self.ids[name])
+
+
+def _recent_range() -> Dict[str, str]:
+    today = datetime.now(timezone.utc).date()
+    return {"date_from": (today - timedelta(days=29)).isoformat(), "date_to": today.isoformat()}
+
+
+def _time_window(days: int) -> Dict[str, str]:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    offset = random.randint(days, 300)
+    return {"start_time_from": (now - timedelta(days=offset)).isoformat(),
+            "start_time_to": (now - timedelta(days=offset - days)).isoformat()}
+
+
+# Сценарии: (вес, функция). Каждая функция делает один или несколько запросов через Recorder
+async def list_users(c, r, p):
+    await r.call(c, "GET /api/users/", "GET", "/api/users/", params={"limit": 50})
+
+
+async def get_user(c, r, p):
+    await r.call(c, "GET /api/users/{id}", "GET", f"/api/users/{p.pick('users')}")
+
+
+async def user_details(c, r, p):
+    await r.call(c, "GET /api/users/{id}/details", "GET", f"/api/users/{p.pick('users')}/details")
+
+
+async def user_lifecycle(c, r, p):
+    payload = {"phone_number": f"+9{uuid.uuid4().int % 10**12:012d}", "first_name": "Load", "last_name": "Test"}
+    response = await r.call(c, "POST /api/users/", "POST", "/api/users/", json=payload)
+    if response is None or response.status_code != 201:
+        return
+    user_id = response.json()["user_id"]
+    await r.call(c, "PUT /api/users/{id}", "PUT", f"/api/users/{user_id}", json={"first_name": "Updated"})
+    await r.call(c, "DELETE /api/users/{id}", "DELETE", f"/api/users/{user_id}")
+
+
+async def list_scooters(c, r, p):
+    await r.call(c, "GET /api/scooters/?status", "GET", "/api/scooters/", params={"status": "available", "limit": 50})
+
+
+async def scooter_details(c, r, p):
+    await r.call(c, "GET /api/scooters/{id}/details", "GET", f"/api/scooters/{p.pick('scooters')}/details")
+
+
+async def nearby_scooters(c, r, p):
+    params = {"lat": CENTER[0] + random.uniform(-0.05, 0.05), "lon": CENTER[1] + random.uniform(-0.08, 0.08), "radius": 500}
+    await r.call(c, "GET /api/scooters/nearby", "GET", "/api/scooters/nearby", params=params)
+
+
+async def telemetry(c, r, p):
+    reports = [
+        {"scooter_id": p.pick("scooters"), "current_battery": random.randint(5, 100),
+         "gps_latitude": CENTER[0] + random.uniform(-0.1, 0.1), "gps_longitude": CENTER[1] + random.uniform(-0.15, 0.15)}
+        for _ in range(20)
+    ]
+    await r.call(c, "POST /api/scooters/telemetry", "POST", "/api/scooters/telemetry", json=reports)
+
+
+async def list_tariffs(c, r, p):
+    await r.call(c, "GET /api/tariffs/", "GET", "/api/tariffs/")
+
+
+async def tariff_details(c, r, p):
+    await r.call(c, "GET /api/tariffs/{id}/details", "GET", f"/api/tariffs/{p.pick('tariffs')}/details")
+
+
+async def list_rides_by_user(c, r, p):
+    await r.call(c, "GET /api/rides/?user_id", "GET", "/api/rides/", params={"user_id": p.pick("users"), "limit": 20})
+
+
+async def list_rides_by_time(c, r, p):
+    await r.call(c, "GET /api/rides/?start_time", "GET", "/api/rides/", params={**_time_window(1), "limit": 100})
+
+
+async def ride_details(c, r, p):
+    await r.call(c, "GET /api/rides/{id}/details", "GET", f"/api/rides/{p.pick('rides')}/details")
+
+
+async def ride_lifecycle(c, r, p):
+    payload = {"user_id": p.pick("users"), "scooter_id": p.pick("scooters"), "tariff_id": p.pick("tariffs"),
+               "start_latitude": CENTER[0], "start_longitude": CENTER[1]}
+    response = await r.call(c, "POST /api/rides/start", "POST", "/api/rides/start", json=payload)
+    if response is None or response.status_code != 201:
+        return
+    params = {"end_lat": CENTER[0] + 0.01, "end_lon": CENTER[1] + 0.01, "distance": round(random.uniform(0.5, 5), 2)}
+    await r.call(c, "POST /api/rides/{id}/complete", "POST", f"/api/rides/{response.json()['ride_id']}/complete", params=params)
+
+
+async def list_payments(c, r, p):
+    await r.call(c, "GET /api/payments/?ride_id", "GET", "/api/payments/", params={"ride_id": p.pick("rides")})
+
+
+async def payment_details(c, r, p):
+    await r.call(c, "GET /api/payments/{id}/details", "GET", f"/api/payments/{p.pick('payments')}/details")
+
+
+async def list_maintenance(c, r, p):
+    await r.call(c, "GET /api/maintenance/?scooter_id", "GET", "/api/maintenance/", params={"scooter_id": p.pick("scooters")})
+
+
+async def maintenance_details(c, r, p):
+    await r.call(c, "GET /api/maintenance/{id}/details", "GET", f"/api/maintenance/{p.pick('maintenance')}/details")
+
+
+async def staff_details(c, r, p):
+    await r.call(c, "GET /api/service-staff/{id}/details", "GET", f"/api/service-staff/{p.pick('staff')}/details")
+
+
+async def dictionaries(c, r, p):
+    await r.call(c, "GET /api/scooters-statuses/", "GET", "/api/scooters-statuses/")
+    await r.call(c, "GET /api/payments-statuses/", "GET", "/api/payments-statuses/")
+
+
+async def analytics_tariffs(c, r, p):
+    await r.call(c, "GET /api/analytics/tariffs/daily", "GET", "/api/analytics/tariffs/daily", params=_recent_range())
+
+
+async def analytics_scooter(c, r, p):
+    params = {**_recent_range(), "scooter_id": p.pick("scooters")}
+    await r.call(c, "GET /api/analytics/scooters/daily", "GET", "/api/analytics/scooters/daily", params=params)
+
+
+async def analytics_payments(c, r, p):
+    await r.call(c, "GET /api/analytics/payments/daily", "GET", "/api/analytics/payments/daily", params=_recent_range())
+
+
+async def export_rides(c, r, p):
+    await r.call(c, "GET /api/rides/export", "GET", "/api/rides/export", params=_time_window(1))
+
+
+SCENARIOS = [
+    (10, list_users), (10, get_user), (4, user_details), (3, user_lifecycle),
+    (8, list_scooters), (3, scooter_details), (12, nearby_scooters), (6, telemetry),
+    (4, list_tariffs), (1, tariff_details),
+    (10, list_rides_by_user), (3, list_rides_by_time), (6, ride_details), (5, ride_lifecycle),
+    (4, list_payments), (3, payment_details),
+    (2, list_maintenance), (2, maintenance_details), (1, staff_details), (2, dictionaries),
+    (2, analytics_tariffs), (2, analytics_scooter), (2, analytics_payments), (1, export_rides),
+]
+
+
+async def _worker(client, recorder, pool, deadline: float):
+    weights = [weight for weight, _ in SCENARIOS]
+    scenarios = [scenario for _, scenario in SCENARIOS]
+    while time.perf_counter() < deadline:
+        scenario = random.choices(scenarios, weights=weights)[0]
+        await scenario(client, recorder, pool)
+
+
+async def run_level(client, pool, concurrency: int, duration: float, warmup: float) -> Dict[str, dict]:
+    if warmup > 0:
+        warm = time.perf_counter() + warmup
+        await asyncio.gather(*(_worker(client, Recorder(), pool, warm) for _ in range(concurrency)))
+    recorder = Recorder()
+    started = time.perf_counter()
+    await asyncio.gather(*(_worker(client, recorder, pool, started + duration) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for label in sorted(set(recorder.latencies) | set(recorder.errors)):
+        latencies = recorder.latencies.get(label, [])
+        endpoints[label] = {
+            "requests": len(latencies),
+            "errors": recorder.errors.get(label, 0),
+            "rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+            "statuses": {str(code): count for code, count in sorted(recorder.statuses.get(label, {}).items())},
+        }
+    every = [value for values in recorder.latencies.values() for value in values]
+    total = {
+        "requests": len(every),
+        "errors": sum(recorder.errors.values()),
+        "rps": round(len(every) / elapsed, 2),
+        "p50_ms": round(percentile(every, 0.50) * 1000, 2) if every else None,
+        "p95_ms": round(percentile(every, 0.95) * 1000, 2) if every else None,
+        "p99_ms": round(percentile(every, 0.99) * 1000, 2) if every else None,
+    }
+    return {"duration_s": round(elapsed, 2), "total": total, "endpoints": endpoints}
+
+
+@asynccontextmanager
+async def _client(base_url: Optional[str], timeout: float):
+    if base_url:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+            yield client
+        return
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            yield client
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _database() -> str:
+    from app.database import engine
+
+    return engine.url.render_as_string(hide_password=True)
+
+
+async def run(args) -> dict:
+    result = {
+        "meta": {
+            "commit": _git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "target": args.base_url or "in-process",
+            "database": None if args.base_url else _database(),
+            "duration_s": args.duration,
+            "seed": args.seed,
+        },
+        "levels": {},
+    }
+    async with _client(args.base_url, args.timeout) as client:
+        pool = Pool()
+        await pool.fill(client)
+        for concurrency in args.concurrency:
+            random.seed(args.seed + concurrency)
+            level = await run_level(client, pool, concurrency, args.duration, args.warmup)
+            result["levels"][str(concurrency)] = level
+            print_level(concurrency, level)
+    return result
+
+
+def print_level(concurrency: int, level: dict):
+    total = level["total"]
+    print(f"\nconcurrency={concurrency}: {total['requests']} requests, {total['rps']} req/s, "
+          f"p50={total['p50_ms']} p95={total['p95_ms']} p99={total['p99_ms']} ms, errors={total['errors']}")
+    print(f"{'endpoint':<42} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5}")
+    for label, row in level["endpoints"].items():
+        print(f"{label:<42} {row['rps']:>8} {row['p50_ms'] or '-':>8} {row['p95_ms'] or '-':>8} "
+              f"{row['p99_ms'] or '-':>8} {row['errors']:>5}")
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions of p95 latency and throughput beyond ``tolerance`` against the baseline."""
+    regressions = []
+    for concurrency, level in current["levels"].items():
+        base_level = baseline.get("levels", {}).get(concurrency)
+        if base_level is None:
+            continue
+        rows = {"TOTAL": (level["total"], base_level["total"])}
+        rows.update({label: (row, base_level["endpoints"][label])
+                     for label, row in level["endpoints"].items() if label in base_level["endpoints"]})
+        for label, (row, base) in rows.items():
+            if row["p95_ms"] and base["p95_ms"] and row["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(f"c={concurrency} {label}: p95 {base['p95_ms']} -> {row['p95_ms']} ms")
+            if base["rps"] and row["rps"] < base["rps"] * (1 - tolerance):
+                regressions.append(f"c={concurrency} {label}: {base['rps']} -> {row['rps']} req/s")
+            if row["errors"] > base["errors"]:
+                regressions.append(f"c={concurrency} {label}: errors {base['errors']} -> {row['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", help="running server, e.g. http://127.0.0.1:8000; in-process by default")
+    parser.add_argument("--concurrency", type=lambda value: [int(item) for item in value.split(",")], default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=30, help="seconds per concurrency level")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before each level")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\nRegressions over {args.tolerance:.0%}:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print("\nNo regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Проверка числа SQL-запросов на эндпоинт записи.
+
+Каждый сценарий выполняется через TestClient, запросы считаются слушателем
+before_cursor_execute. Если эндпоинт выходит за бюджет, скрипт завершается с кодом 1.
+Скрипт самодостаточен: база SQLite в памяти (схему создаёт прогрев приложения),
+справочники статусов заполняются здесь же, фоновые задачи отключены, чтобы их
+запросы не попадали в подсчёт. Годится для запуска в CI.
+
+Запуск из корня репозитория:
+    python -m benchmarks.query_budget
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from typing import List
+
+# До импорта приложения: своя база в памяти и никаких фоновых запросов во время замеров
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["ROLLUP_REFRESH_ENABLED"] = "false"
+os.environ["HEALTH_PROBE_SECONDS"] = "3600"
+os.environ["GEO_INDEX_REFRESH_SECONDS"] = "3600"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from main import app
+from app import models
+from app.database import SessionLocal, engine
+from app.lifecycle import readiness
+
+# Бюджеты: одна запись - один запрос (INSERT/UPDATE ... RETURNING, DELETE по ключу)
+WRITE_BUDGET = 1
+READY_TIMEOUT_SECONDS = 30
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements: List[str] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @contextmanager
+    def measure(self):
+        self.statements.clear()
+        yield self
+
+
+def wait_ready():
+    # Прогрев идёт в фоне lifespan: он создаёт схему и наполняет кэши, его запросы не считаем
+    deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+    while not readiness.ready:
+        if time.monotonic() > deadline:
+            print(f"Setup failed: app not ready after {READY_TIMEOUT_SECONDS} s: {readiness.error}")
+            sys.exit(1)
+        time.sleep(0.05)
+
+
+def seed_statuses():
+    db = SessionLocal()
+    try:
+        db.add_all([
+            models.Dictionary_ScooterStatus(status_code="available", status_name="Available"),
+            models.Dictionary_PaymentStatus(status_code="paid", status_name="Paid"),
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--verbose", action="store_true", help="print every counted statement")
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        wait_ready()
+        seed_statuses()
+        failures = run_checks(client, args.verbose)
+    if failures:
+        print(f"{len(failures)} endpoint(s) over budget: {', '.join(failures)}")
+        sys.exit(1)
+    print("All endpoints within budget")
+
+
+def run_checks(client: TestClient, verbose: bool) -> List[str]:
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    failures = []
+
+    def check(name: str, method: str, url: str, budget: int = WRITE_BUDGET, **kwargs):
+        with counter.measure():
+            response = client.request(method, url, **kwargs)
+        count = len(counter.statements)
+        verdict = "ok" if count <= budget else "OVER"
+        print(f"{verdict:>4} {name:<28} {response.status_code} {count} queries (budget {budget})")
+        if verbose:
+            for statement in counter.statements:
+                print("       ", " ".join(statement.split())[:160])
+        if count > budget:
+            failures.append(name)
+        return response
+
+    def create(name: str, url: str, **kwargs) -> dict:
+        # Без созданной строки следующие проверки не имеют смысла — прерываем прогон
+        response = check(name, "POST", url, **kwargs)
+        if response.status_code != 201:
+            print(f"Setup failed: {name} returned {response.status_code}: {response.text[:200]}")
+            sys.exit(1)
+        return response.json()
+
+    suffix = uuid.uuid4().hex[:8]
+    user = create("POST /api/users/", "/api/users/", json={
+        "phone_number": f"+7{suffix}", "first_name": "Query", "last_name": "Budget"
+    })
+    check("PUT /api/users/{id}", "PUT", f"/api/users/{user['user_id']}", json={"first_name": "Updated"})
+    check("PUT /api/users/{id} (missing)", "PUT", f"/api/users/{uuid.uuid4()}", json={"first_name": "x"})
+
+    scooter = create("POST /api/scooters/", "/api/scooters/", json={
+        "model": "budget", "manufacture_date": "2024-01-01", "current_battery": 80,
+        "gps_latitude": 55.75, "gps_longitude": 37.61, "status_code": "available", "qr_code": f"qb-{suffix}"
+    })
+    check("PUT /api/scooters/{id}", "PUT", f"/api/scooters/{scooter['scooter_id']}", json={"current_battery": 70})
+
+    tariff = create("POST /api/tariffs/", "/api/tariffs/", json={
+        "tariff_name": f"budget-{suffix}", "unlock_fee": 50, "rate_per_minute": 7.5, "rate_per_km": 10
+    })
+    check("PUT /api/tariffs/{id}", "PUT", f"/api/tariffs/{tariff['tariff_id']}", json={"unlock_fee": 40})
+
+    staff = create("POST /api/service-staff/", "/api/service-staff/", json={
+        "first_name": "Query", "last_name": "Budget", "phone_number": f"+7{suffix}"
+    })
+    maintenance = create("POST /api/maintenance/", "/api/maintenance/", json={
+        "maintenance_type": "check", "scheduled_date": "2024-01-01",
+        "scooter_id": scooter["scooter_id"], "staff_id": staff["staff_id"]
+    })
+    check("PUT /api/maintenance/{id}", "PUT", f"/api/maintenance/{maintenance['maintenance_id']}",
+          json={"description": "updated"})
+
+    ride = create("POST /api/rides/", "/api/rides/", json={
+        "start_latitude": 55.75, "start_longitude": 37.61, "user_id": user["user_id"],
+        "scooter_id": scooter["scooter_id"], "tariff_id": tariff["tariff_id"]
+    })
+    payment = create("POST /api/payments/", "/api/payments/", json={
+        "amount": 100, "payment_method": "card", "status_code": "paid", "ride_id": ride["ride_id"]
+    })
+    check("PUT /api/payments/{id}", "PUT", f"/api/payments/{payment['payment_id']}", json={"amount": 90})
+    check("DELETE /api/payments/{id}", "DELETE", f"/api/payments/{payment['payment_id']}")
+
+    check("DELETE /api/maintenance/{id}", "DELETE", f"/api/maintenance/{maintenance['maintenance_id']}")
+    check("DELETE /api/rides/{id}", "DELETE", f"/api/rides/{ride['ride_id']}")
+    check("DELETE /api/service-staff/{id}", "DELETE", f"/api/service-staff/{staff['staff_id']}")
+    check("DELETE /api/tariffs/{id}", "DELETE", f"/api/tariffs/{tariff['tariff_id']}")
+    check("DELETE /api/scooters/{id}", "DELETE", f"/api/scooters/{scooter['scooter_id']}")
+    check("DELETE /api/users/{id}", "DELETE", f"/api/users/{user['user_id']}")
+    check("DELETE /api/users/{id} (missing)", "DELETE", f"/api/users/{uuid.uuid4()}")
+
+    event.remove(engine, "before_cursor_execute", counter)
+    return failures
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Наполнение базы для нагрузочного теста: пользователи, самокаты, тарифы, поездки и платежи.
+
+База берётся из DATABASE_URL (SQLite или PostgreSQL); схема создаётся, если её нет.
+
+Запуск из корня репозитория:
+    python -m benchmarks.seed --users 100000 --scooters 5000 --rides 2000000
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Iterator, List
+
+from sqlalchemy import insert
+
+from app import analytics, models
+from app.database import SessionLocal, engine
+from app.dialects import new_id
+
+CENTER = (55.7558, 37.6173)
+SCOOTER_STATUSES = {"available": 0.8, "in_use": 0.15, "maintenance": 0.05}
+# Те же коды, что принимает ETL (app/etl/validators.py)
+PAYMENT_STATUSES = {"paid": 0.88, "failed": 0.06, "pending": 0.03, "refunded": 0.03}
+
+
+def _weighted(rng: random.Random, weights: Dict[str, float]) -> str:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _batched(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load(model, rows: Iterator[dict], batch_size: int) -> int:
+    """Insert ``rows`` with one executemany per batch, committing after each."""
+    started = time.perf_counter()
+    total = 0
+    stmt = insert(model.__table__)
+    for batch in _batched(rows, batch_size):
+        with engine.begin() as conn:
+            conn.execute(stmt, batch)
+        total += len(batch)
+        print(f"\r{model.__tablename__}: {total}", end="", flush=True)
+    print(f"\r{model.__tablename__}: {total} rows in {time.perf_counter() - started:.1f} s")
+    return total
+
+
+def seed(args) -> Dict[str, int]:
+    rng = random.Random(args.seed)
+    models.Base.metadata.create_all(bind=engine)
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    db = SessionLocal()
+    try:
+        for code in SCOOTER_STATUSES:
+            db.merge(models.Dictionary_ScooterStatus(status_code=code, status_name=code.replace("_", " ").title()))
+        for code in PAYMENT_STATUSES:
+            db.merge(models.Dictionary_PaymentStatus(status_code=code, status_name=code.title()))
+        db.commit()
+    finally:
+        db.close()
+
+    run = uuid.uuid4().hex[:6]
+    # Ключи известны до вставки и растут вместе со временем, как у строк из API
+    dialect = engine.dialect.name
+
+    def new_key():
+        return new_id(dialect)
+
+    user_ids = [new_key() for _ in range(args.users)]
+    scooter_ids = [new_key() for _ in range(args.scooters)]
+    staff_ids = [new_key() for _ in range(args.staff)]
+    tariffs = [
+        {"tariff_id": new_key(), "tariff_name": f"Tariff {run}-{i}", "unlock_fee": Decimal(rng.choice(["0", "30", "50"])),
+         "rate_per_minute": Decimal(rng.choice(["5.49", "7.99", "9.49"])), "rate_per_km": Decimal("0"), "is_active": True}
+        for i in range(args.tariffs)
+    ]
+
+    def users():
+        for i, user_id in enumerate(user_ids):
+            yield {"user_id": user_id, "phone_number": f"+7{run[:3]}{i:08d}"[:15], "first_name": f"User{i}",
+                   "last_name": "Load", "registration_date": now - timedelta(days=rng.randint(0, args.days))}
+
+    def scooters():
+        for i, scooter_id in enumerate(scooter_ids):
+            yield {"scooter_id": scooter_id, "model": rng.choice(["Ninebot Max", "Xiaomi 4 Pro", "Kugoo S3"]),
+                   "manufacture_date": date(2022, 1, 1) + timedelta(days=rng.randint(0, 700)),
+                   "current_battery": rng.randint(5, 100),
+                   "gps_latitude": round(CENTER[0] + rng.uniform(-0.1, 0.1), 6),
+                   "gps_longitude": round(CENTER[1] + rng.uniform(-0.15, 0.15), 6),
+                   "status_code": _weighted(rng, SCOOTER_STATUSES), "qr_code": f"QR-{run}-{i:08d}"}
+
+    def staff():
+        for i, staff_id in enumerate(staff_ids):
+            yield {"staff_id": staff_id, "first_name": f"Tech{i}", "last_name": "Load", "phone_number": f"+7{i:010d}"}
+
+    def maintenances():
+        for _ in range(args.scooters // 5):
+            scheduled = (now - timedelta(days=rng.randint(0, args.days))).date()
+            done = rng.random() < 0.8
+            yield {"maintenance_id": new_key(), "maintenance_type": rng.choice(["battery", "brakes", "inspection"]),
+                   "scheduled_date": scheduled, "completed_date": scheduled + timedelta(days=1) if done else None,
+                   "status": "completed" if done else "scheduled", "scooter_id": rng.choice(scooter_ids),
+                   "staff_id": rng.choice(staff_ids)}
+
+    payments: List[dict] = []
+
+    def rides():
+        window = args.days * 86400
+        for _ in range(args.rides):
+            tariff = rng.choice(tariffs)
+            start = now - timedelta(seconds=rng.randint(3600, window))
+            minutes = rng.randint(2, 40)
+            distance = Decimal(str(round(minutes * rng.uniform(0.1, 0.3), 2)))
+            cost = tariff["unlock_fee"] + tariff["rate_per_minute"] * minutes
+            ride_id = new_key()
+            yield {"ride_id": ride_id, "start_time": start, "end_time": start + timedelta(minutes=minutes),
+                   "start_latitude": CENTER[0], "start_longitude": CENTER[1],
+                   "end_latitude": CENTER[0], "end_longitude": CENTER[1], "distance": distance, "ride_cost": cost,
+                   "user_id": rng.choice(user_ids), "scooter_id": rng.choice(scooter_ids), "tariff_id": tariff["tariff_id"],
+                   "created_datetime": start}
+            if rng.random() < args.paid_share:
+                payments.append({"payment_id": new_key(), "amount": cost, "payment_method": rng.choice(["card", "sbp"]),
+                                 "status_code": _weighted(rng, PAYMENT_STATUSES), "ride_id": ride_id,
+                                 "payment_date": start + timedelta(minutes=minutes)})
+
+    def drain_payments():
+        # Платежи пишутся вслед за своими поездками, чтобы не держать их все в памяти
+        while payments:
+            yield payments.pop()
+
+    counts = {
+        "users": load(models.User, users(), args.batch_size),
+        "scooters": load(models.Scooter, scooters(), args.batch_size),
+        "tariffs": load(models.Tariff, iter(tariffs), args.batch_size),
+        "service_staff": load(models.ServiceStaff, staff(), args.batch_size),
+        "maintenance": load(models.Maintenance, maintenances(), args.batch_size),
+        "rides": 0,
+        "payments": 0,
+    }
+    for batch in _batched(rides(), args.batch_size * 10):
+        counts["rides"] += load(models.Ride, iter(batch), args.batch_size)
+        counts["payments"] += load(models.Payment, drain_payments(), args.batch_size)
+
+    if not args.skip_rollups:
+        started = time.perf_counter()
+        days = analytics.rollup_refresher.refresh()
+        print(f"rollups: {days} days in {time.perf_counter() - started:.1f} s")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--scooters", type=int, default=2000)
+    parser.add_argument("--tariffs", type=int, default=5)
+    parser.add_argument("--staff", type=int, default=50)
+    parser.add_argument("--rides", type=int, default=1000000)
+    parser.add_argument("--paid-share", type=float, default=0.95, help="share of rides with a payment")
+    parser.add_argument("--days", type=int, default=365, help="history depth")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-rollups", action="store_true")
+    args = parser.parse_args()
+    print(seed(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Сравнение сериализации страницы списка: ORM + Pydantic + json против проекции строк + orjson.
+
+Если установлены pyarrow, msgpack и brotli, сравниваются и двоичные форматы со сжатием:
+время кодирования на сервере и разбора в DataFrame на клиенте.
+
+Запуск из корня репозитория:
+    python -m benchmarks.serialization --rows 1000 --repeat 50
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from pydantic import TypeAdapter
+
+from app import formats, models, schemas
+from app.serialization import FastJSONResponse, RowProjection
+
+
+def make_rides(count: int) -> List[models.Ride]:
+    start = datetime(2024, 1, 1)
+    rides = []
+    for i in range(count):
+        rides.append(models.Ride(
+            ride_id=uuid.uuid4(),
+            start_time=start + timedelta(minutes=i),
+            end_time=start + timedelta(minutes=i + 12),
+            start_latitude=Decimal("55.75582600"),
+            start_longitude=Decimal("37.61729900"),
+            end_latitude=Decimal("55.76000000"),
+            end_longitude=Decimal("37.62000000"),
+            distance=Decimal("2.35"),
+            ride_cost=Decimal("134.50"),
+            user_id=uuid.uuid4(),
+            scooter_id=uuid.uuid4(),
+            tariff_id=uuid.uuid4(),
+            created_datetime=start + timedelta(minutes=i),
+        ))
+    return rides
+
+
+def current_path(rides, adapter) -> bytes:
+    # То, что делает FastAPI для response_model=List[schemas.Ride]
+    validated = adapter.validate_python(rides, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def projected_path(rows, projection) -> bytes:
+    return FastJSONResponse(content=projection.to_dicts(rows)).body
+
+
+def columnar_path(rows, projection, fmt: str) -> bytes:
+    # Как в encode_list: колонки прямо из строк результата, с типами SQL
+    return formats.encode_columns(fmt, projection.types, projection.to_columns(rows))
+
+
+def parse_path(fmt: str, body: bytes):
+    import pandas
+
+    if fmt == formats.ARROW:
+        import pyarrow
+
+        return pyarrow.ipc.open_stream(body).read_pandas()
+    if fmt == formats.MSGPACK:
+        import msgpack
+
+        return pandas.DataFrame(msgpack.unpackb(body))
+    return pandas.DataFrame(json.loads(body))
+
+
+def measure(fn, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rides = make_rides(args.rows)
+    projection = RowProjection(models.Ride, schemas.Ride)
+    # Строки в том виде, в каком их возвращает select(*columns)
+    rows = [tuple(getattr(ride, name) for name in projection.names) for ride in rides]
+    adapter = TypeAdapter(List[schemas.Ride])
+
+    results = {
+        "orm+pydantic+json": measure(lambda: current_path(rides, adapter), args.repeat),
+        "rows+orjson": measure(lambda: projected_path(rows, projection), args.repeat),
+    }
+    bodies = {formats.JSON: projected_path(rows, projection)}
+    for fmt in (formats.ARROW, formats.MSGPACK):
+        if formats.available(fmt):
+            results[f"rows+{fmt}"] = measure(lambda: columnar_path(rows, projection, fmt), args.repeat)
+            bodies[fmt] = columnar_path(rows, projection, fmt)
+    for encoding in ("gzip", "br"):
+        if formats.choose_encoding(encoding) == encoding:
+            results[f"rows+orjson+{encoding}"] = measure(
+                lambda: formats.compress(projected_path(rows, projection), encoding), args.repeat)
+    report(f"Server encode, {args.rows} rows, {args.repeat} runs", results, "orm+pydantic+json")
+
+    sizes = {fmt: len(body) for fmt, body in bodies.items()}
+    sizes.update({f"json+{encoding}": len(formats.compress(bodies[formats.JSON], encoding))
+                  for encoding in ("gzip", "br") if formats.choose_encoding(encoding) == encoding})
+    print("Body size: " + ", ".join(f"{name} {size / 1024:.1f} KiB" for name, size in sizes.items()))
+
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        return
+    parsing = {f"{fmt} -> DataFrame": measure(lambda: parse_path(fmt, body), args.repeat) for fmt, body in bodies.items()}
+    report("Client parse", parsing, "json -> DataFrame")
+
+
+def report(title: str, results, baseline_name: str):
+    baseline = statistics.median(results[baseline_name])
+    print(title)
+    for name, timings in results.items():
+        median = statistics.median(timings)
+        print(f"{name:>22}: median {median:8.2f} ms, p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:8.2f} ms, "
+              f"x{baseline / median:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass
+class AppConfig:
+    # Кэш ответов
+    CACHE_ENABLED: bool = _env_bool("CACHE_ENABLED", True)
+    CACHE_MAX_SIZE: int = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+    CACHE_TTL_SECONDS: float = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+    # Общий кэш для нескольких воркеров (redis://host:port/db), иначе — кэш в памяти процесса
+    CACHE_REDIS_URL: Optional[str] = os.getenv("CACHE_REDIS_URL")
+
+    # Потоковая выгрузка
+    EXPORT_CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+    # Пакетные операции
+    BULK_MAX_ITEMS: int = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+
+    # Списки: предельный размер страницы и глубина пагинации без фильтров
+    LIST_MAX_LIMIT: int = int(os.getenv("LIST_MAX_LIMIT", "1000"))
+    LIST_MAX_UNFILTERED_OFFSET: int = int(os.getenv("LIST_MAX_UNFILTERED_OFFSET", "10000"))
+
+    # Детальные представления: размер страницы вложенных коллекций
+    DETAILS_PAGE_SIZE: int = int(os.getenv("DETAILS_PAGE_SIZE", "20"))
+    DETAILS_MAX_PAGE_SIZE: int = int(os.getenv("DETAILS_MAX_PAGE_SIZE", "100"))
+
+    # Логирование
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FILE: str = os.getenv("LOG_FILE", "logs/api.log")
+    # size — по размеру файла, time — по времени (LOG_ROTATION_WHEN)
+    LOG_ROTATION: str = os.getenv("LOG_ROTATION", "size")
+    LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_ROTATION_WHEN: str = os.getenv("LOG_ROTATION_WHEN", "midnight")
+    LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    # Доля записей ниже WARNING, которая проходит для шумных логгеров: "logger=rate,..."
+    LOG_SAMPLING: str = os.getenv("LOG_SAMPLING", "app.crud.reads=0.01")
+
+    # Поиск самокатов рядом
+    GEO_INDEX_ENABLED: bool = _env_bool("GEO_INDEX_ENABLED", True)
+    # ~0.005° ≈ 550 м по широте
+    GEO_CELL_DEGREES: float = float(os.getenv("GEO_CELL_DEGREES", "0.005"))
+    GEO_INDEX_REFRESH_SECONDS: float = float(os.getenv("GEO_INDEX_REFRESH_SECONDS", "60"))
+    GEO_MAX_RADIUS_M: float = float(os.getenv("GEO_MAX_RADIUS_M", "5000"))
+
+    # Телеметрия самокатов
+    TELEMETRY_FLUSH_SECONDS: float = float(os.getenv("TELEMETRY_FLUSH_SECONDS", "2"))
+    TELEMETRY_MAX_BATCH: int = int(os.getenv("TELEMETRY_MAX_BATCH", "5000"))
+    # Сколько самокатов держит буфер, пока база недоступна; сверх этого отбрасываются самые старые
+    TELEMETRY_MAX_PENDING_SCOOTERS: int = int(os.getenv("TELEMETRY_MAX_PENDING_SCOOTERS", "100000"))
+
+    # Агрегаты для аналитики
+    ROLLUP_REFRESH_ENABLED: bool = _env_bool("ROLLUP_REFRESH_ENABLED", True)
+    ROLLUP_REFRESH_SECONDS: float = float(os.getenv("ROLLUP_REFRESH_SECONDS", "10"))
+    ROLLUP_WATERMARK_LAG_SECONDS: float = float(os.getenv("ROLLUP_WATERMARK_LAG_SECONDS", "300"))
+    ANALYTICS_MAX_DAYS: int = int(os.getenv("ANALYTICS_MAX_DAYS", "366"))
+
+    # Контроль нагрузки: группа=лимит одновременных запросов:длина очереди на весь сервер;
+    # при нескольких воркерах serve.py каждый получает свою долю (см. SERVER_WORKERS)
+    ADMISSION_ENABLED: bool = _env_bool("ADMISSION_ENABLED", True)
+    ADMISSION_GROUPS: str = os.getenv("ADMISSION_GROUPS", "reads=12:48,writes=4:16,bulk=1:2,export=2:4")
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "2"))
+    ADMISSION_RETRY_AFTER_SECONDS: int = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+    # Потоки для sync-маршрутов; 0 — по размеру пула соединений (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    WORKER_THREADS: int = int(os.getenv("WORKER_THREADS", "0"))
+
+    # Метрики: /metrics в формате Prometheus и заголовок Server-Timing
+    METRICS_ENABLED: bool = _env_bool("METRICS_ENABLED", True)
+    SERVER_TIMING_ENABLED: bool = _env_bool("SERVER_TIMING_ENABLED", True)
+
+    # Журнал медленных запросов
+    SLOW_QUERY_ENABLED: bool = _env_bool("SLOW_QUERY_ENABLED", True)
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    SLOW_QUERY_LOG_FILE: str = os.getenv("SLOW_QUERY_LOG_FILE", "logs/slow_queries.jsonl")
+    # redact — только тип и длина значений, none — без параметров, full — как есть
+    SLOW_QUERY_PARAMS: str = os.getenv("SLOW_QUERY_PARAMS", "redact")
+    # План выполнения (SHOWPLAN_TEXT / EXPLAIN QUERY PLAN / EXPLAIN) — один раз на текст запроса
+    SLOW_QUERY_EXPLAIN: bool = _env_bool("SLOW_QUERY_EXPLAIN", False)
+    SLOW_QUERY_MAX_STATEMENTS: int = int(os.getenv("SLOW_QUERY_MAX_STATEMENTS", "500"))
+
+    # Сжатие ответов (gzip/br) и двоичные форматы (Arrow IPC, MessagePack) по Accept
+    RESPONSE_COMPRESSION_MIN_BYTES: int = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+    RESPONSE_GZIP_LEVEL: int = int(os.getenv("RESPONSE_GZIP_LEVEL", "5"))
+    RESPONSE_BROTLI_QUALITY: int = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+
+    # Запуск: схема создаётся отдельной командой (python init_db.py), при старте — только прогрев
+    STARTUP_WARMUP_CONNECTIONS: int = int(os.getenv("STARTUP_WARMUP_CONNECTIONS", "2"))
+    STARTUP_WARM_CACHES: bool = _env_bool("STARTUP_WARM_CACHES", True)
+    STARTUP_RETRY_SECONDS: float = float(os.getenv("STARTUP_RETRY_SECONDS", "2"))
+    # Бюджет холодного старта (импорт + прогрев) для benchmarks.cold_start
+    COLD_START_BUDGET_MS: float = float(os.getenv("COLD_START_BUDGET_MS", "1000"))
+
+    # Продакшен-сервер (python serve.py)
+    SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
+    # 0 — по числу доступных процессу ядер; serve.py передаёт итоговое число воркерам через окружение
+    SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", os.getenv("WEB_CONCURRENCY", "0")))
+    SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", "2048"))
+    # Дольше простоя балансировщика (обычно 60 с), чтобы соединение закрывал он, а не мы
+    SERVER_KEEPALIVE_SECONDS: int = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "75"))
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = int(os.getenv("SERVER_GRACEFUL_SHUTDOWN_SECONDS", "30"))
+    SERVER_ACCESS_LOG: bool = _env_bool("SERVER_ACCESS_LOG", False)
+    SERVER_FORWARDED_ALLOW_IPS: str = os.getenv("SERVER_FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+    # Фоновая проверка здоровья: /health отдаёт последний результат без запросов к базе
+    HEALTH_PROBE_SECONDS: float = float(os.getenv("HEALTH_PROBE_SECONDS", "5"))
+    # Результат старше этого считается недостоверным (проверка зависла)
+    HEALTH_STALE_SECONDS: float = float(os.getenv("HEALTH_STALE_SECONDS", "30"))
+
+    # Архив поездок и платежей (python run_archive.py): закрытые месяцы, кроме последних ARCHIVE_HOT_MONTHS
+    ARCHIVE_HOT_MONTHS: int = int(os.getenv("ARCHIVE_HOT_MONTHS", "3"))
+    # Поездок за транзакцию; IN-список должен укладываться в 2100 параметров SQL Server
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+    # Сколько воркеры доверяют прочитанной границе архива; задание ждёт столько же перед переносом
+    ARCHIVE_WATERMARK_TTL_SECONDS: float = float(os.getenv("ARCHIVE_WATERMARK_TTL_SECONDS", "30"))
+
+
+# Глобальная конфигурация
+app_config = AppConfig()
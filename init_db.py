@@ -0,0 +1,26 @@
+import argparse
+import logging
+import sys
+
+from app.logging_config import setup_logging
+from app.database import engine
+from app.schema import create_schema, missing_tables
+
+setup_logging()
+logger = logging.getLogger("mt-surent-schema")
+
+def main():
+    parser = argparse.ArgumentParser(description="Create or check the database schema")
+    parser.add_argument("--check", action="store_true", help="only report missing tables; exit 1 if any")
+    args = parser.parse_args()
+    if args.check:
+        missing = missing_tables(engine)
+        if missing:
+            logger.error(f"Missing tables: {', '.join(missing)}")
+            sys.exit(1)
+        logger.info("Schema is complete")
+        return
+    create_schema(engine)
+
+if __name__ == "__main__":
+    main()
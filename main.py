@@ -1,36 +1,47 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, UploadFile, File, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse, PlainTextResponse
 import logging
-import uvicorn
 import os
 import uuid
 from typing import Dict, Any
 
-from app.database import engine, get_db, SessionLocal
-from app import models
+from app.logging_config import setup_logging
+from config.app_config import app_config
+from app import cache
+from app.admission import AdmissionMiddleware, admission_info, route_groups
+from app.health import health_prober
+from app.lifecycle import lifespan, readiness
+from app.metrics import MetricsMiddleware, registry, render_family
+from app.slow_queries import slow_query_recorder
 from app.routers import (
     users, rides, tariffs, service_staff,
     scooters_statuses, scooters, payments,
-    payments_statuses, maintenance
+    payments_statuses, maintenance, analytics
 )
 
 
 # Настройка логгера для main.py
+setup_logging()
 logger = logging.getLogger(__name__)
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
-
 # Create FastAPI app
 app = FastAPI(
     title="MTS Urent API",
     description="REST API for MTS Urent",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
-# CORS middleware
+# Ограничение одновременных запросов по группам маршрутов
+if app_config.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, groups=route_groups)
+
+# Метрики снаружи контроля нагрузки: учитывают и ожидание в очереди, и отказы
+if app_config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# CORS снаружи всех остальных: заголовки получают и отказы 503/429, предзапросы OPTIONS отвечаются сразу
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -49,6 +60,7 @@ app.include_router(maintenance.router, prefix="/api/maintenance", tags=["mainten
 app.include_router(payments.router, prefix="/api/payments", tags=["payments"])
 app.include_router(scooters_statuses.router, prefix="/api/scooters-statuses", tags=["scooters-statuses"])
 app.include_router(payments_statuses.router, prefix="/api/payments-statuses", tags=["payments-statuses"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
 
 
 # Root endpoint
@@ -62,24 +74,66 @@ async def root():
     }
 
 
-# Health check endpoint
+# Health check endpoint: последний результат фоновой проверки, без обращения к базе
 @app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
-    try:
-        # Try to execute a simple query to check database connection
-        db.execute(text('SELECT 1'))
-        return {
-            "status": "healthy",
-            "database": "connected"
-        }
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        raise HTTPException(status_code=503, detail="Database connection failed")
+async def health_check():
+    snapshot = health_prober.snapshot()
+    status_code = 503 if snapshot["status"] in ("starting", "unhealthy") else 200
+    return JSONResponse(status_code=status_code, content=snapshot)
+
+
+# Liveness: процесс жив и обслуживает цикл событий, база не проверяется
+@app.get("/livez")
+async def liveness():
+    return {"status": "alive"}
+
+
+# Readiness: прогрев завершён, воркер можно включать в балансировку
+@app.get("/readyz")
+async def readiness_check():
+    if not readiness.ready:
+        raise HTTPException(status_code=503, detail=readiness.info())
+    return readiness.info()
+
 
+# Response cache counters
+@app.get("/cache/stats")
+async def cache_stats():
+    return cache.cache_info()
 
 
+# Состояние групп маршрутов
+@app.get("/admission/stats")
+async def admission_stats():
+    return admission_info()
 
+
+# Самые медленные запросы с момента запуска процесса (только ответившего воркера)
+@app.get("/admin/slow-queries")
+async def slow_queries(limit: int = Query(20, ge=1, le=500),
+                       order_by: str = Query("total_ms", pattern="^(total_ms|max_ms|count)$")):
+    return slow_query_recorder.top(limit=limit, order_by=order_by)
+
+
+# Метрики в формате Prometheus: только ответившего воркера, с меткой worker
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    groups = admission_info()
+    extra = []
+    for field, kind, help_text in (("in_flight", "gauge", "Requests running in a route group."),
+                                   ("waiting", "gauge", "Requests queued for a route group."),
+                                   ("shed", "counter", "Requests rejected by admission control.")):
+        name = f"admission_{field}" + ("_total" if kind == "counter" else "")
+        extra += render_family(name, help_text, kind, {(("group", group),): info[field] for group, info in groups.items()})
+    return PlainTextResponse(registry.render(extra), media_type="text/plain; version=0.0.4")
+
+
+
+
+# Только для разработки: один процесс с перезагрузкой; в продакшене — python serve.py
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "main:app",
         host="127.0.0.1",
@@ -0,0 +1,22 @@
+import argparse
+import logging
+from app.logging_config import setup_logging
+from app.archive import archive_closed_months
+from config.app_config import app_config
+
+setup_logging()
+logger = logging.getLogger("mt-surent-archive")
+
+def main():
+    parser = argparse.ArgumentParser(description="Move closed months of rides and payments to the archive tables")
+    parser.add_argument("--hot-months", type=int, default=app_config.ARCHIVE_HOT_MONTHS,
+                        help="closed months kept in the hot tables besides the current one")
+    parser.add_argument("--batch-size", type=int, default=app_config.ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--settle-seconds", type=float, default=app_config.ARCHIVE_WATERMARK_TTL_SECONDS,
+                        help="wait after moving the boundary; not less than the workers' watermark TTL")
+    args = parser.parse_args()
+    totals = archive_closed_months(args.hot_months, args.batch_size, args.settle_seconds)
+    logger.info(f"Архивация завершена: {totals}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import logging
+from app.logging_config import setup_logging
 from app.etl.orchestrator import ETLOrchestrator
 
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger("mt-surent-etl")
 
 def main():
@@ -0,0 +1,69 @@
+import importlib.util
+import logging
+import os
+
+from app.logging_config import setup_logging
+from app.database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+from config.app_config import app_config
+
+setup_logging()
+logger = logging.getLogger("mt-surent-server")
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+def worker_count() -> int:
+    if app_config.SERVER_WORKERS > 0:
+        return app_config.SERVER_WORKERS
+    # Учитываем привязку к ядрам (taskset, cgroup cpuset), а не все ядра хоста
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def check_shared_state(workers: int):
+    """Turn off the in-process response cache when workers could not invalidate each other's copies."""
+    if workers > 1 and app_config.CACHE_ENABLED and not app_config.CACHE_REDIS_URL:
+        # Кэш в памяти сбрасывается только в воркере, выполнившем запись: остальные отдавали бы старое
+        # до CACHE_TTL_SECONDS. Воркеры наследуют окружение, поэтому кэш выключается во всех
+        logger.warning(f"{workers} workers without CACHE_REDIS_URL: response cache disabled; "
+                       f"set CACHE_REDIS_URL to share it between workers")
+        os.environ["CACHE_ENABLED"] = "false"
+
+def main():
+    import uvicorn
+
+    workers = worker_count()
+    check_shared_state(workers)
+    # Воркеры наследуют окружение: по нему они делят между собой лимиты ADMISSION_GROUPS
+    os.environ["SERVER_WORKERS"] = str(workers)
+    loop = "uvloop" if _installed("uvloop") else "asyncio"
+    http = "httptools" if _installed("httptools") else "h11"
+    logger.info(
+        f"Starting {workers} workers on {app_config.SERVER_HOST}:{app_config.SERVER_PORT} "
+        f"(loop={loop}, http={http}); up to {workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)} DB connections in total"
+    )
+    # Каждый воркер — отдельный процесс, который заново импортирует main и создаёт свой engine;
+    # по SIGTERM воркеры перестают принимать соединения, дожидаются текущих запросов и закрывают пулы.
+    # Состояние в памяти остаётся у каждого воркера своим:
+    # - буфер телеметрии: свежие координаты видит только принявший их воркер, остальные — после записи
+    #   в базу (TELEMETRY_FLUSH_SECONDS);
+    # - /metrics, /admin/slow-queries, /cache/stats, /admission/stats отвечают за один воркер; метка
+    #   worker в /metrics различает процессы, сумма по серверу — sum without (worker)
+    uvicorn.run(
+        "main:app",
+        host=app_config.SERVER_HOST,
+        port=app_config.SERVER_PORT,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=app_config.SERVER_BACKLOG,
+        timeout_keep_alive=app_config.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=app_config.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        access_log=app_config.SERVER_ACCESS_LOG,
+        proxy_headers=True,
+        forwarded_allow_ips=app_config.SERVER_FORWARDED_ALLOW_IPS,
+        log_config=None,
+    )
+
+if __name__ == "__main__":
+    main()